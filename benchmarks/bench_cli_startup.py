@@ -0,0 +1,49 @@
+# CLI 冷启动基准：比较裸解释器、--version、透传 nerdctl 以及 --help 的启动耗时。
+# 用法: python -m benchmarks.bench_cli_startup [--repeat N]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _time_command(cmd: list[str], env: dict[str, str], repeat: int) -> float:
+    samples: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run(repeat: int = 10) -> dict[str, float]:
+    """返回各启动路径的中位耗时（秒）。透传路径使用一个立即退出的假 nerdctl。"""
+    with tempfile.TemporaryDirectory() as bindir:
+        fake_nerdctl = os.path.join(bindir, "nerdctl")
+        with open(fake_nerdctl, "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\nexit 0\n")
+        os.chmod(fake_nerdctl, 0o755)
+        env = dict(os.environ)
+        env["PATH"] = f"{bindir}{os.pathsep}{env.get('PATH', '')}"
+
+        python = [sys.executable]
+        return {
+            "bare_interpreter": _time_command(python + ["-c", "pass"], env, repeat),
+            "version": _time_command(python + ["-m", "mbctl", "--version"], env, repeat),
+            "passthrough": _time_command(python + ["-m", "mbctl", "ps"], env, repeat),
+            "help": _time_command(python + ["-m", "mbctl", "--help"], env, repeat),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark mbctl CLI cold start.")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# 单个容器 compose 文档渲染耗时的基准：直接渲染字典的 MBContainer.to_compose_dict，
+# 与构造并校验 ComposeConf 再 model_dump 的 to_compose_conf().to_compose_dict() 对比。
+# build_us 是构建一个容器时的全部渲染开销（渲染一次字典，序列化为 compose 文件，并用同一个字典计算指纹）；
+# build_validated_us 是以前的做法：校验模型后序列化 compose 文件，再单独渲染一次字典计算指纹。
+# 用法: python -m benchmarks.bench_compose_render [--containers 2000] [--repeat 5]
+import argparse
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.bench_ygg_address import make_containers
+from mbctl.MBContainer import MBContainer
+from mbctl.MBHost.MBContainerFingerprint import compute_fingerprint
+from mbctl.YamlUtils import yaml_dumps
+
+IMAGE_ID = "sha256:" + "0" * 64
+
+
+def _build_render(container: MBContainer) -> None:
+    compose_dict = container.to_compose_dict()
+    yaml_dumps(compose_dict)
+    compute_fingerprint(compose_dict, IMAGE_ID)
+
+
+def _build_render_validated(container: MBContainer) -> None:
+    container.to_compose_conf().to_compose_yaml_str()
+    compute_fingerprint(container.to_compose_dict(), IMAGE_ID)
+
+
+def _per_container_time(
+    containers: List[MBContainer], render: Callable[[MBContainer], object], repeat: int
+) -> float:
+    for container in containers:
+        render(container)  # 预热地址缓存
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for container in containers:
+            render(container)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) / len(containers)
+
+
+def run(count: int = 2000, repeat: int = 5) -> Dict[str, float]:
+    """返回每个容器的平均渲染耗时（微秒）。"""
+    containers = make_containers(count, local_access=8)
+    return {
+        "trusted_us": _per_container_time(containers, MBContainer.to_compose_dict, repeat) * 1e6,
+        "validated_us": _per_container_time(
+            containers, lambda c: c.to_compose_conf().to_compose_dict(), repeat
+        )
+        * 1e6,
+        "build_us": _per_container_time(containers, _build_render, repeat) * 1e6,
+        "build_validated_us": _per_container_time(containers, _build_render_validated, repeat) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-container compose rendering.")
+    parser.add_argument("--containers", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.containers, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# MBContainerTree 构建与分层的扩展性基准，与旧的 O(V²+VE) 实现对比。
+# 用法: python -m benchmarks.bench_container_tree [--sizes 10000 50000 100000] [--legacy-max 5000]
+import argparse
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+
+from mbctl.MBContainer import MBContainerTree
+
+
+@dataclass
+class StubContainer:
+    name: str
+    require: List[str] = field(default_factory=list)
+
+    def resolve_references(self, reference_containers) -> None:
+        pass
+
+
+def make_stub_containers(
+    count: int, depth: int = 6, max_requires: int = 3, seed: int = 0
+) -> List[StubContainer]:
+    """生成 count 个容器，分为 depth 层，每个容器随机依赖更低层中最多 max_requires 个容器。"""
+    rng = random.Random(seed)
+    containers: List[StubContainer] = []
+    layer_start = 0
+    for i in range(count):
+        layer = i * depth // count
+        if i and layer != (i - 1) * depth // count:
+            layer_start = i
+        require: List[str] = []
+        if layer_start:
+            require = sorted(
+                {f"ct{rng.randrange(layer_start)}" for _ in range(rng.randint(1, max_requires))}
+            )
+        containers.append(StubContainer(f"ct{i}", require))
+    rng.shuffle(containers)
+    return containers
+
+
+class LegacyContainerTree:
+    """旧版 MBContainerTree 的环检测与分层算法，仅用于对比。"""
+
+    def __init__(self, containers):
+        self._name_to_container = {c.name: c for c in containers}
+        self._deps: Dict[str, Set[str]] = {c.name: set(c.require) for c in containers}
+        self._assert_acyclic()
+
+    def _assert_acyclic(self) -> None:
+        deps_copy = {k: set(v) for k, v in self._deps.items()}
+        remaining = set(deps_copy.keys())
+        while remaining:
+            leaves = [n for n in remaining if len(deps_copy[n]) == 0]
+            if not leaves:
+                break
+            for leaf in leaves:
+                remaining.remove(leaf)
+                for other in remaining:
+                    if leaf in deps_copy[other]:
+                        deps_copy[other].remove(leaf)
+        if remaining:
+            raise ValueError("cycle")
+
+    def levels(self):
+        deps_copy = {k: set(v) for k, v in self._deps.items()}
+        remaining = set(deps_copy.keys())
+        levels = []
+        while remaining:
+            leaf_names = [n for n in remaining if len(deps_copy[n]) == 0]
+            levels.append([self._name_to_container[n] for n in leaf_names])
+            for leaf in leaf_names:
+                remaining.remove(leaf)
+                for other in remaining:
+                    deps_copy[other].discard(leaf)
+        return levels
+
+    def resolve_all(self) -> None:
+        for level in self.levels():
+            for container in level:
+                container.resolve_references({})
+
+
+def _time_tree(tree_cls, containers) -> float:
+    start = time.perf_counter()
+    tree = tree_cls(containers)
+    tree.resolve_all()
+    tree.levels()
+    return time.perf_counter() - start
+
+
+def run(sizes: List[int], legacy_max: int = 5000) -> Dict[str, Dict[str, float]]:
+    """返回每个规模下 构建+resolve_all+levels 的耗时（秒）。超过 legacy_max 的规模不运行旧实现。"""
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        containers = make_stub_containers(size)
+        entry = {"current": _time_tree(MBContainerTree, containers)}
+        if size <= legacy_max:
+            entry["legacy"] = _time_tree(LegacyContainerTree, containers)
+        results[str(size)] = entry
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark MBContainerTree scaling.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.legacy_max), indent=2))
+
+
+if __name__ == "__main__":
+    main()
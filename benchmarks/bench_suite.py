@@ -0,0 +1,195 @@
+# 启动与热点路径的基准套件。在不同规模的合成主机上测量：
+# - host_load / host_load_cached：MBHost() 加载（关闭 / 打开配置缓存）
+# - tree_build_resolve：由已读取的配置构造 MBContainer、构建 MBContainerTree 并解析全部引用
+# - render_compose：所有容器的 compose 文件，与构建时相同（yaml_dumps(to_compose_dict())）
+# - build_all：build_all_containers，nerdctl 由带延迟的 SimulatedNerdClient 代替
+# - list：刷新容器状态并列出所有容器（mbctl list 在本进程中的工作）
+# 以及 CLI 冷启动（bench_cli_startup）。结果保存为 JSON，可以与之前的结果对比以发现性能回退。
+# 用法:
+#   python -m benchmarks.bench_suite [--sizes 100 1000] [--latency 0.005] [--output results.json]
+#   python -m benchmarks.bench_suite --compare baseline.json [--threshold 0.2]
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import bench_cli_startup
+from benchmarks.synthetic_host import PREFIX, YGG_ADDRESS, SyntheticHostSpec, write_synthetic_host
+from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import MBContainer, MBContainerTree
+from mbctl.MBHost import MBHost
+from mbctl.MBHost.NerdClient import SimulatedNerdClient
+from mbctl.YamlUtils import yaml_dumps
+from mbctl.cli.main import __version__
+
+RESULT_FORMAT = 1
+
+
+def _median_time(fn: Callable[[], object], repeat: int, setup: Optional[Callable[[], object]] = None) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _load_host(client: SimulatedNerdClient) -> MBHost:
+    return MBHost(client=client, yggaddr=YGG_ADDRESS, yggprefix=PREFIX)
+
+
+def _tree_build_resolve(host: MBHost, names: List[str]) -> None:
+    containers = [MBContainer(name, host._load_container_conf(name), PREFIX) for name in names]
+    tree = MBContainerTree(containers)
+    tree.resolve_all()
+
+
+def _render_compose(host: MBHost) -> None:
+    for container in host.list_containers():
+        yaml_dumps(container.to_compose_dict())
+
+
+def _list(host: MBHost) -> None:
+    host.refresh_container_statuses()
+    host.list_container_summaries()
+
+
+def bench_host(spec: SyntheticHostSpec, latency: float, jobs: int, repeat: int) -> Dict[str, float]:
+    """在一个临时 storage_path 中生成合成主机并测量各项耗时（秒，取中位数）。"""
+    with tempfile.TemporaryDirectory() as storage_path:
+        mb_config.storage_path = storage_path
+        names = write_synthetic_host(storage_path, spec)
+        client = SimulatedNerdClient(latency)
+
+        mb_config.conf_cache = False
+        results = {"host_load": _median_time(lambda: _load_host(client), repeat)}
+        mb_config.conf_cache = True
+        _load_host(client)  # 写入配置缓存
+        results["host_load_cached"] = _median_time(lambda: _load_host(client), repeat)
+
+        host = _load_host(client)
+        results["tree_build_resolve"] = _median_time(lambda: _tree_build_resolve(host, names), repeat)
+        results["render_compose"] = _median_time(lambda: _render_compose(host), repeat)
+        results["build_all"] = _median_time(
+            lambda: host.build_all_containers(jobs=jobs), repeat, setup=client.reset
+        )
+        results["list"] = _median_time(lambda: _list(host), repeat)
+        return results
+
+
+def run(
+    sizes: List[int],
+    latency: float = 0.005,
+    jobs: int = 8,
+    repeat: int = 3,
+    cli_repeat: int = 10,
+    spec_overrides: Optional[Dict[str, int]] = None,
+) -> Dict[str, Any]:
+    """运行整个套件，返回可以直接保存为 JSON 的结果。cli_repeat 为 0 时跳过 CLI 冷启动测量。"""
+    saved = (mb_config.storage_path, mb_config.conf_cache)
+    hosts: Dict[str, Dict[str, float]] = {}
+    try:
+        for size in sizes:
+            spec = SyntheticHostSpec(count=size, **(spec_overrides or {}))
+            hosts[str(size)] = bench_host(spec, latency, jobs, repeat)
+    finally:
+        mb_config.storage_path, mb_config.conf_cache = saved
+    return {
+        "format": RESULT_FORMAT,
+        "meta": {
+            "mbctl": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "latency": latency,
+            "jobs": jobs,
+            "repeat": repeat,
+            "spec": spec_overrides or {},
+        },
+        "hosts": hosts,
+        "cli_startup": bench_cli_startup.run(cli_repeat) if cli_repeat else {},
+    }
+
+
+def _flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    flat = {
+        f"hosts.{size}.{name}": value
+        for size, metrics in results.get("hosts", {}).items()
+        for name, value in metrics.items()
+    }
+    flat.update({f"cli_startup.{name}": value for name, value in results.get("cli_startup", {}).items()})
+    return flat
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """
+    对比两次结果中都存在的指标，返回每个指标的 {name, baseline, current, change}，按 change 从大到小排序。
+    change 是相对变化（0.25 表示慢了 25%），超过 threshold 的指标标记为 regression。
+    """
+    base_flat, cur_flat = _flatten(baseline), _flatten(current)
+    rows = []
+    for name in sorted(base_flat.keys() & cur_flat.keys()):
+        base, cur = base_flat[name], cur_flat[name]
+        change = (cur - base) / base if base > 0 else 0.0
+        rows.append(
+            {"name": name, "baseline": base, "current": cur, "change": change, "regression": change > threshold}
+        )
+    return sorted(rows, key=lambda r: r["change"], reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the mbctl benchmark suite.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds each fake nerdctl call takes.")
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cli-repeat", type=int, default=10, help="0 skips the CLI cold start benchmark.")
+    parser.add_argument("--depth", type=int, help="Levels of require chains.")
+    parser.add_argument("--max-requires", type=int, help="Most containers each container requires.")
+    parser.add_argument("--reference-mounts", type=int, help="Mounts referencing a required container.")
+    parser.add_argument("--local-access", type=int, help="local_access fan-out per container.")
+    parser.add_argument("--output", "-o", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against a previous results JSON file.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression.")
+    args = parser.parse_args()
+
+    spec_overrides = {
+        key: value
+        for key, value in {
+            "depth": args.depth,
+            "max_requires": args.max_requires,
+            "reference_mounts": args.reference_mounts,
+            "local_access": args.local_access,
+        }.items()
+        if value is not None
+    }
+    results = run(args.sizes, args.latency, args.jobs, args.repeat, args.cli_repeat, spec_overrides)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, results, args.threshold)
+        for row in rows:
+            marker = "REGRESSION" if row["regression"] else ""
+            print(
+                f"{row['name']:<40} {row['baseline']:.6f}s -> {row['current']:.6f}s {row['change']:+.1%} {marker}",
+                file=sys.stderr,
+            )
+        if any(row["regression"] for row in rows):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
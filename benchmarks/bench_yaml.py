@@ -0,0 +1,82 @@
+# yaml 读写的基准：在不同规模的合成主机上，比较 libyaml（CSafeLoader/CSafeDumper）与纯 Python 实现的
+# 主机加载（读取并校验所有容器配置）和 compose 渲染耗时。
+# 用法: python -m benchmarks.bench_yaml [--sizes 100 500 2000] [--repeat 3]
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+import yaml
+
+from benchmarks.synthetic_host import PREFIX, YGG_ADDRESS, SyntheticHostSpec, write_synthetic_host
+from mbctl import YamlUtils
+from mbctl.MBConfig import mb_config
+from mbctl.MBHost import MBHost
+from mbctl.MBHost.NerdClient import SimulatedNerdClient
+
+
+@contextmanager
+def yaml_implementation(use_libyaml: bool) -> Iterator[None]:
+    saved = (YamlUtils.SafeLoader, YamlUtils.SafeDumper)
+    if not use_libyaml:
+        YamlUtils.SafeLoader, YamlUtils.SafeDumper = yaml.SafeLoader, yaml.SafeDumper
+    try:
+        yield
+    finally:
+        YamlUtils.SafeLoader, YamlUtils.SafeDumper = saved
+
+
+def _median_time(fn: Callable[[], object], repeat: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def _load_host() -> MBHost:
+    return MBHost(client=SimulatedNerdClient(), yggaddr=YGG_ADDRESS, yggprefix=PREFIX)
+
+
+def _render_all(host: MBHost) -> None:
+    for container in host.list_containers():
+        YamlUtils.yaml_dumps(container.to_compose_dict())
+
+
+def run(sizes: List[int], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """返回每个规模下主机加载与渲染全部 compose 的中位耗时（秒）。主机加载时关闭配置缓存，以测量 yaml 解析本身。"""
+    implementations = {"libyaml": True, "pure": False} if YamlUtils.HAS_LIBYAML else {"pure": False}
+    saved_storage_path, saved_conf_cache = mb_config.storage_path, mb_config.conf_cache
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        mb_config.conf_cache = False
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as storage_path:
+                mb_config.storage_path = storage_path
+                write_synthetic_host(storage_path, SyntheticHostSpec(count=size))
+                entry: Dict[str, float] = {}
+                for label, use_libyaml in implementations.items():
+                    with yaml_implementation(use_libyaml):
+                        entry[f"load_{label}"] = _median_time(_load_host, repeat)
+                        host = _load_host()
+                        entry[f"render_{label}"] = _median_time(lambda: _render_all(host), repeat)
+                results[str(size)] = entry
+    finally:
+        mb_config.storage_path, mb_config.conf_cache = saved_storage_path, saved_conf_cache
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark YAML load/dump with and without libyaml.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
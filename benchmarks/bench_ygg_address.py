@@ -0,0 +1,102 @@
+# 渲染所有容器 compose 配置时 Yggdrasil 地址计算的基准，与旧的逐次解析前缀、无缓存的实现对比。
+# 用法: python -m benchmarks.bench_ygg_address [--sizes 100 1000 5000] [--local-access 8] [--repeat 3]
+import argparse
+import hashlib
+import ipaddress
+import json
+import random
+import time
+from typing import Dict, Iterable, List
+
+from mbctl.MBContainer import MBContainer
+from mbctl.datatypes import MBContainerConf
+from mbctl.network.ygg_address_deriver import YggAddressDeriver
+
+PREFIX = "300:64f7:cae4:9395::/64"
+
+
+def legacy_string_to_v6suffix(prefix: str, src_str: str) -> str:
+    """旧版 string_to_v6suffix：每次调用都解析前缀并构造地址。"""
+    network = ipaddress.IPv6Network(prefix, strict=False)
+    prefix_int = int(network.network_address)
+    digest = hashlib.sha256(src_str.encode("utf-8")).digest()
+    hash_int = int.from_bytes(digest, "big")
+    remaining_bits = 128 - network.prefixlen
+    suffix = hash_int & ((1 << remaining_bits) - 1)
+    ipv6_int = (prefix_int & (~((1 << remaining_bits) - 1))) | suffix
+    return str(ipaddress.IPv6Address(ipv6_int))
+
+
+class LegacyAddressDeriver(YggAddressDeriver):
+    """不缓存、每次重新解析前缀的计算器，仅用于对比。"""
+
+    def derive(self, name: str) -> str:
+        return legacy_string_to_v6suffix(self.prefix, name)
+
+    def derive_many(self, names: Iterable[str]) -> Dict[str, str]:
+        return {name: self.derive(name) for name in names}
+
+
+def make_containers(count: int, local_access: int, seed: int = 0) -> List[MBContainer]:
+    """生成 count 个启用 Yggdrasil 的容器，每个容器的 local_access 中有 local_access 个其他容器，dns 指向另一个容器。"""
+    rng = random.Random(seed)
+    names = [f"ct{i}" for i in range(count)]
+    containers = []
+    for name in names:
+        conf = MBContainerConf(
+            image="example/app",
+            local_access=set(rng.sample(names, min(local_access, count))),
+            dns=rng.choice(names),
+        )
+        container = MBContainer(name, conf, PREFIX)
+        container.resolve_references({})
+        containers.append(container)
+    return containers
+
+
+def _time_render(containers: List[MBContainer], deriver: YggAddressDeriver, repeat: int) -> float:
+    for container in containers:
+        container.address_deriver = deriver
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for container in containers:
+            container.to_compose_conf()
+    return (time.perf_counter() - start) / repeat
+
+
+def _time_addresses(names: List[str], deriver: YggAddressDeriver, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        deriver.derive_many(names)
+    return (time.perf_counter() - start) / repeat
+
+
+def run(sizes: List[int], local_access: int = 8, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    返回每个规模下的耗时（秒）：
+    render_* 为渲染全部容器 compose 配置一次的耗时，addresses_* 为计算全部容器地址一次的耗时。
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        containers = make_containers(size, local_access)
+        names = [c.name for c in containers]
+        results[str(size)] = {
+            "render_current": _time_render(containers, YggAddressDeriver(PREFIX), repeat),
+            "render_legacy": _time_render(containers, LegacyAddressDeriver(PREFIX), repeat),
+            "addresses_current": _time_addresses(names, YggAddressDeriver(PREFIX), repeat),
+            "addresses_legacy": _time_addresses(names, LegacyAddressDeriver(PREFIX), repeat),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Yggdrasil address derivation.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--local-access", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.local_access, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# 合成主机生成器：在一个 storage_path 下写入 N 个容器配置，用于基准测试。
+# 容器分为 depth 层，每个容器 require 更低层中的若干容器，构成宽度和深度可调的依赖链；
+# 部分挂载点引用所 require 容器的挂载点，local_access 指向随机的其他容器。
+import os
+import random
+from dataclasses import dataclass
+from posixpath import join
+from typing import Dict, List
+
+from mbctl.MBConfig import mb_config
+from mbctl.datatypes import MBContainerConf, MBContainerMountConf, MBContainerMountPointConf, MountType
+
+PREFIX = "300:64f7:cae4:9395::/64"
+YGG_ADDRESS = "200:64f7:cae4:9395:44f1:455d:de99:e7"
+
+
+@dataclass
+class SyntheticHostSpec:
+    count: int = 100
+    # require 链的层数；第 0 层的容器没有依赖
+    depth: int = 6
+    # 每个容器最多 require 的容器数
+    max_requires: int = 3
+    # 每个容器引用其依赖的挂载点的个数（依赖存在时）
+    reference_mounts: int = 1
+    # 每个容器 local_access 中的容器数
+    local_access: int = 4
+    # 每个容器的环境变量个数
+    environment: int = 8
+    seed: int = 0
+
+
+def make_container_confs(spec: SyntheticHostSpec) -> Dict[str, MBContainerConf]:
+    """按 spec 生成 容器名 -> 配置，依赖在前。"""
+    rng = random.Random(spec.seed)
+    names = [f"ct{i}" for i in range(spec.count)]
+    confs: Dict[str, MBContainerConf] = {}
+    layer_start = 0
+    for i, name in enumerate(names):
+        layer = i * spec.depth // spec.count
+        if i and layer != (i - 1) * spec.depth // spec.count:
+            layer_start = i
+        require: List[str] = []
+        if layer_start:
+            require = sorted(
+                {names[rng.randrange(layer_start)] for _ in range(rng.randint(1, spec.max_requires))}
+            )
+        data = {
+            "/data": MBContainerMountPointConf(owner=[10001, 10001]),
+            "/cache": MBContainerMountPointConf(),
+        }
+        for k, dep in enumerate(require[: spec.reference_mounts]):
+            data[f"/shared{k}"] = MBContainerMountPointConf(source=f"{dep}:/data")
+        confs[name] = MBContainerConf(
+            image=f"docker.io/example/app{i % 10}:latest",
+            autostart=bool(i % 2),
+            require=require,
+            mount=MBContainerMountConf(
+                data=data,
+                log={"/log": MBContainerMountPointConf()},
+                conf={"/etc/app": MBContainerMountPointConf()},
+            ),
+            port=[(20000 + i, 9000)],
+            environment={f"APP_SETTING_{k}": f"value-{rng.random()}" for k in range(spec.environment)},
+            local_access=set(rng.sample(names, min(spec.local_access, spec.count))),
+        )
+    return confs
+
+
+def write_synthetic_host(storage_path: str, spec: SyntheticHostSpec) -> List[str]:
+    """在 storage_path/conf 下写入 spec 描述的所有容器配置，返回容器名。"""
+    confs = make_container_confs(spec)
+    for name, conf in confs.items():
+        conf_dir = join(storage_path, MountType.conf.value, name)
+        os.makedirs(conf_dir, exist_ok=True)
+        conf.to_yaml_file(join(conf_dir, mb_config.config_file))
+    return list(confs)
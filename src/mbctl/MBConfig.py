@@ -1,8 +1,10 @@
 import posixpath
+from typing import Literal, Optional
 
-import yaml
 from pydantic import BaseModel, ConfigDict, Field
 
+from mbctl.YamlUtils import yaml_load
+
 MAN8S_CONFIG_FILE = "/etc/mbctl/config.yaml"
 
 
@@ -21,6 +23,23 @@ class NerdConfig(BaseModel):
     snapshotter: str = "btrfs"
 
 
+class YggdrasilConfig(BaseModel):
+    # 宿主机 Yggdrasil 身份（地址与子网）的获取方式。
+    model_config = ConfigDict(extra="forbid")
+
+    # 同时设置 address 与 subnet 时直接使用，不再查询 yggdrasil。
+    address: Optional[str] = None
+    subnet: Optional[str] = None
+    # 设置后直接读取 yggdrasil 管理套接字，例如 "unix:///var/run/yggdrasil.sock"，失败时退回 yggdrasilctl。
+    admin_socket: Optional[str] = None
+    # 查询结果缓存到 storage_path/.mbctl 下的有效期（秒）。
+    cache_ttl: int = 86400
+    # 这些文件（yggdrasil 配置、私钥文件等）改变时缓存立即失效。
+    watch_files: list[str] = Field(
+        default_factory=lambda: ["/etc/yggdrasil.conf", "/etc/yggdrasil/yggdrasil.conf"]
+    )
+
+
 class MBConfig(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -28,13 +47,20 @@ class MBConfig(BaseModel):
     network: MBNetworkNameConfig = Field(default_factory=MBNetworkNameConfig)
     config_file: str = "container.yaml"
     nerdconfig: NerdConfig = Field(default_factory=NerdConfig)
+    yggdrasil: YggdrasilConfig = Field(default_factory=YggdrasilConfig)
     local_domain: str = "man8s.local"
+    # 是否在 storage_path/.mbctl/cache 下缓存已校验的容器配置
+    conf_cache: bool = True
+    # 容器挂载根目录 storage_path/<type>/<容器名> 的存储方式：普通目录，或 btrfs 子卷
+    mount_backend: Literal["dir", "btrfs"] = "dir"
+    # 调试用：计算 compose 文档（容器指纹）时也构造并校验 compose 模型，而不是直接渲染字典
+    strict_models: bool = False
 
 
 def _load_mb_config() -> MBConfig:
     if posixpath.exists(MAN8S_CONFIG_FILE):
         with open(MAN8S_CONFIG_FILE, "r", encoding="utf-8") as f:
-            config_data = yaml.safe_load(f) or {}
+            config_data = yaml_load(f) or {}
         return MBConfig.model_validate(config_data)
     return MBConfig()
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Mapping, Optional, Sequence
+from typing import Any, Mapping, Optional, Sequence
 from mbctl.datatypes import (
     ComposeConf,
     MBContainerConf,
@@ -12,8 +12,10 @@ from .MBContainerPort import MBContainerPortMap
 from .MBContainerMetadata import MBContainerMetadata
 from .MBContainerStatus import MBContainerStatus
 from .MBContainerDNS import DNSType, MBContainerDNS
+from .MBContainerRunArgs import extra_configs_to_run_args, service_fields_to_run_args
 from mbctl.MBConfig import mb_config
-from mbctl.network import string_to_v6suffix
+from mbctl.MBProfile import profiled
+from mbctl.network import get_ygg_address_deriver
 from copy import copy
 
 
@@ -44,9 +46,10 @@ class MBContainer:
         self.extra_compose_configs = container_conf.extra_compose_configs
 
         self.host_yggdrasil_prefix = host_yggdrasil_prefix
+        self.address_deriver = get_ygg_address_deriver(host_yggdrasil_prefix)
         self.yggdrasil_addr: Optional[str] = None
         if self.enable_ygg:
-            self.yggdrasil_addr = string_to_v6suffix(host_yggdrasil_prefix, self.name)
+            self.yggdrasil_addr = self.address_deriver.derive(self.name)
         else:
             if self.dns.type == DNSType.CONTAINER:
                 raise ValueError(
@@ -62,10 +65,8 @@ class MBContainer:
         self.mount.resolve_references(refs)
         self.resolved = True
 
-    def to_compose_conf(self) -> ComposeConf:
-        """
-        Convert the loaded MBContainerConf into a ComposeConf instance.
-        """
+    def _compose_service_fields(self) -> tuple[str, dict[str, Any]]:
+        """返回 (网络名, ComposeServiceConf 的字段)。"""
         network_name = (
             mb_config.network.withygg if self.enable_ygg else mb_config.network.noygg
         )
@@ -76,30 +77,71 @@ class MBContainer:
         if self.enable_ygg:
             real_local_access_container_names = copy(self.local_access)
             real_local_access_container_names.add(self.name)
+            addresses = self.address_deriver.derive_many(real_local_access_container_names)
             extra_hosts = {
-                f"{ct_name}.{mb_config.local_domain}": string_to_v6suffix(
-                    self.host_yggdrasil_prefix, ct_name
-                )
-                for ct_name in real_local_access_container_names
+                f"{ct_name}.{mb_config.local_domain}": address
+                for ct_name, address in addresses.items()
             }
         else:
             extra_hosts = {}
 
-        compose_service = ComposeServiceConf(
+        return network_name, dict(
             image=self.image,
             container_name=self.name,
             hostname=self.name,
             networks=[network_name],
             volumes=self.mount.to_compose_volumes(),
             ports=self.port.to_compose_ports(),
-            environment=self.environment,
+            environment=dict(self.environment),
             restart=restart,
             extra_hosts=extra_hosts,
-            dns=self.dns.to_compose_dns_entry(self.host_yggdrasil_prefix),
+            dns=self.dns.to_compose_dns_entry(self.address_deriver),
         )
 
+    @profiled()
+    def to_compose_conf(self) -> ComposeConf:
+        """
+        Convert the loaded MBContainerConf into a ComposeConf instance.
+        """
+        network_name, service_fields = self._compose_service_fields()
         return ComposeConf(
             extra_compose_configs=self.extra_compose_configs,
-            services={self.name: compose_service},
+            services={self.name: ComposeServiceConf(**service_fields)},
             networks={network_name: ComposeNetworkConfig(external=True)}
         )
+
+    def to_nerdctl_run_command(self, command: Sequence[str], run_name: str) -> list[str]:
+        """
+        返回一条 nerdctl run --rm -it 命令：以 run_name 为名，用与本容器相同的镜像、挂载点、网络、hostname、extra_hosts 和 DNS
+        启动一个交互式的临时容器并执行 command。不会影响本容器本身，退出后临时容器被自动删除。
+        """
+        network_name, service_fields = self._compose_service_fields()
+        return [
+            "nerdctl",
+            "run",
+            "--rm",
+            "-it",
+            "--name",
+            run_name,
+            *service_fields_to_run_args(network_name, service_fields),
+            *extra_configs_to_run_args(self.extra_compose_configs),
+            "--entrypoint",
+            command[0],
+            self.image,
+            *command[1:],
+        ]
+
+    @profiled()
+    def to_compose_dict(self) -> dict[str, Any]:
+        """
+        与 self.to_compose_conf().to_compose_dict() 相同。所有字段都派生自已校验的 MBContainerConf，
+        所以默认直接渲染字典，不再构造和校验 compose 模型；mb_config.strict_models 为 True 时走完整校验的路径。
+        """
+        if mb_config.strict_models:
+            return self.to_compose_conf().to_compose_dict()
+        network_name, service_fields = self._compose_service_fields()
+        return ComposeConf.render_trusted_dict(
+            services={self.name: service_fields},
+            networks={network_name: {"external": True}},
+            extra_compose_configs=self.extra_compose_configs,
+        )
@@ -2,7 +2,7 @@ from enum import StrEnum
 import ipaddress
 from typing import Optional
 
-from mbctl.network.string_to_v6suffix import string_to_v6suffix
+from mbctl.network.ygg_address_deriver import YggAddressDeriver, get_ygg_address_deriver
 
 
 class DNSType(StrEnum):
@@ -30,14 +30,21 @@ class MBContainerDNS:
         except ValueError:
             return False
 
-    def to_compose_dns_entry(self, host_yggdrasil_prefix: str) -> Optional[str]:
+    def to_compose_dns_entry(
+        self, host_yggdrasil_prefix: str | YggAddressDeriver
+    ) -> Optional[str]:
         if self.type == DNSType.HOST or self.value is None:
             return None
         elif self.type == DNSType.IP_ADDRESS:
             return self.value
         elif self.type == DNSType.CONTAINER:
             # Convert container name to Yggdrasil address
-            return string_to_v6suffix(host_yggdrasil_prefix, self.value)
+            deriver = (
+                host_yggdrasil_prefix
+                if isinstance(host_yggdrasil_prefix, YggAddressDeriver)
+                else get_ygg_address_deriver(host_yggdrasil_prefix)
+            )
+            return deriver.derive(self.value)
 
     def to_mbcontainer_dns_str(self) -> str:
         if self.type == DNSType.HOST or self.value is None:
@@ -73,6 +73,13 @@ class MBContainerMount:
         self.mount_points: list[MBContainerMountEntry] = self._build_mount_points(
             mount_conf
         )
+        # 挂载点索引：容器内路径 -> 挂载点，(挂载类型, 容器内路径) -> 挂载点。
+        # 同一个容器内路径出现在多种挂载类型中时，按 target 查找返回第一个，与 mount_points 的顺序一致。
+        self._entries_by_target: dict[str, MBContainerMountEntry] = {}
+        self._entries_by_type_target: dict[Tuple[MountType, str], MBContainerMountEntry] = {}
+        for entry in self.mount_points:
+            self._entries_by_target.setdefault(entry.target, entry)
+            self._entries_by_type_target[(entry.type, entry.target)] = entry
 
     def _build_mount_points(
         self, mount_conf: MBContainerMountConf
@@ -164,13 +171,24 @@ class MBContainerMount:
         return ref_container
 
     def get_mount_entry_by_target(self, target_path: str) -> MBContainerMountEntry:
-        entry = next((e for e in self.mount_points if e.target == target_path), None)
+        entry = self._entries_by_target.get(target_path)
         if entry is None:
             raise ValueError(
                 f"Mount entry with target path '{target_path}' not found in container '{self.container_name}'."
             )
         return entry
 
+    def get_mount_entry(self, mount_type: MountType, target_path: str) -> Optional[MBContainerMountEntry]:
+        return self._entries_by_type_target.get((mount_type, target_path))
+
+    def real_mount_sources(self) -> set[str]:
+        """所有已解析的挂载点的真实挂载源路径，包括引用其他容器的挂载点。"""
+        return {
+            entry.source.real_mount_source
+            for entry in self.mount_points
+            if entry.source.real_mount_source is not None
+        }
+
     def to_compose_volumes(self) -> list[str]:
         return [entry.to_docker_mount_str() for entry in self.mount_points]
 
@@ -0,0 +1,69 @@
+# 把容器的 compose 服务配置翻译为 nerdctl run 的参数，用于不经过 compose 项目、一次 nerdctl run 启动一个临时容器（离线 shell）。
+# extra_compose_configs 中只翻译下面列出的、nerdctl run 有对应选项的键；与一次性交互容器无关的键被忽略，其他键记录警告后忽略。
+from typing import Any
+
+from mbctl.MBLog import mb_logger
+
+_FLAG_OPTIONS = {
+    "privileged": "--privileged",
+    "init": "--init",
+    "read_only": "--read-only",
+}
+_VALUE_OPTIONS = {
+    "user": "--user",
+    "working_dir": "--workdir",
+    "shm_size": "--shm-size",
+    "pid": "--pid",
+    "ipc": "--ipc",
+}
+_LIST_OPTIONS = {
+    "cap_add": "--cap-add",
+    "cap_drop": "--cap-drop",
+    "devices": "--device",
+    "security_opt": "--security-opt",
+    "tmpfs": "--tmpfs",
+    "group_add": "--group-add",
+}
+# key=value 形式的选项，compose 中可以写成字典或 "key=value" 列表
+_MAPPING_OPTIONS = {
+    "sysctls": "--sysctl",
+    "labels": "--label",
+}
+# 离线 shell 自己决定这些行为（--rm、-it、--entrypoint），或者它们对一次性容器没有意义
+_IGNORED_KEYS = frozenset(
+    {"restart", "entrypoint", "command", "tty", "stdin_open", "depends_on", "healthcheck", "container_name"}
+)
+
+
+def extra_configs_to_run_args(extra_compose_configs: dict[str, Any]) -> list[str]:
+    args: list[str] = []
+    for key, value in extra_compose_configs.items():
+        if key in _FLAG_OPTIONS:
+            if value:
+                args.append(_FLAG_OPTIONS[key])
+        elif key in _VALUE_OPTIONS:
+            args += [_VALUE_OPTIONS[key], str(value)]
+        elif key in _LIST_OPTIONS:
+            for item in [value] if isinstance(value, str) else value:
+                args += [_LIST_OPTIONS[key], str(item)]
+        elif key in _MAPPING_OPTIONS:
+            items = value.items() if isinstance(value, dict) else (str(i).split("=", 1) for i in value)
+            for item_key, item_value in items:
+                args += [_MAPPING_OPTIONS[key], f"{item_key}={item_value}"]
+        elif key not in _IGNORED_KEYS:
+            mb_logger.warning(f"Extra compose configuration '{key}' is not supported by nerdctl run and is ignored.")
+    return args
+
+
+def service_fields_to_run_args(network_name: str, fields: dict[str, Any]) -> list[str]:
+    """compose 服务字段对应的 nerdctl run 选项。不发布端口，也不设置重启策略。"""
+    args = ["--hostname", fields["hostname"], "--network", network_name]
+    for volume in fields["volumes"]:
+        args += ["-v", volume]
+    for key, value in fields["environment"].items():
+        args += ["-e", f"{key}={value}"]
+    for host, address in fields["extra_hosts"].items():
+        args += ["--add-host", f"{host}:{address}"]
+    if fields["dns"] is not None:
+        args += ["--dns", fields["dns"]]
+    return args
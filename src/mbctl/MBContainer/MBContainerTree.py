@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, List, Mapping, Sequence, Set
+from collections import deque
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Set
 
+from mbctl.MBProfile import profiled
 from .MBContainer import MBContainer
 
 
@@ -13,6 +15,9 @@ class MBContainerTree:
     - 初始化时传入一组尚未解析的 `MBContainer` 对象。
     - 调用 `resolve_all()`，将按依赖树的最底层到最上层顺序依次调用每个容器的 `resolve_references()`，最终原地解析完毕。
     - 如需观察层次结构，可调用 `levels()` 获取从叶子到根的分层列表。
+
+    构造时只建立一次反向邻接表和入度，并用一次 Kahn 遍历在 O(V+E) 内完成环检测和分层，分层结果会被缓存。
+    新增或修改单个容器时使用 `upsert()`，只会重新解析该容器以及（传递地）依赖它的容器。
     """
 
     def __init__(self, containers: Sequence[MBContainer]):
@@ -21,6 +26,8 @@ class MBContainerTree:
         }
         # 依赖映射：容器名 -> 其直接依赖的容器名集合
         self._deps: Dict[str, Set[str]] = {c.name: set(c.require) for c in containers}
+        # 反向依赖映射：容器名 -> 直接依赖它的容器名列表
+        self._dependents: Dict[str, List[str]] = {name: [] for name in self._deps}
 
         # 校验：所有依赖都必须在输入集合中出现
         for name, reqs in self._deps.items():
@@ -29,78 +36,193 @@ class MBContainerTree:
                 raise ValueError(
                     f"Container '{name}' requires missing containers: {missing}"
                 )
+            for req in reqs:
+                self._dependents[req].append(name)
 
+        self._levels: Optional[List[List[MBContainer]]] = None
         # 校验：不得存在环（要求依赖必须为树/森林结构）
         self._assert_acyclic()
 
     def _assert_acyclic(self) -> None:
-        # 使用 Kahn 算法检测环
-        deps_copy: Dict[str, Set[str]] = {k: set(v) for k, v in self._deps.items()}
-        remaining: Set[str] = set(deps_copy.keys())
-        progress = True
-        while progress and remaining:
-            progress = False
-            # 找到当前叶子（无依赖）
-            leaves = [n for n in remaining if len(deps_copy[n]) == 0]
-            if not leaves:
-                # 若没有叶子却仍有剩余节点，说明存在环
-                break
-            progress = True
-            for leaf in leaves:
-                remaining.remove(leaf)
-                # 从其他节点依赖集合中移除该叶子
-                for other in remaining:
-                    if leaf in deps_copy[other]:
-                        deps_copy[other].remove(leaf)
-        if remaining:
+        # 分层的过程同时完成了环检测
+        self._cached_levels()
+
+    def _cached_levels(self) -> List[List[MBContainer]]:
+        if self._levels is None:
+            self._levels = self._compute_levels()
+        return self._levels
+
+    def _compute_levels(self) -> List[List[MBContainer]]:
+        # Kahn 算法：入度为容器尚未处理的依赖数，每个节点和每条边只处理一次。
+        in_degree: Dict[str, int] = {
+            name: len(reqs) for name, reqs in self._deps.items()
+        }
+        current = [name for name, degree in in_degree.items() if degree == 0]
+        levels: List[List[MBContainer]] = []
+        processed = 0
+        while current:
+            levels.append([self._name_to_container[n] for n in current])
+            processed += len(current)
+            next_level: List[str] = []
+            for name in current:
+                for dependent in self._dependents[name]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        next_level.append(dependent)
+            current = next_level
+
+        if processed != len(self._deps):
+            cycle = self._find_cycle({n for n, d in in_degree.items() if d > 0})
+            raise ValueError(
+                f"Dependency graph contains a cycle: {' -> '.join(cycle)}"
+            )
+        return levels
+
+    def _find_cycle(self, remaining: Set[str]) -> List[str]:
+        # Kahn 遍历后剩下的每个节点都至少有一个依赖也在剩余集合中，
+        # 因此从任意剩余节点出发沿依赖一直走下去，必然会走回到已经访问过的节点，从而得到一个环。
+        start = min(remaining)
+        path: List[str] = []
+        position: Dict[str, int] = {}
+        node = start
+        while node not in position:
+            position[node] = len(path)
+            path.append(node)
+            node = min(r for r in self._deps[node] if r in remaining)
+        return path[position[node]:] + [node]
+
+    def _find_path_to(self, target: str, start_names: Set[str]) -> Optional[List[str]]:
+        # 沿依赖边从 start_names 出发做 DFS，若能到达 target 则返回一条路径。只访问 start_names 的依赖闭包。
+        parent: Dict[str, Optional[str]] = {n: None for n in start_names}
+        stack = list(start_names)
+        while stack:
+            node = stack.pop()
+            if node == target:
+                path = [node]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])  # type: ignore[arg-type]
+                return list(reversed(path))
+            for dep in self._deps.get(node, ()):
+                if dep not in parent:
+                    parent[dep] = node
+                    stack.append(dep)
+        return None
+
+    def upsert(self, container: MBContainer) -> List[MBContainer]:
+        """
+        新增或替换一个容器，并按依赖顺序重新解析该容器以及所有（传递地）依赖它的容器。
+        被依赖的容器必须已经在树中并已解析。返回被重新解析的容器列表。
+        """
+        name = container.name
+        new_deps = set(container.require)
+        missing = [r for r in new_deps if r not in self._name_to_container and r != name]
+        if missing:
+            raise ValueError(
+                f"Container '{name}' requires missing containers: {missing}"
+            )
+        # 新的依赖边 name -> r 构成环，当且仅当从 r 出发能沿依赖走回 name。
+        cycle_path = self._find_path_to(name, new_deps)
+        if cycle_path is not None:
             raise ValueError(
-                f"Dependency graph contains cycles among: {sorted(list(remaining))}"
+                f"Dependency graph contains a cycle: {' -> '.join([name] + cycle_path)}"
             )
 
+        old_deps = self._deps.get(name, set())
+        for req in old_deps - new_deps:
+            self._dependents[req].remove(name)
+        for req in new_deps - old_deps:
+            self._dependents[req].append(name)
+        self._deps[name] = new_deps
+        self._dependents.setdefault(name, [])
+        self._name_to_container[name] = container
+        self._levels = None
+
+        affected = self._ordered_dependents_closure(name)
+        for affected_container in affected:
+            self._resolve_container(affected_container)
+        return affected
+
+    def remove(self, container_name: str) -> None:
+        """移除一个没有被其他容器依赖的容器。"""
+        if self._dependents[container_name]:
+            raise ValueError(
+                f"Container '{container_name}' is required by: {self._dependents[container_name]}"
+            )
+        for req in self._deps.pop(container_name):
+            self._dependents[req].remove(container_name)
+        del self._dependents[container_name]
+        del self._name_to_container[container_name]
+        self._levels = None
+
+    def _ordered_dependents_closure(self, container_name: str) -> List[MBContainer]:
+        # 先找出 container_name 及所有传递依赖它的容器，再在这个子图内做 Kahn 排序，保证依赖先于依赖者。
+        affected: Set[str] = {container_name}
+        queue = deque([container_name])
+        while queue:
+            for dependent in self._dependents[queue.popleft()]:
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+
+        in_degree = {n: len(self._deps[n] & affected) for n in affected}
+        ready = deque(n for n, d in in_degree.items() if d == 0)
+        ordered: List[MBContainer] = []
+        while ready:
+            name = ready.popleft()
+            ordered.append(self._name_to_container[name])
+            for dependent in self._dependents[name]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    ready.append(dependent)
+        return ordered
+
+    def _resolve_container(self, container: MBContainer) -> None:
+        ref_containers: Mapping[str, MBContainer] = {
+            dep_name: self._name_to_container[dep_name]
+            for dep_name in container.require
+        }
+        container.resolve_references(ref_containers)
+
     def levels(self) -> List[List[MBContainer]]:
         """
         返回从叶子到根的层次列表，每一层是若干 `MBContainer`。
         """
-        deps_copy: Dict[str, Set[str]] = {k: set(v) for k, v in self._deps.items()}
-        remaining: Set[str] = set(deps_copy.keys())
-        levels: List[List[MBContainer]] = []
+        return [list(level) for level in self._cached_levels()]
 
-        while remaining:
-            # 叶子：无依赖的容器
-            leaf_names = [n for n in remaining if len(deps_copy[n]) == 0]
-            if not leaf_names:
-                # 正常情况下不会发生，_assert_acyclic 已经保证无环
-                raise RuntimeError(
-                    "No leaves found while building levels; graph inconsistent."
-                )
-            level_containers = [self._name_to_container[n] for n in leaf_names]
-            levels.append(level_containers)
-            # 移除叶子并更新依赖
-            for leaf in leaf_names:
-                remaining.remove(leaf)
-                for other in remaining:
-                    deps_copy[other].discard(leaf)
-        return levels
+    def dependents(self, container_name: str) -> List[str]:
+        """返回直接依赖（require）指定容器的容器名列表。"""
+        return list(self._dependents[container_name])
 
+    def dependency_closure(self, container_name: str) -> List[MBContainer]:
+        """返回指定容器以及它（传递地）require 的所有容器，依赖在前。"""
+        closure: Set[str] = {container_name}
+        stack = [container_name]
+        while stack:
+            for dep in self._deps[stack.pop()]:
+                if dep not in closure:
+                    closure.add(dep)
+                    stack.append(dep)
+        return [c for c in self.bfs_traversal() if c.name in closure]
+
+    def dependents_closure(self, container_name: str) -> List[MBContainer]:
+        """返回指定容器以及所有（传递地）依赖它的容器，依赖在前。"""
+        return self._ordered_dependents_closure(container_name)
+
+    @profiled()
     def resolve_all(self) -> None:
         """
         自底向上层序遍历，依次调用每个容器的 `resolve_references()`，
         将其 `require` 对应的容器作为参考传入，从而完成就地解析。
         """
         # 从最底层（叶子）到最顶层依次解析
-        for level in self.levels():
-            for container in level:
-                ref_containers: Mapping[str, MBContainer] = {
-                    dep_name: self._name_to_container[dep_name]
-                    for dep_name in container.require
-                }
-                container.resolve_references(ref_containers)
+        for container in self.bfs_traversal():
+            self._resolve_container(container)
 
     # 使用一个迭代器来进行层序遍历
-    def bfs_traversal(self):
+    def bfs_traversal(self) -> Iterator[MBContainer]:
         """
         自底向上层序遍历依赖树，逐个产出 `MBContainer` 实例。
         """
-        for level in self.levels():
+        for level in self._cached_levels():
             for container in level:
                 yield container
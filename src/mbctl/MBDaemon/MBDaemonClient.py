@@ -0,0 +1,69 @@
+# CLI 使用的 mbctld 客户端。这个模块只依赖标准库，从而不增加 CLI 的启动开销。
+import os
+import socket
+import sys
+from typing import Any, Callable, Optional
+
+from .MBDaemonProtocol import encode_message, get_daemon_socket_path, iter_messages
+
+
+class MBDaemonError(RuntimeError):
+    """mbctld 执行请求时失败。"""
+
+
+class MBDaemonClient:
+    def __init__(self, socket_path: Optional[str] = None) -> None:
+        self.socket_path = socket_path if socket_path is not None else get_daemon_socket_path()
+
+    def request(
+        self,
+        op: str,
+        on_event: Optional[Callable[[Any], None]] = None,
+        on_output: Optional[Callable[[str, str], None]] = None,
+        **args: Any,
+    ) -> Any:
+        """
+        发送一个请求并等待其结果。执行过程中的进度消息交给 on_event 处理。
+        mbctld 转发的 nerdctl 输出交给 on_output(流名, 输出)，为 None 时写到本进程的 stdout/stderr。
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall(encode_message({"op": op, "args": args}))
+            for message in iter_messages(sock):
+                if "event" in message:
+                    if on_event is not None:
+                        on_event(message["event"])
+                    continue
+                if "output" in message:
+                    if on_output is not None:
+                        on_output(message.get("stream", "stdout"), message["output"])
+                    else:
+                        _write_output(message.get("stream", "stdout"), message["output"])
+                    continue
+                if message.get("ok"):
+                    return message.get("result")
+                raise MBDaemonError(message.get("error", "unknown daemon error"))
+        raise MBDaemonError("mbctld closed the connection without a reply.")
+
+
+def _write_output(stream: str, text: str) -> None:
+    out = sys.stderr if stream == "stderr" else sys.stdout
+    out.write(text)
+    out.flush()
+
+
+def connect_daemon(socket_path: Optional[str] = None) -> Optional[MBDaemonClient]:
+    """
+    若 mbctld 正在运行则返回一个客户端，否则返回None，调用者应退回到进程内执行。
+    设置环境变量 MBCTL_NO_DAEMON=1 可以强制不使用 mbctld。
+    """
+    if os.environ.get("MBCTL_NO_DAEMON"):
+        return None
+    client = MBDaemonClient(socket_path)
+    if not os.path.exists(client.socket_path):
+        return None
+    try:
+        client.request("ping")
+    except (OSError, ValueError, MBDaemonError):
+        return None
+    return client
@@ -0,0 +1,31 @@
+# mbctld 与 CLI 之间的通信协议：unix socket 上逐行传输 JSON 消息，每个连接只处理一个请求。
+# 请求：{"op": "<操作名>", "args": {...}}
+# 回复：若干条 {"event": ...}（进度消息，可选）和 {"output": "<一行输出>", "stream": "stdout" 或 "stderr"}（请求执行的 nerdctl 命令的输出，可选），
+#       最后一条 {"ok": true, "result": ...} 或 {"ok": false, "error": "..."}
+import json
+import os
+import socket
+from typing import Any, Iterator
+
+DEFAULT_DAEMON_SOCKET = "/run/mbctl/mbctld.sock"
+
+
+def get_daemon_socket_path() -> str:
+    return os.environ.get("MBCTL_DAEMON_SOCKET", DEFAULT_DAEMON_SOCKET)
+
+
+def encode_message(message: dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def iter_messages(sock: socket.socket) -> Iterator[dict[str, Any]]:
+    buffer = b""
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if line.strip():
+                yield json.loads(line)
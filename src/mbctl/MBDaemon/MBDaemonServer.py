@@ -0,0 +1,427 @@
+# mbctld：常驻内存的 mbctl 守护进程。
+# 它持有一个完整加载并解析过的 MBHost（容器配置、依赖树、容器状态），通过 inotify 监视配置目录、
+# 通过 nerdctl events 监视容器状态，使模型保持最新；CLI 通过 unix socket 发送请求，无需每次重新加载主机。
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import socket
+import socketserver
+import threading
+from typing import Any, Callable, Optional
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import MBContainerStatus
+from mbctl.MBHost import MBHost
+from mbctl.MBHost.NerdClient.NerdClientCliWrapper import CommandOutput, forward_command_output
+from mbctl.MBLog import mb_logger
+from mbctl.datatypes import MBContainerConf
+from .MBDaemonProtocol import encode_message, get_daemon_socket_path, iter_messages
+from .MBDaemonWatcher import ConfDirWatcher, NerdEventsWatcher
+
+type Emit = Callable[[Any], None]
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    server: "_DaemonSocketServer"
+
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        # 构建工作线程和 nerdctl 输出转发线程会同时发送消息
+        send_lock = threading.Lock()
+
+        def send(message: dict[str, Any]) -> None:
+            with send_lock:
+                sock.sendall(encode_message(message))
+
+        def emit(event: Any) -> None:
+            send({"event": event})
+
+        def output(stream: str, text: str) -> None:
+            try:
+                send({"output": text, "stream": stream})
+            except OSError:
+                pass  # 客户端已经断开，仍然要读完 nerdctl 的输出
+
+        try:
+            request = next(iter_messages(sock), None)
+            if request is None:
+                return
+            result = self.server.daemon.dispatch(
+                request.get("op", ""), request.get("args", {}), emit, output
+            )
+            reply = {"ok": True, "result": result}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        try:
+            sock.sendall(encode_message(reply))
+        except OSError:
+            pass  # 客户端已经断开
+
+
+class _DaemonSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: "MBDaemon") -> None:
+        self.daemon = daemon
+        super().__init__(socket_path, _RequestHandler)
+
+
+class MBDaemon:
+    """
+    在内存中持有 MBHost 并响应 CLI 请求。
+    self.lock 只保护内存模型：读取模型（list、status 等）和修改模型都在它之下进行，不在它之下执行 nerdctl。
+    调用 nerdctl 或操作挂载目录的长时间操作（run、run_all、apply、stop 等）在 self.ops_lock 下串行执行，
+    执行期间只读取模型；改变模型结构（重新加载配置、创建容器）需要同时持有两个锁，所以会等待正在进行的长时间操作结束。
+    加锁顺序总是先 ops_lock 后 lock。
+    """
+
+    def __init__(
+        self,
+        host: MBHost,
+        socket_path: Optional[str] = None,
+        watch_conf: bool = True,
+        use_inotify: bool = True,
+        watch_events: bool = True,
+        status_debounce: float = 0.2,
+    ) -> None:
+        self.host = host
+        self.socket_path = socket_path if socket_path is not None else get_daemon_socket_path()
+        self.lock = threading.RLock()
+        self.ops_lock = threading.RLock()
+        self.status_debounce = status_debounce
+
+        self._server: Optional[_DaemonSocketServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._status_dirty = threading.Event()
+        self._status_thread: Optional[threading.Thread] = None
+
+        self.conf_watcher: Optional[ConfDirWatcher] = None
+        if watch_conf:
+            self.conf_watcher = ConfDirWatcher(
+                host.config_base_dir,
+                mb_config.config_file,
+                self.handle_conf_changes,
+                use_inotify=use_inotify,
+            )
+        self.events_watcher: Optional[NerdEventsWatcher] = None
+        if watch_events:
+            self.events_watcher = NerdEventsWatcher(self.mark_status_dirty)
+
+        self._handlers: dict[str, Callable[..., Any]] = {
+            "ping": self._op_ping,
+            "list": self._op_list,
+            "status": self._op_status,
+            "pid": self._op_pid,
+            "shell_command": self._op_shell_command,
+            "whois": self._op_whois,
+            "run": self._op_run,
+            "run_all": self._op_run_all,
+            "up": self._op_up,
+            "apply": self._op_apply,
+            "mounts": self._op_mounts,
+            "rerun": self._op_rerun,
+            "stop": self._op_stop,
+            "autostart": self._op_autostart,
+            "prune": self._op_prune,
+            "create": self._op_create,
+            "reload": self._op_reload,
+        }
+
+    # ---- 生命周期 ----
+
+    def _bind(self) -> _DaemonSocketServer:
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o755, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            # 仍能连接说明已有另一个 mbctld 在运行；否则是上次遗留的 socket 文件。
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                if probe.connect_ex(self.socket_path) == 0:
+                    raise RuntimeError(f"mbctld is already listening on {self.socket_path}.")
+            os.unlink(self.socket_path)
+        server = _DaemonSocketServer(self.socket_path, self)
+        # mbctld 以 root 身份管理容器，只允许同一用户访问。
+        os.chmod(self.socket_path, 0o600)
+        return server
+
+    def start(self) -> None:
+        """在后台线程中开始服务。"""
+        self._server = self._bind()
+        if self.conf_watcher is not None:
+            self.conf_watcher.start()
+        if self.events_watcher is not None:
+            self.events_watcher.start()
+        self._status_thread = threading.Thread(
+            target=self._run_status_refresher, name="mbctld-status", daemon=True
+        )
+        self._status_thread.start()
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name="mbctld-server", daemon=True
+        )
+        self._server_thread.start()
+        mb_logger.info(f"mbctld is listening on {self.socket_path}")
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._status_dirty.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        if self.conf_watcher is not None:
+            self.conf_watcher.stop()
+        if self.events_watcher is not None:
+            self.events_watcher.stop()
+        if self._status_thread is not None:
+            self._status_thread.join()
+
+    def serve_forever(self) -> None:
+        self.start()
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        try:
+            self._stop.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    # ---- 保持模型新鲜 ----
+
+    def handle_conf_changes(self, container_names: set[str]) -> None:
+        """配置文件发生变化时增量更新模型；增量更新失败时退回完整重载。"""
+        with self.ops_lock, self.lock:
+            try:
+                for name in sorted(container_names):
+                    if os.path.isfile(self.host.get_container_conffile_path(name)):
+                        self.host.reload_container(name)
+                    elif name in self.host.list_all_mbcontainer_names():
+                        self.host.unload_container(name)
+                mb_logger.info(f"Reloaded containers: {sorted(container_names)}")
+            except Exception as e:
+                mb_logger.warning(f"Incremental reload failed ({e}), reloading the whole host.")
+                self.host._reload_and_resolve_containers()
+
+    def mark_status_dirty(self) -> None:
+        self._status_dirty.set()
+
+    def _run_status_refresher(self) -> None:
+        # 合并短时间内的大量 nerdctl 事件，只刷新一次状态。
+        while not self._stop.is_set():
+            self._status_dirty.wait()
+            if self._stop.is_set():
+                return
+            self._stop.wait(self.status_debounce)
+            self._status_dirty.clear()
+            try:
+                self._refresh_statuses()
+            except Exception as e:
+                mb_logger.error(f"Failed to refresh container statuses: {e}")
+
+    def _refresh_statuses(self) -> None:
+        # nerdctl ps 在锁外执行，只有把快照写入模型时持有锁
+        nerd_states = self.host.client.get_all_container_states()
+        with self.lock:
+            self.host.refresh_container_statuses(nerd_states)
+
+    def _refresh_statuses_if_unwatched(self) -> None:
+        # 没有订阅 nerdctl events 时，在读取状态前主动刷新一次。
+        if self.events_watcher is None:
+            self._refresh_statuses()
+
+    def _preload(self, *names: Optional[str]) -> None:
+        # 长时间操作开始前在 self.lock 下加载（并检查）目标容器，之后的操作不会在锁外改变模型结构
+        with self.lock:
+            for name in names:
+                if name is not None:
+                    self.host.get_mbcontainer(name)
+
+    # ---- 请求处理 ----
+
+    def dispatch(
+        self, op: str, args: dict[str, Any], emit: Emit, output: Optional[CommandOutput] = None
+    ) -> Any:
+        """执行一个请求。output 不为 None 时，请求执行的 nerdctl 命令的输出交给它（转发给 CLI）。"""
+        handler = self._handlers.get(op)
+        if handler is None:
+            raise ValueError(f"Unknown mbctld operation: '{op}'")
+        if output is None:
+            return handler(emit, **args)
+        with forward_command_output(output):
+            return handler(emit, **args)
+
+    def _op_ping(self, emit: Emit) -> dict[str, Any]:
+        from mbctl.cli.main import __version__
+
+        return {"version": __version__, "pid": os.getpid()}
+
+    def _op_list(self, emit: Emit) -> list[dict[str, Any]]:
+        self._refresh_statuses_if_unwatched()
+        with self.lock:
+            return self.host.list_container_summaries()
+
+    def _op_status(self, emit: Emit, name: str) -> str:
+        with self.lock:
+            self.host.get_mbcontainer(name)
+        return self._update_status(name).value
+
+    def _op_pid(self, emit: Emit, name: str) -> str:
+        return self.host.client.get_container_pid(name)
+
+    def _op_shell_command(self, emit: Emit, name: str, command: list[str], run_name: str) -> list[str]:
+        with self.lock:
+            return self.host.get_mbcontainer(name).to_nerdctl_run_command(command, run_name)
+
+    def _op_whois(self, emit: Emit, address: str) -> list[dict[str, Any]]:
+        with self.lock:
+            return self.host.whois(address)
+
+    def _update_status(self, name: str) -> MBContainerStatus:
+        status = self.host.get_container_status(name)
+        with self.lock:
+            self.host.get_mbcontainer(name).status = status
+        return status
+
+    def _op_run(self, emit: Emit, name: str) -> None:
+        with self.ops_lock:
+            self._preload(name)
+            self.host.build_new_container(name)
+            self._update_status(name)
+
+    def _op_run_all(self, emit: Emit, jobs: int = 1) -> None:
+        def emit_result(result) -> None:
+            emit(
+                {
+                    "name": result.name,
+                    "state": result.state.value,
+                    "duration": result.duration,
+                    "error": None if result.error is None else str(result.error),
+                    "failed_dependency": result.failed_dependency,
+                }
+            )
+
+        with self.ops_lock:
+            try:
+                self.host.build_all_containers(jobs=jobs, on_result=emit_result)
+            finally:
+                self._refresh_statuses()
+
+    def _op_up(self, emit: Emit, name: Optional[str] = None) -> list[str]:
+        with self.ops_lock:
+            self._preload(name)
+            try:
+                return self.host.compose_up_project(name)
+            finally:
+                self._refresh_statuses()
+
+    def _op_apply(
+        self,
+        emit: Emit,
+        name: Optional[str] = None,
+        with_deps: bool = False,
+        with_dependents: bool = False,
+    ) -> None:
+        def emit_result(result) -> None:
+            emit(
+                {
+                    "name": result.name,
+                    "action": result.action.value,
+                    "duration": result.duration,
+                    "error": None if result.error is None else str(result.error),
+                    "failed_dependency": result.failed_dependency,
+                }
+            )
+
+        with self.ops_lock:
+            self._preload(name)
+            self.host.apply_containers(name, with_deps, with_dependents, on_result=emit_result)
+
+    def _op_mounts(
+        self, emit: Emit, name: Optional[str] = None, dry_run: bool = False, jobs: int = 16
+    ) -> dict[str, Any]:
+        with self.ops_lock:
+            with self.lock:
+                containers = None if name is None else [self.host.get_mbcontainer(name)]
+            if dry_run:
+                plan = self.host.plan_container_mounts(containers, jobs)
+            else:
+                plan = self.host.prepare_container_mounts(containers, jobs)
+            return {"lines": plan.describe(), "checked": plan.checked_paths}
+
+    def _op_rerun(self, emit: Emit, name: str) -> None:
+        with self.ops_lock:
+            self._preload(name)
+            self.host.client.force_delete_container(name)
+            self.host.build_new_container(name)
+            self._update_status(name)
+
+    def _op_stop(
+        self,
+        emit: Emit,
+        names: Optional[list[str]] = None,
+        with_dependents: bool = False,
+        timeout: float = 10,
+    ) -> None:
+        def emit_result(result) -> None:
+            emit(
+                {
+                    "name": result.name,
+                    "state": result.state.value,
+                    "duration": result.duration,
+                    "error": None if result.error is None else str(result.error),
+                    "failed_dependent": result.failed_dependent,
+                }
+            )
+
+        with self.ops_lock:
+            self._preload(*(names or []))
+            self.host.stop_containers(names, with_dependents, timeout, on_result=emit_result)
+
+    def _op_autostart(self, emit: Emit) -> None:
+        with self.ops_lock:
+            with self.lock:
+                containers = self.host.list_containers()
+            for container in containers:
+                if container.autostart:
+                    emit(container.name)
+                    self.host.client.start_container(container.name)
+                    self._update_status(container.name)
+
+    def _op_prune(self, emit: Emit, name: str) -> list[str]:
+        with self.ops_lock:
+            self._preload(name)
+            return self.host.remove_container_mounts(name)
+
+    def _op_create(self, emit: Emit, name: str, image: str) -> None:
+        with self.ops_lock, self.lock:
+            self.host.create_container_from_conf(name, MBContainerConf(image=image))
+
+    def _op_reload(self, emit: Emit) -> None:
+        with self.ops_lock, self.lock:
+            self.host._reload_and_resolve_containers()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="mbctld",
+        description="Keep a warm Man8S host model in memory and serve mbctl requests over a unix socket.",
+    )
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: $MBCTL_DAEMON_SOCKET or /run/mbctl/mbctld.sock).")
+    parser.add_argument("--poll", action="store_true", help="Poll the config directory instead of using inotify.")
+    parser.add_argument("--no-events", action="store_true", help="Do not subscribe to nerdctl events; refresh statuses on demand.")
+    args = parser.parse_args()
+
+    daemon = MBDaemon(
+        MBHost(),
+        socket_path=args.socket,
+        use_inotify=not args.poll,
+        watch_events=not args.no_events,
+    )
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
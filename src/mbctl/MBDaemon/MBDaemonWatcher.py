@@ -0,0 +1,274 @@
+# mbctld 用来保持容器模型新鲜的两个监视器：
+# - ConfDirWatcher：监视 storage_path/conf 下的容器配置文件，优先使用 inotify，不可用时退回定时轮询。
+# - NerdEventsWatcher：订阅 nerdctl events，容器有生命周期事件时通知 mbctld 刷新容器状态。
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import subprocess
+import threading
+from posixpath import join
+from typing import Callable, Optional
+
+from mbctl.MBLog import mb_logger
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_BASE_DIR_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+_CONTAINER_DIR_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """通过 ctypes 调用 libc 的 inotify 接口。"""
+
+    def __init__(self) -> None:
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.fd = fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read_events(self) -> list[tuple[int, int, str]]:
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        events: list[tuple[int, int, str]] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + name_len].rstrip(b"\0"))
+            offset += name_len
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class ConfDirWatcher:
+    """
+    监视配置目录，发现容器配置文件被新增、修改或删除时，以容器名集合调用 on_change。
+    连续的变化会在 debounce 秒内合并为一次回调。
+    """
+
+    def __init__(
+        self,
+        config_base_dir: str,
+        config_file: str,
+        on_change: Callable[[set[str]], None],
+        use_inotify: bool = True,
+        poll_interval: float = 2.0,
+        debounce: float = 0.1,
+    ) -> None:
+        self.config_base_dir = config_base_dir
+        self.config_file = config_file
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self._wd_to_name: dict[int, Optional[str]] = {}
+        self._signatures: dict[str, Optional[tuple[int, int, int]]] = {}
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                mb_logger.warning(f"inotify is not available ({e}), polling {config_base_dir} instead.")
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def start(self) -> None:
+        if self._inotify is not None:
+            self._setup_inotify_watches()
+            target = self._run_inotify
+        else:
+            self._signatures = self.scan()
+            target = self._run_polling
+        self._thread = threading.Thread(target=target, name="mbctld-conf-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    # ---- 轮询模式 ----
+
+    def scan(self) -> dict[str, Optional[tuple[int, int, int]]]:
+        """返回 容器名 -> 配置文件 stat 签名（文件不存在时为None）。"""
+        signatures: dict[str, Optional[tuple[int, int, int]]] = {}
+        with os.scandir(self.config_base_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                try:
+                    st = os.stat(join(entry.path, self.config_file))
+                    signatures[entry.name] = (st.st_ino, st.st_size, st.st_mtime_ns)
+                except OSError:
+                    signatures[entry.name] = None
+        return signatures
+
+    def poll_once(self) -> set[str]:
+        """与上一次扫描比较，返回发生变化的容器名。"""
+        signatures = self.scan()
+        changed = {
+            name
+            for name in signatures.keys() | self._signatures.keys()
+            if signatures.get(name) != self._signatures.get(name)
+        }
+        self._signatures = signatures
+        return changed
+
+    def _run_polling(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                changed = self.poll_once()
+            except OSError as e:
+                mb_logger.warning(f"Failed to scan {self.config_base_dir}: {e}")
+                continue
+            if changed:
+                self._notify(changed)
+
+    # ---- inotify 模式 ----
+
+    def _watch_container_dir(self, name: str) -> None:
+        assert self._inotify is not None
+        try:
+            wd = self._inotify.add_watch(join(self.config_base_dir, name), _CONTAINER_DIR_MASK)
+        except OSError:
+            return  # 目录可能已经被删除
+        self._wd_to_name[wd] = name
+
+    def _setup_inotify_watches(self) -> None:
+        assert self._inotify is not None
+        wd = self._inotify.add_watch(self.config_base_dir, _BASE_DIR_MASK)
+        self._wd_to_name[wd] = None
+        for name in os.listdir(self.config_base_dir):
+            if os.path.isdir(join(self.config_base_dir, name)):
+                self._watch_container_dir(name)
+
+    def _handle_inotify_events(self) -> set[str]:
+        assert self._inotify is not None
+        changed: set[str] = set()
+        for wd, mask, name in self._inotify.read_events():
+            if mask & IN_IGNORED:
+                self._wd_to_name.pop(wd, None)
+                continue
+            if wd not in self._wd_to_name:
+                continue
+            container_name = self._wd_to_name[wd]
+            if container_name is None:
+                # 配置根目录下的事件：容器目录被创建、删除或移动
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_container_dir(name)
+                    changed.add(name)
+            elif mask & IN_DELETE_SELF or name == self.config_file:
+                changed.add(container_name)
+        return changed
+
+    def _run_inotify(self) -> None:
+        assert self._inotify is not None
+        pending: set[str] = set()
+        while not self._stop.is_set():
+            timeout = self.debounce if pending else 0.5
+            readable, _, _ = select.select([self._inotify.fd], [], [], timeout)
+            if readable:
+                pending |= self._handle_inotify_events()
+            elif pending:
+                # 在 debounce 时间内没有新的事件，才真正通知
+                self._notify(pending)
+                pending = set()
+
+    def _notify(self, changed: set[str]) -> None:
+        try:
+            self.on_change(changed)
+        except Exception as e:
+            mb_logger.error(f"Failed to handle config changes for {sorted(changed)}: {e}")
+
+
+class NerdEventsWatcher:
+    """
+    订阅 `nerdctl events`，每收到与容器或任务相关的事件就调用 on_event。
+    nerdctl 进程退出后会在 retry_interval 秒后重新订阅。
+    """
+
+    def __init__(
+        self,
+        on_event: Callable[[], None],
+        cmd: Optional[list[str]] = None,
+        retry_interval: float = 5.0,
+    ) -> None:
+        self.on_event = on_event
+        self.cmd = cmd if cmd is not None else ["nerdctl", "events", "--format", "{{json .}}"]
+        self.retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._proc: Optional[subprocess.Popen] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="mbctld-nerd-events", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.terminate()
+        if self._thread is not None:
+            self._thread.join()
+
+    @staticmethod
+    def is_container_event(line: str) -> bool:
+        return '"/containers/' in line or '"/tasks/' in line
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._proc = subprocess.Popen(
+                    self.cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+                )
+            except OSError as e:
+                mb_logger.warning(f"Cannot subscribe to nerdctl events: {e}")
+                self._stop.wait(self.retry_interval)
+                continue
+            assert self._proc.stdout is not None
+            for line in self._proc.stdout:
+                if self.is_container_event(line):
+                    try:
+                        self.on_event()
+                    except Exception as e:
+                        mb_logger.error(f"Failed to handle nerdctl event: {e}")
+            self._proc.wait()
+            if not self._stop.is_set():
+                mb_logger.warning("nerdctl events exited, resubscribing.")
+                self._stop.wait(self.retry_interval)
@@ -0,0 +1,2 @@
+# 这里只导出轻量的客户端；服务端 MBDaemonServer 需要显式导入。
+from .MBDaemonClient import MBDaemonClient, MBDaemonError, connect_daemon
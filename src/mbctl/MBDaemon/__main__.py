@@ -0,0 +1,3 @@
+from .MBDaemonServer import main
+
+main()
@@ -0,0 +1,122 @@
+# MBHost 的 asyncio 门面。
+# 容器模型（配置、依赖树、引用解析）仍然由同步的 MBHost 持有，所有 nerdctl 调用则交给 AsyncNerdClient，
+# 这样 list、autostart 和批量构建可以同时对成百上千个容器发起调用，并发数由 AsyncNerdClient 的信号量限制。
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+if TYPE_CHECKING:
+    from . import MBHost
+
+from mbctl.MBContainer import MBContainer
+from .MBContainerBuildResult import MBContainerBuildResult, MBContainerBuildState
+from .NerdClient.AsyncNerdClient import AsyncNerdClient
+from .MBMountPrep import prepare_mounts
+from .mbhost_get_container import nerd_state_to_mbcontainer_status
+
+
+class AsyncMBHost:
+    def __init__(self, host: MBHost, client: Optional[AsyncNerdClient] = None) -> None:
+        self.host = host
+        self.client = client if client is not None else AsyncNerdClient()
+
+    async def refresh_container_statuses(self) -> None:
+        """用一次 nerdctl ps -a 快照刷新所有容器状态，快照中没有的容器并发地单独查询。"""
+        containers = self.host.list_containers()
+        if not containers:
+            return
+        nerd_states = await self.client.get_all_container_states()
+        missing = [c for c in containers if c.name not in nerd_states]
+        missing_states = await asyncio.gather(
+            *(self.client.get_container_state(c.name) for c in missing)
+        )
+        nerd_states.update(zip((c.name for c in missing), missing_states))
+        for container in containers:
+            container.status = nerd_state_to_mbcontainer_status(nerd_states[container.name])
+
+    async def list_containers(self) -> list[MBContainer]:
+        await self.refresh_container_statuses()
+        return self.host.list_containers()
+
+    async def autostart(
+        self, on_start: Optional[Callable[[str], None]] = None
+    ) -> dict[str, Optional[Exception]]:
+        """同时启动所有 autostart 的容器，返回 容器名 -> 启动失败的异常（成功为None）。"""
+
+        async def start(container: MBContainer) -> Optional[Exception]:
+            if on_start is not None:
+                on_start(container.name)
+            try:
+                await self.client.start_container(container.name)
+            except Exception as e:
+                return e
+            container.status = nerd_state_to_mbcontainer_status(
+                await self.client.get_container_state(container.name)
+            )
+            return None
+
+        autostart_containers = [c for c in self.host.list_containers() if c.autostart]
+        errors = await asyncio.gather(*(start(c) for c in autostart_containers))
+        return {c.name: e for c, e in zip(autostart_containers, errors)}
+
+    async def build_new_container(self, container_name: str) -> None:
+        container = self.host.get_mbcontainer(container_name)
+        # 创建挂载目录是本地文件系统操作，放到线程池中执行，避免阻塞事件循环
+        await asyncio.to_thread(prepare_mounts, container.mount.mount_points)
+        # compose 文档只渲染一次，同时用于创建容器和计算指纹
+        compose_dict = container.to_compose_dict()
+        await self.client.compose_create_container(compose_dict)
+        self.host._store_fingerprint(
+            container, compose_dict, await self.client.get_image_id(container.image)
+        )
+
+    async def build_all_containers(
+        self,
+        on_result: Optional[Callable[[MBContainerBuildResult], None]] = None,
+    ) -> list[MBContainerBuildResult]:
+        """
+        同时构建所有容器：每个容器等待它 require 的容器构建完成后立即开始。
+        某个容器构建失败时，（传递地）依赖它的容器被取消。按完成顺序返回所有结果。
+        """
+        tasks: dict[str, asyncio.Task[MBContainerBuildResult]] = {}
+        results: list[MBContainerBuildResult] = []
+
+        async def build(container: MBContainer) -> MBContainerBuildResult:
+            dep_results = await asyncio.gather(*(tasks[r] for r in container.require))
+            failed = next(
+                (r for r in dep_results if r.state != MBContainerBuildState.succeeded), None
+            )
+            if failed is not None:
+                result = MBContainerBuildResult(
+                    container.name,
+                    MBContainerBuildState.cancelled,
+                    failed_dependency=failed.failed_dependency or failed.name,
+                )
+            else:
+                start = time.perf_counter()
+                try:
+                    await self.build_new_container(container.name)
+                except Exception as e:
+                    result = MBContainerBuildResult(
+                        container.name,
+                        MBContainerBuildState.failed,
+                        time.perf_counter() - start,
+                        error=e,
+                    )
+                else:
+                    result = MBContainerBuildResult(
+                        container.name,
+                        MBContainerBuildState.succeeded,
+                        time.perf_counter() - start,
+                    )
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        # 按依赖顺序创建任务，保证每个任务创建时它依赖的任务已经存在
+        for container in self.host._container_tree.bfs_traversal():
+            tasks[container.name] = asyncio.create_task(build(container))
+        await asyncio.gather(*tasks.values())
+        return results
@@ -0,0 +1,119 @@
+# 宿主机范围内 名字 <-> Yggdrasil 地址 的索引。
+# 容器地址由名字的 sha256 截断到前缀剩余位得到，不同的名字可能得到相同的地址。
+# 索引在加载主机时构建一次，记录每个容器自己的名字以及它 local_access、dns 中引用的名字，
+# 用于在加载时发现地址冲突，以及 O(1) 地反查一个地址属于哪些名字（mbctl whois）。
+from __future__ import annotations
+
+import ipaddress
+from typing import Any, Iterable
+
+from mbctl.MBContainer import MBContainer
+from mbctl.MBContainer.MBContainerDNS import DNSType
+from mbctl.MBLog import mb_logger
+from mbctl.network.ygg_address_deriver import YggAddressDeriver
+
+
+def normalize_address(address: str) -> str:
+    """把地址转换为压缩形式，与 YggAddressDeriver 的输出一致。地址无效时抛出 ValueError。"""
+    return ipaddress.IPv6Address(address).compressed
+
+
+def _referenced_names(container: MBContainer) -> set[str]:
+    """容器自己的名字，以及它需要解析地址的其他名字。"""
+    if not container.enable_ygg:
+        return set()
+    names = {container.name, *container.local_access}
+    if container.dns.type == DNSType.CONTAINER and container.dns.value is not None:
+        names.add(container.dns.value)
+    return names
+
+
+class MBAddressIndex:
+    def __init__(self, deriver: YggAddressDeriver) -> None:
+        self.deriver = deriver
+        self._address_by_name: dict[str, str] = {}
+        self._names_by_address: dict[str, set[str]] = {}
+        # 名字 -> 引用了它的容器；容器 -> 它引用的名字。用于增量移除容器。
+        self._referrers: dict[str, set[str]] = {}
+        self._references: dict[str, set[str]] = {}
+        # 启用了 Yggdrasil 的已加载容器
+        self._containers: set[str] = set()
+
+    @classmethod
+    def build(cls, deriver: YggAddressDeriver, containers: Iterable[MBContainer]) -> "MBAddressIndex":
+        index = cls(deriver)
+        for container in containers:
+            index._add(container)
+        for address, names in index.collisions().items():
+            index._warn_collision(address, names)
+        return index
+
+    def _warn_collision(self, address: str, names: list[str]) -> None:
+        mb_logger.warning(
+            f"Yggdrasil address collision: {', '.join(names)} all map to {address}."
+        )
+
+    def _add(self, container: MBContainer) -> set[str]:
+        """加入容器引用的名字，返回新加入索引的地址。"""
+        names = _referenced_names(container)
+        if not names:
+            return set()
+        self._references[container.name] = names
+        self._containers.add(container.name)
+        new_addresses: set[str] = set()
+        for name, address in self.deriver.derive_many(names).items():
+            self._referrers.setdefault(name, set()).add(container.name)
+            if name not in self._address_by_name:
+                self._address_by_name[name] = address
+                self._names_by_address.setdefault(address, set()).add(name)
+                new_addresses.add(address)
+        return new_addresses
+
+    def add_container(self, container: MBContainer) -> None:
+        """加入或替换一个容器，新产生的地址冲突会被记录为警告。"""
+        self.remove_container(container.name)
+        for address in sorted(self._add(container)):
+            names = self._names_by_address[address]
+            if len(names) > 1:
+                self._warn_collision(address, sorted(names))
+
+    def remove_container(self, container_name: str) -> None:
+        """移除一个容器。仍被其他容器引用的名字保留在索引中。"""
+        self._containers.discard(container_name)
+        for name in self._references.pop(container_name, set()):
+            referrers = self._referrers.get(name)
+            if referrers is None:
+                continue
+            referrers.discard(container_name)
+            if referrers:
+                continue
+            del self._referrers[name]
+            address = self._address_by_name.pop(name)
+            names = self._names_by_address[address]
+            names.discard(name)
+            if not names:
+                del self._names_by_address[address]
+
+    def address_of(self, name: str) -> str | None:
+        return self._address_by_name.get(name)
+
+    def collisions(self) -> dict[str, list[str]]:
+        """返回 地址 -> 名字列表，只包含对应多个名字的地址。"""
+        return {
+            address: sorted(names)
+            for address, names in sorted(self._names_by_address.items())
+            if len(names) > 1
+        }
+
+    def lookup(self, address: str) -> list[dict[str, Any]]:
+        """反查地址对应的名字，返回可以直接序列化为 JSON 的列表。地址无效时抛出 ValueError。"""
+        names = self._names_by_address.get(normalize_address(address), set())
+        return [
+            {
+                "name": name,
+                "address": self._address_by_name[name],
+                "container": name in self._containers,
+                "referenced_by": sorted(self._referrers[name] - {name}),
+            }
+            for name in sorted(names)
+        ]
@@ -0,0 +1,21 @@
+# 这个文件记载了 mbctl apply 对每个容器做了什么。
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class MBContainerApplyAction(Enum):
+    created = "created"  # 容器不存在，新建
+    recreated = "recreated"  # 指纹改变（或没有指纹记录），删除后重建
+    unchanged = "unchanged"  # 指纹未变，跳过
+    failed = "failed"
+    cancelled = "cancelled"  # 依赖的容器 apply 失败，因此没有处理
+
+
+@dataclass
+class MBContainerApplyResult:
+    name: str
+    action: MBContainerApplyAction
+    duration: float = 0.0
+    error: Optional[BaseException] = None
+    failed_dependency: Optional[str] = None
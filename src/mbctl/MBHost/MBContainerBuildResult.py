@@ -0,0 +1,19 @@
+# 这个文件记载了批量构建容器时，每个容器的构建结果。
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class MBContainerBuildState(Enum):
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"  # 依赖的容器构建失败，因此没有构建
+
+
+@dataclass
+class MBContainerBuildResult:
+    name: str
+    state: MBContainerBuildState
+    duration: float = 0.0  # 构建耗时（秒），被取消的容器为0
+    error: Optional[BaseException] = None  # 构建失败时的异常
+    failed_dependency: Optional[str] = None  # 被取消时，导致取消的那个失败的容器
@@ -0,0 +1,114 @@
+# 已校验的 MBContainerConf 的磁盘缓存。
+# 每个容器一个缓存文件，保存 pickle 序列化后的 MBContainerConf 及其 yaml 文件的 stat 签名。
+# 签名不变时直接反序列化，跳过 yaml 解析和 pydantic 校验；签名改变时重新解析并原子地替换缓存文件。
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from functools import cache
+from posixpath import join
+from typing import Iterable, Optional
+
+import pydantic
+
+from mbctl import datatypes
+from mbctl.datatypes import MBContainerConf
+from mbctl.MBLog import mb_logger
+from mbctl.MBProfile import profiled
+from mbctl.StateFileUtils import atomic_write_bytes, get_state_path
+
+# 缓存键包含定义 MBContainerConf 的 mbctl.datatypes 包的源码摘要，升级后模型的字段、默认值或校验器改变时旧的缓存自动失效。
+# 只有缓存文件本身的格式改变时才需要增加这个版本号。
+CONF_CACHE_FORMAT = 2
+_CONF_SOURCE_DIR = os.path.dirname(datatypes.__file__)
+_ENTRY_SUFFIX = ".pickle"
+
+type StatSignature = tuple[int, int, int, int, int]
+
+
+def _source_digest(source_dir: str) -> str:
+    # 只读取几个小文件，比生成 JSON schema 便宜得多，不会抵消缓存节省的时间
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(source_dir)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8") + b"\0")
+            with open(join(source_dir, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+@cache
+def _cache_key() -> tuple[int, str, str]:
+    return (CONF_CACHE_FORMAT, pydantic.VERSION, _source_digest(_CONF_SOURCE_DIR))
+
+
+def _stat_signature(st: os.stat_result) -> StatSignature:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+
+class MBContainerConfCache:
+    def __init__(self, cache_dir: Optional[str] = None, enabled: bool = True) -> None:
+        self.cache_dir = cache_dir if cache_dir is not None else get_state_path("cache", "conf")
+        self.enabled = enabled
+
+    def _entry_path(self, container_name: str) -> str:
+        return join(self.cache_dir, container_name + _ENTRY_SUFFIX)
+
+    @profiled()
+    def load(self, container_name: str, conf_path: str) -> MBContainerConf:
+        """读取容器配置，yaml 文件未改变时使用缓存。"""
+        if not self.enabled:
+            return MBContainerConf.from_yaml_file(conf_path)
+
+        # 必须在读取文件之前 stat：如果读取过程中文件被修改，下次 stat 的签名一定不同。
+        signature = _stat_signature(os.stat(conf_path))
+        entry_path = self._entry_path(container_name)
+        cached = self._read_entry(entry_path)
+        if cached is not None:
+            cache_key, cached_conf_path, cached_signature, conf = cached
+            if (
+                cache_key == _cache_key()
+                and cached_conf_path == conf_path
+                and cached_signature == signature
+            ):
+                return conf
+
+        conf = MBContainerConf.from_yaml_file(conf_path)
+        self._write_entry(entry_path, (_cache_key(), conf_path, signature, conf))
+        return conf
+
+    def _read_entry(self, entry_path: str) -> Optional[tuple]:
+        try:
+            with open(entry_path, "rb") as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # 损坏或不兼容的缓存文件等同于缓存未命中，之后会被覆盖。
+            mb_logger.debug(f"Ignoring unreadable config cache entry {entry_path}: {e}")
+            return None
+        if not isinstance(entry, tuple) or len(entry) != 4:
+            return None
+        return entry
+
+    def _write_entry(self, entry_path: str, entry: tuple) -> None:
+        try:
+            atomic_write_bytes(entry_path, pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        except OSError as e:
+            # 没有写权限时只是失去缓存，不影响正常功能。
+            mb_logger.debug(f"Failed to write config cache entry {entry_path}: {e}")
+
+    def prune(self, keep_container_names: Iterable[str]) -> None:
+        """删除已经不存在的容器的缓存文件。"""
+        keep = {name + _ENTRY_SUFFIX for name in keep_container_names}
+        try:
+            entries = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.endswith(_ENTRY_SUFFIX) and entry not in keep:
+                try:
+                    os.unlink(join(self.cache_dir, entry))
+                except OSError:
+                    pass
@@ -0,0 +1,64 @@
+# 容器指纹：渲染出的 compose 文档（MBContainer.to_compose_dict）与镜像 ID 的 sha256。
+# 每次构建容器后，指纹保存在 storage_path/.mbctl/fingerprints/<容器名>.json 中；
+# mbctl apply 比较当前指纹与保存的指纹，只重建指纹改变了的容器。
+# 引用挂载等来自依赖容器的变化会体现在依赖者渲染出的 compose 文档中，因此也会改变依赖者的指纹。
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from posixpath import join
+from typing import Any, Optional
+
+from mbctl.MBLog import mb_logger
+from mbctl.StateFileUtils import atomic_write_text, get_state_path
+
+# 指纹的计算方式发生变化时增加这个版本号，使所有旧指纹失效。
+FINGERPRINT_FORMAT = 1
+_ENTRY_SUFFIX = ".json"
+
+
+def compute_fingerprint(compose_dict: dict[str, Any], image_id: Optional[str]) -> str:
+    # sort_keys 保证同一个文档总是得到同一个指纹，与字典（以及来自集合的键）的插入顺序无关。
+    canonical = json.dumps(
+        {"format": FINGERPRINT_FORMAT, "compose": compose_dict, "image_id": image_id},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MBContainerFingerprintStore:
+    def __init__(self, store_dir: Optional[str] = None) -> None:
+        self.store_dir = store_dir if store_dir is not None else get_state_path("fingerprints")
+
+    def _entry_path(self, container_name: str) -> str:
+        return join(self.store_dir, container_name + _ENTRY_SUFFIX)
+
+    def get(self, container_name: str) -> Optional[str]:
+        """返回上次构建时记录的指纹，没有记录时返回None。"""
+        try:
+            with open(self._entry_path(container_name), "r", encoding="utf-8") as f:
+                return json.load(f)["fingerprint"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            mb_logger.debug(f"Ignoring unreadable fingerprint of {container_name}: {e}")
+            return None
+
+    def record(self, container_name: str, fingerprint: str, image_id: Optional[str]) -> None:
+        entry = {"fingerprint": fingerprint, "image_id": image_id, "built_at": time.time()}
+        try:
+            atomic_write_text(self._entry_path(container_name), json.dumps(entry))
+        except OSError as e:
+            # 写不了指纹只会让下一次 apply 多重建一次这个容器。
+            mb_logger.warning(f"Failed to record fingerprint of {container_name}: {e}")
+
+    def remove(self, container_name: str) -> None:
+        try:
+            os.unlink(self._entry_path(container_name))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,21 @@
+# 这个文件记载了 mbctl halt / stop-all 对每个容器做了什么。
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class MBContainerStopState(Enum):
+    stopped = "stopped"  # 收到停止信号后在超时内退出
+    killed = "killed"  # 超时后被 SIGKILL
+    not_running = "not_running"  # 本来就没有运行，跳过
+    failed = "failed"  # 停止失败，仍在运行
+    cancelled = "cancelled"  # 依赖它的容器没能停止，因此没有停止它
+
+
+@dataclass
+class MBContainerStopResult:
+    name: str
+    state: MBContainerStopState
+    duration: float = 0.0  # 所在批次的耗时（秒），跳过的容器为0
+    error: Optional[BaseException] = None  # 停止失败时的异常
+    failed_dependent: Optional[str] = None  # 被取消时，那个没能停止的依赖者
@@ -0,0 +1,117 @@
+# 挂载根目录的存储后端。
+# 每个容器在每种挂载类型下有一个挂载根目录 storage_path/<type>/<容器名>，容器的默认挂载源都位于其中。
+# - dir：挂载根目录是普通目录（默认）。
+# - btrfs：挂载根目录是 btrfs 子卷。删除容器的挂载变为一次子卷删除，并且可以对挂载根目录做廉价的只读快照。
+#   btrfs 命令不存在、或 storage_path 不在 btrfs 上时，退回普通目录。
+# conf 类型的根目录中保存着容器配置文件，它总是普通目录。
+from __future__ import annotations
+
+import os
+import posixpath
+import shutil
+import subprocess
+from typing import Optional
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBLog import mb_logger
+from mbctl.datatypes.MountType import MountType
+
+# btrfs 子卷根目录的 inode 号总是 256（BTRFS_FIRST_FREE_OBJECTID）。
+BTRFS_SUBVOLUME_INO = 256
+SUBVOLUME_MOUNT_TYPES = frozenset(t.value for t in MountType if t != MountType.conf)
+
+
+def get_mount_root(path: str) -> Optional[str]:
+    """返回 path 所在的容器挂载根目录 storage_path/<type>/<容器名>；path 不在任何挂载根目录下时返回None。"""
+    storage_path = posixpath.normpath(mb_config.storage_path)
+    rel_path = posixpath.relpath(posixpath.normpath(path), storage_path)
+    parts = rel_path.split("/")
+    if len(parts) < 2 or parts[0] not in SUBVOLUME_MOUNT_TYPES:
+        return None
+    return posixpath.join(storage_path, parts[0], parts[1])
+
+
+class MBDirMountBackend:
+    name = "dir"
+    # 是否需要在准备挂载点之前单独创建挂载根目录
+    creates_roots = False
+
+    def is_subvolume(self, path: str) -> bool:
+        return False
+
+    def create_root(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+
+    def delete_root(self, path: str) -> None:
+        raise RuntimeError(f"{path} is not a btrfs subvolume.")
+
+    def snapshot(self, source: str, dest: str, readonly: bool = True) -> None:
+        raise RuntimeError("Snapshots require the btrfs mount backend.")
+
+
+class MBBtrfsMountBackend(MBDirMountBackend):
+    name = "btrfs"
+    creates_roots = True
+
+    def __init__(self, btrfs_path: str = "btrfs") -> None:
+        self.btrfs_path = btrfs_path
+
+    def _run(self, args: list[str], allow_error: bool = False) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [self.btrfs_path, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=not allow_error,
+        )
+
+    def is_subvolume(self, path: str) -> bool:
+        try:
+            if os.lstat(path).st_ino != BTRFS_SUBVOLUME_INO:
+                return False
+        except FileNotFoundError:
+            return False
+        # 其他文件系统上也可能出现 inode 256，由 btrfs 命令确认
+        return self._run(["subvolume", "show", path], allow_error=True).returncode == 0
+
+    def create_root(self, path: str) -> None:
+        os.makedirs(posixpath.dirname(path), exist_ok=True)
+        result = self._run(["subvolume", "create", path], allow_error=True)
+        if result.returncode != 0:
+            mb_logger.warning(
+                f"Cannot create btrfs subvolume {path} ({result.stderr.strip()}), using a plain directory."
+            )
+            os.makedirs(path, exist_ok=True)
+
+    def delete_root(self, path: str) -> None:
+        self._run(["subvolume", "delete", path])
+
+    def snapshot(self, source: str, dest: str, readonly: bool = True) -> None:
+        os.makedirs(posixpath.dirname(dest), exist_ok=True)
+        args = ["subvolume", "snapshot"]
+        if readonly:
+            args.append("-r")
+        self._run(args + [source, dest])
+
+
+# (mount_backend 配置值, 后端)。配置值改变时（比如测试中）重新选择后端。
+_mount_backend: Optional[tuple[str, MBDirMountBackend]] = None
+
+
+def _select_mount_backend(backend_name: str) -> MBDirMountBackend:
+    if backend_name == "btrfs":
+        btrfs_path = shutil.which("btrfs")
+        if btrfs_path is not None:
+            return MBBtrfsMountBackend(btrfs_path)
+        mb_logger.warning("btrfs command not found, falling back to the dir mount backend.")
+    return MBDirMountBackend()
+
+
+def get_mount_backend() -> MBDirMountBackend:
+    global _mount_backend
+    if _mount_backend is None or _mount_backend[0] != mb_config.mount_backend:
+        _mount_backend = (
+            mb_config.mount_backend,
+            _select_mount_backend(mb_config.mount_backend),
+        )
+    return _mount_backend[1]
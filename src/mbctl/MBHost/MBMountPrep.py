@@ -0,0 +1,203 @@
+# 挂载点准备引擎。
+# 每个挂载源路径只 stat 一次，与配置中的 owner、perm 比较后只执行真正需要的 mkdir、chown、chmod；
+# 多个容器共享的挂载源（比如引用挂载）只处理一次，不同路径可以在线程池中并行处理。
+# 也可以只生成计划（dry-run），列出将要执行的操作而不修改文件系统。
+# 使用 btrfs 挂载后端时，缺失的容器挂载根目录先被创建为子卷，再在其中创建挂载源目录。
+from __future__ import annotations
+
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Iterable, Optional
+
+from mbctl.MBContainer import MBContainerMountEntry
+from mbctl.MBLog import mb_logger
+from mbctl.MBProfile import profiled
+from .MBMountBackend import get_mount_backend, get_mount_root
+
+
+class MBMountActionKind(Enum):
+    subvolume = "subvolume"
+    mkdir = "mkdir"
+    chown = "chown"
+    chmod = "chmod"
+
+
+@dataclass(frozen=True)
+class MBMountAction:
+    kind: MBMountActionKind
+    path: str
+    uid: int = 0
+    gid: int = 0
+    mode: int = 0
+
+    def describe(self) -> str:
+        if self.kind == MBMountActionKind.subvolume:
+            return f"btrfs subvolume create {self.path}"
+        elif self.kind == MBMountActionKind.mkdir:
+            return f"mkdir -p {self.path}"
+        elif self.kind == MBMountActionKind.chown:
+            return f"chown {self.uid}:{self.gid} {self.path}"
+        else:
+            return f"chmod {self.mode:o} {self.path}"
+
+    def execute(self) -> None:
+        if self.kind == MBMountActionKind.subvolume:
+            get_mount_backend().create_root(self.path)
+        elif self.kind == MBMountActionKind.mkdir:
+            os.makedirs(self.path, exist_ok=True)
+        elif self.kind == MBMountActionKind.chown:
+            os.chown(self.path, self.uid, self.gid)
+        else:
+            os.chmod(self.path, self.mode)
+
+
+@dataclass
+class MBMountPlan:
+    actions: list[MBMountAction] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)  # 文件挂载点的源文件不存在等无法自动修复的问题
+    checked_paths: int = 0
+
+    def describe(self) -> list[str]:
+        return [action.describe() for action in self.actions] + [
+            f"error: {error}" for error in self.errors
+        ]
+
+
+# 一个挂载源路径期望的状态，由第一个使用它的挂载点决定。
+@dataclass(frozen=True)
+class _MountTarget:
+    path: str
+    file: bool
+    uid: int
+    gid: int
+    mode: int
+
+
+def _mount_target(mount_entry: MBContainerMountEntry) -> _MountTarget:
+    return _MountTarget(
+        path=mount_entry.source.real_mount_source_path,
+        file=mount_entry.file,
+        uid=mount_entry.owner[0],
+        gid=mount_entry.owner[1],
+        mode=int(mount_entry.perm, 8),
+    )
+
+
+def _plan_target(target: _MountTarget) -> tuple[list[MBMountAction], Optional[str]]:
+    try:
+        st: Optional[os.stat_result] = os.stat(target.path)
+    except FileNotFoundError:
+        st = None
+
+    # 只检查文件挂载点，不创建它们。因为自动创建文件挂载点甚至只是创建它的父目录都会引起极大的困惑。
+    if target.file:
+        if st is None:
+            return [], f"Mount source file {target.path} does not exist."
+        if not stat.S_ISREG(st.st_mode):
+            return [], f"Mount source {target.path} is not a file."
+        return [], None
+
+    actions: list[MBMountAction] = []
+    if st is None:
+        actions.append(MBMountAction(MBMountActionKind.mkdir, target.path))
+    elif not stat.S_ISDIR(st.st_mode):
+        return [], f"Mount source {target.path} exists but is not a directory."
+    if st is None or (st.st_uid, st.st_gid) != (target.uid, target.gid):
+        actions.append(
+            MBMountAction(MBMountActionKind.chown, target.path, uid=target.uid, gid=target.gid)
+        )
+    if st is None or stat.S_IMODE(st.st_mode) != target.mode:
+        actions.append(MBMountAction(MBMountActionKind.chmod, target.path, mode=target.mode))
+    return actions, None
+
+
+def _plan_root(root: str) -> tuple[list[MBMountAction], Optional[str]]:
+    if os.path.lexists(root):
+        return [], None
+    return [MBMountAction(MBMountActionKind.subvolume, root)], None
+
+
+def _prepare_root(root: str) -> tuple[list[MBMountAction], Optional[str]]:
+    actions, error = _plan_root(root)
+    for action in actions:
+        action.execute()
+    return actions, error
+
+
+def _mount_roots(targets: list[_MountTarget]) -> list[str]:
+    if not get_mount_backend().creates_roots:
+        return []
+    roots = {get_mount_root(t.path) for t in targets if not t.file}
+    return sorted(r for r in roots if r is not None)
+
+
+def _prepare_target(target: _MountTarget) -> tuple[list[MBMountAction], Optional[str]]:
+    actions, error = _plan_target(target)
+    if error is None:
+        for action in actions:
+            action.execute()
+    return actions, error
+
+
+def _unique_targets(mount_entries: Iterable[MBContainerMountEntry]) -> list[_MountTarget]:
+    targets: dict[str, _MountTarget] = {}
+    for mount_entry in mount_entries:
+        target = _mount_target(mount_entry)
+        existing = targets.get(target.path)
+        if existing is None:
+            targets[target.path] = target
+        elif existing != target:
+            mb_logger.warning(
+                f"Mount source {target.path} is configured differently by several mount points, "
+                f"using owner {existing.uid}:{existing.gid} and perm {existing.mode:o}."
+            )
+    return list(targets.values())
+
+
+def _run_targets(targets, worker, jobs: int) -> MBMountPlan:
+    if jobs > 1 and len(targets) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            outcomes = list(pool.map(worker, targets))
+    else:
+        outcomes = [worker(target) for target in targets]
+    plan = MBMountPlan(checked_paths=len(targets))
+    for actions, error in outcomes:
+        plan.actions.extend(actions)
+        if error is not None:
+            plan.errors.append(error)
+    return plan
+
+
+@profiled()
+def plan_mounts(mount_entries: Iterable[MBContainerMountEntry], jobs: int = 1) -> MBMountPlan:
+    """只检查，不修改文件系统，返回需要执行的操作。"""
+    targets = _unique_targets(mount_entries)
+    plan = _run_targets(_mount_roots(targets), _plan_root, jobs)
+    target_plan = _run_targets(targets, _plan_target, jobs)
+    plan.actions.extend(target_plan.actions)
+    plan.errors.extend(target_plan.errors)
+    plan.checked_paths = target_plan.checked_paths
+    return plan
+
+
+@profiled()
+def prepare_mounts(mount_entries: Iterable[MBContainerMountEntry], jobs: int = 1) -> MBMountPlan:
+    """
+    准备所有挂载点，返回实际执行的操作。
+    有文件挂载点的源文件不存在时抛出 FileNotFoundError，此时不会修改任何挂载点。
+    """
+    targets = _unique_targets(mount_entries)
+    # 先检查文件挂载点：它们只需要一次 stat，而且失败时不应该留下做了一半的目录。
+    file_plan = _run_targets([t for t in targets if t.file], _plan_target, jobs)
+    if file_plan.errors:
+        raise FileNotFoundError("\n".join(file_plan.errors))
+    root_plan = _run_targets(_mount_roots(targets), _prepare_root, jobs)
+    plan = _run_targets([t for t in targets if not t.file], _prepare_target, jobs)
+    if plan.errors:
+        raise FileExistsError("\n".join(plan.errors))
+    plan.actions[:0] = root_plan.actions
+    plan.checked_paths += file_plan.checked_paths
+    return plan
@@ -0,0 +1,44 @@
+# 宿主机范围内 真实挂载源 -> 使用它的容器 的反向索引。
+# 引用其他容器挂载点的挂载项（"<容器名>:<容器内路径>"）解析后与被引用的挂载项有相同的真实挂载源，
+# 所以通过这个索引可以 O(1) 地知道一个目录是否还被其他容器挂载，prune 据此拒绝删除仍在使用的目录。
+from __future__ import annotations
+
+from typing import Iterable
+
+from mbctl.MBContainer import MBContainer
+
+
+class MBMountSourceIndex:
+    def __init__(self) -> None:
+        self._users: dict[str, set[str]] = {}
+        self._sources: dict[str, set[str]] = {}
+
+    @classmethod
+    def build(cls, containers: Iterable[MBContainer]) -> "MBMountSourceIndex":
+        index = cls()
+        for container in containers:
+            index.add_container(container)
+        return index
+
+    def add_container(self, container: MBContainer) -> None:
+        """加入或替换一个已解析的容器的挂载源。"""
+        self.remove_container(container.name)
+        sources = container.mount.real_mount_sources()
+        self._sources[container.name] = sources
+        for source in sources:
+            self._users.setdefault(source, set()).add(container.name)
+
+    def remove_container(self, container_name: str) -> None:
+        for source in self._sources.pop(container_name, set()):
+            users = self._users[source]
+            users.discard(container_name)
+            if not users:
+                del self._users[source]
+
+    def users(self, source: str) -> set[str]:
+        """挂载 source 的所有容器。"""
+        return set(self._users.get(source, ()))
+
+    def other_users(self, source: str, container_name: str) -> list[str]:
+        """除 container_name 之外挂载 source 的容器，按名字排序。"""
+        return sorted(self._users.get(source, set()) - {container_name})
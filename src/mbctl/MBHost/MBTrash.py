@@ -0,0 +1,177 @@
+# 挂载目录的回收站。
+# prune 不再在前台逐个 rmtree，而是把每个挂载源原子地 rename 到 storage_path/.trash 下，立即返回；
+# 之后由后台回收进程（或 mbctl gc --trash）并行删除回收站中的内容。
+# rename 是原子的，所以无论何时崩溃，活动的挂载路径要么完整存在，要么已经整个进入回收站，不会出现删了一半的挂载目录。
+from __future__ import annotations
+
+import errno
+import fcntl
+import os
+import stat
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from posixpath import basename, dirname, join
+from typing import Callable, Optional
+
+from mbctl.MBConfig import mb_config
+from mbctl.StateFileUtils import get_state_path
+
+TRASH_DIR_NAME = ".trash"
+_LOCK_FILE = ".lock"
+REAPER_LOG_FILE = "trash-reaper.log"
+# 挂载源不在 storage_path 所在的文件系统上时，先 rename 到同一目录下的这个前缀的名字，再在回收站中放一个指向它的符号链接。
+FOREIGN_TRASH_PREFIX = ".mbctl-trash-"
+
+
+def get_trash_dir() -> str:
+    return join(mb_config.storage_path, TRASH_DIR_NAME)
+
+
+@dataclass
+class MBTrashEntryReport:
+    name: str
+    files: int = 0
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class MBTrashReport:
+    entries: list[MBTrashEntryReport] = field(default_factory=list)
+
+    @property
+    def files(self) -> int:
+        return sum(e.files for e in self.entries)
+
+    @property
+    def bytes(self) -> int:
+        return sum(e.bytes for e in self.entries)
+
+    @property
+    def errors(self) -> list[MBTrashEntryReport]:
+        return [e for e in self.entries if e.error is not None]
+
+
+def _delete_tree(path: str, report: MBTrashEntryReport) -> None:
+    # 自底向上删除，顺便统计文件数和字节数。不跟随符号链接。
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        os.unlink(path)
+        report.files += 1
+        report.bytes += st.st_size
+        return
+    for dir_path, dir_names, file_names in os.walk(path, topdown=False):
+        for file_name in file_names:
+            file_path = join(dir_path, file_name)
+            report.bytes += os.lstat(file_path).st_size
+            os.unlink(file_path)
+            report.files += 1
+        for dir_name in dir_names:
+            sub_path = join(dir_path, dir_name)
+            # os.walk 把指向目录的符号链接放在 dir_names 里
+            if os.path.islink(sub_path):
+                os.unlink(sub_path)
+                report.files += 1
+            else:
+                os.rmdir(sub_path)
+    os.rmdir(path)
+
+
+class MBTrash:
+    def __init__(self, trash_dir: Optional[str] = None) -> None:
+        self.trash_dir = trash_dir if trash_dir is not None else get_trash_dir()
+
+    def move_to_trash(self, path: str, label: str) -> Optional[str]:
+        """把 path 原子地移动到回收站，返回回收站中的条目名；path 不存在时返回None。"""
+        os.makedirs(self.trash_dir, mode=0o700, exist_ok=True)
+        entry_name = f"{int(time.time())}-{label}-{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(path, join(self.trash_dir, entry_name))
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # 跨文件系统：在原目录内 rename（同样是原子的），再让回收站中的符号链接指向它
+            foreign_path = join(dirname(path), FOREIGN_TRASH_PREFIX + entry_name)
+            os.rename(path, foreign_path)
+            os.symlink(foreign_path, join(self.trash_dir, entry_name))
+        return entry_name
+
+    def entries(self) -> list[str]:
+        try:
+            names = os.listdir(self.trash_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(n for n in names if n != _LOCK_FILE and not n.startswith(".tmp-"))
+
+    def _reap_entry(self, entry_name: str) -> MBTrashEntryReport:
+        report = MBTrashEntryReport(entry_name)
+        entry_path = join(self.trash_dir, entry_name)
+        try:
+            if os.path.islink(entry_path):
+                foreign_path = os.readlink(entry_path)
+                # 只删除 move_to_trash 创建的目标，防止误删其他路径
+                if basename(foreign_path).startswith(FOREIGN_TRASH_PREFIX) and os.path.lexists(
+                    foreign_path
+                ):
+                    _delete_tree(foreign_path, report)
+                os.unlink(entry_path)
+            else:
+                _delete_tree(entry_path, report)
+        except OSError as e:
+            report.error = str(e)
+        return report
+
+    def empty(
+        self,
+        jobs: int = 4,
+        on_progress: Optional[Callable[[MBTrashEntryReport], None]] = None,
+        wait: bool = True,
+    ) -> Optional[MBTrashReport]:
+        """
+        并行删除回收站中的所有条目，每删完一个条目调用一次 on_progress。
+        同一时间只有一个回收进程工作；wait 为 False 且已有回收进程在工作时直接返回None。
+        """
+        os.makedirs(self.trash_dir, mode=0o700, exist_ok=True)
+        with open(join(self.trash_dir, _LOCK_FILE), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return None
+            report = MBTrashReport()
+            failed: set[str] = set()
+            # 回收期间可能有新的条目进入回收站，循环直到没有可以删除的条目
+            while True:
+                pending = [n for n in self.entries() if n not in failed]
+                if not pending:
+                    return report
+                with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+                    for entry_report in pool.map(self._reap_entry, pending):
+                        report.entries.append(entry_report)
+                        if entry_report.error is not None:
+                            failed.add(entry_report.name)
+                        if on_progress is not None:
+                            on_progress(entry_report)
+
+    def start_background_reaper(self, log_path: Optional[str] = None) -> None:
+        """
+        启动一个脱离当前会话的回收进程，当前进程不等待它结束。
+        回收进程的输出追加到 log_path（默认为 .mbctl/trash-reaper.log）。
+        """
+        if log_path is None:
+            log_path = get_state_path(REAPER_LOG_FILE)
+        os.makedirs(dirname(log_path), mode=0o700, exist_ok=True)
+        with open(log_path, "ab") as log_file:
+            subprocess.Popen(
+                [sys.executable, "-m", "mbctl.MBHost.trash_reaper", self.trash_dir],
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=log_file,
+                start_new_session=True,
+                close_fds=True,
+            )
@@ -0,0 +1,183 @@
+# nerdctl api 的 asyncio 版本。
+# 与 NerdClient 提供相同的接口，但每个 nerdctl 调用都是 asyncio 子进程，调用者可以同时发起大量调用；
+# 同一个客户端同时运行的 nerdctl 进程数量由信号量限制。被取消的调用会杀死对应的 nerdctl 进程。
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import weakref
+from posixpath import dirname
+from typing import Any, Optional
+
+from mbctl.MBProfile import command_span
+from .NerdClientCliWrapper import (
+    NerdSteps,
+    nerd_compose_up_cmd,
+    nerd_image_id_cmd,
+    nerd_inspect_state_cmd,
+    nerd_pid_cmd,
+    nerd_ps_cmd,
+    nerd_ps_states_cmd,
+    nerd_rename_cmd,
+    nerd_rm_cmd,
+    nerd_start_cmd,
+    nerd_stop_cmd,
+    nerd_stop_containers_steps,
+    nerd_wait_cmd,
+    parse_nerd_image_id,
+    parse_nerd_inspect_state,
+    parse_nerd_ps_names,
+    parse_nerd_ps_states,
+)
+from .NerdContainer import NerdContainerState
+from .ComposeProjectDir import temporary_compose_project, write_compose_project
+
+
+class AsyncNerdClient:
+    def __init__(
+        self,
+        host=None,
+        max_concurrency: int = 16,
+        nerdctl_path: str = "nerdctl",
+    ) -> None:
+        self.host = host
+        self.nerdctl_path = nerdctl_path
+        self.max_concurrency = max_concurrency
+        # asyncio.Semaphore 会绑定到第一次使用它的事件循环，所以每个事件循环使用各自的信号量，
+        # 同一个客户端可以在多次 asyncio.run 之间复用。
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    # argv 是 NerdClientCliWrapper 中 nerd_*_cmd 构造的完整命令行，argv[0] 替换为 nerdctl_path。
+    # 超过 timeout 时杀死 nerdctl 进程并抛出 subprocess.TimeoutExpired，与 run_cmd_get_output 一致。
+    async def _run(
+        self,
+        argv: list[str],
+        allow_error: bool = False,
+        cwd: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> tuple[str, int]:
+        cmd = [self.nerdctl_path, *argv[1:]]
+        async with self._semaphore():
+            with command_span(cmd) as span:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                )
+                try:
+                    stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+                except (asyncio.CancelledError, TimeoutError) as e:
+                    # 调用被取消或超时时不要留下孤儿 nerdctl 进程
+                    if proc.returncode is None:
+                        proc.kill()
+                        await proc.wait()
+                    if isinstance(e, TimeoutError):
+                        raise subprocess.TimeoutExpired(cmd, timeout or 0) from None
+                    raise
+                span.set(returncode=proc.returncode)
+        return_code = proc.returncode if proc.returncode is not None else -1
+        if return_code != 0 and not allow_error:
+            raise subprocess.CalledProcessError(
+                return_code, cmd, stdout.decode(), stderr.decode()
+            )
+        return stdout.decode(), return_code
+
+    # run_nerd_steps 的 asyncio 版本
+    async def _run_steps[T](self, steps: NerdSteps[T]) -> T:
+        try:
+            cmd, timeout = next(steps)
+            while True:
+                try:
+                    reply: Optional[tuple[str, int]] = await self._run(
+                        cmd, allow_error=True, timeout=timeout
+                    )
+                except subprocess.TimeoutExpired:
+                    reply = None
+                cmd, timeout = steps.send(reply)
+        except StopIteration as stop:
+            return stop.value
+
+    async def list_running_containers_names(self) -> list[str]:
+        output, _ = await self._run(nerd_ps_cmd())
+        return parse_nerd_ps_names(output)
+
+    async def list_all_containers_names(self) -> list[str]:
+        output, _ = await self._run(nerd_ps_cmd(all=True))
+        return parse_nerd_ps_names(output)
+
+    async def get_container_state(self, container_name: str) -> NerdContainerState:
+        output, return_code = await self._run(
+            nerd_inspect_state_cmd(container_name), allow_error=True
+        )
+        return parse_nerd_inspect_state(output, return_code)
+
+    async def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        output, return_code = await self._run(nerd_ps_states_cmd(), allow_error=True)
+        if return_code != 0:
+            return {}
+        return parse_nerd_ps_states(output)
+
+    async def start_container(self, container_name: str) -> None:
+        await self._run(nerd_start_cmd(container_name))
+
+    async def stop_and_wait_container(self, container_name: str) -> None:
+        if await self.get_container_state(container_name) == NerdContainerState.running:
+            await self._run(nerd_stop_cmd(container_name))
+            await self._run(nerd_wait_cmd([container_name]))
+
+    async def stop_containers(self, container_names: list[str], timeout: float = 10) -> list[str]:
+        return await self._run_steps(nerd_stop_containers_steps(container_names, timeout))
+
+    async def force_delete_container(self, container_name: str) -> None:
+        await self.stop_and_wait_container(container_name)
+        await self._run(nerd_rm_cmd(container_name))
+
+    async def rename_container(self, old_name: str, new_name: str) -> None:
+        await self._run(nerd_rename_cmd(old_name, new_name))
+
+    async def get_container_pid(self, container_name: str) -> str:
+        output, _ = await self._run(nerd_pid_cmd(container_name))
+        return output.strip()
+
+    async def get_image_id(self, image: str) -> Optional[str]:
+        output, return_code = await self._run(nerd_image_id_cmd(image), allow_error=True)
+        return parse_nerd_image_id(output, return_code)
+
+    # 与 NerdClient 相同，compose 文件写入该容器持久的项目目录，nerdctl 以项目目录为工作目录运行。
+    async def compose_create_container(self, compose_dict: dict[str, Any]) -> None:
+        project_name, compose_file_path = write_compose_project(compose_dict)
+        await self._compose_up(compose_file_path, project_name)
+
+    # 与 NerdClient 相同，不会抛出错误，只会返回退出码；project_name 不为None时使用一次性的临时项目目录。
+    async def compose_create_container_safe(
+        self, compose_dict: dict[str, Any], project_name: Optional[str] = None
+    ) -> int:
+        if project_name is None:
+            project_name, compose_file_path = write_compose_project(compose_dict)
+            _, return_code = await self._compose_up(compose_file_path, project_name, True)
+        else:
+            with temporary_compose_project(compose_dict, project_name) as (
+                project_name,
+                compose_file_path,
+            ):
+                _, return_code = await self._compose_up(compose_file_path, project_name, True)
+        return return_code
+
+    async def _compose_up(
+        self, compose_file_path: str, project_name: str, allow_error: bool = False
+    ) -> tuple[str, int]:
+        return await self._run(
+            nerd_compose_up_cmd(compose_file_path, project_name),
+            allow_error,
+            cwd=dirname(compose_file_path),
+        )
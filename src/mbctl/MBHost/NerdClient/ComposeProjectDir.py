@@ -0,0 +1,63 @@
+# 每个 compose 项目在 storage_path/.mbctl/compose/<项目名> 下有一个持久的项目目录。
+# compose 文件原子地写入项目目录并通过 -f 传给 nerdctl，nerdctl 子进程以项目目录为工作目录（只对子进程生效，不改变 mbctl 进程的工作目录），
+# 所以可以在多个线程中同时调用 compose；同一个容器每次构建都复用同一个目录和项目名，不必每次创建并删除临时目录。
+import hashlib
+import posixpath
+import re
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+from typing import Any, Iterable, Iterator
+
+from mbctl.StateFileUtils import atomic_write_text, get_state_path
+from mbctl.YamlUtils import yaml_dumps
+
+COMPOSE_FILE_NAME = "compose.yaml"
+_INVALID_PROJECT_CHARS = re.compile(r"[^a-z0-9_-]")
+
+
+def _name_digest(name: str) -> str:
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]
+
+
+def sanitize_compose_project_name(name: str) -> str:
+    """
+    compose 项目名只能包含小写字母、数字、"_" 和 "-"，其他字符被替换为 "-"，大写字母转为小写。
+    名字被改动时追加原名的摘要，使映射是一对一的：例如 "web.a"、"Web-a" 与 "web-a" 得到不同的项目名。
+    """
+    sanitized = _INVALID_PROJECT_CHARS.sub("-", name.lower())
+    if sanitized != name:
+        sanitized = f"{sanitized}-{_name_digest(name)}"
+    return sanitized
+
+
+def get_compose_project_name(service_names: Iterable[str]) -> str:
+    """单服务的项目以容器名命名，多服务的项目以所有服务名的摘要命名。"""
+    names = sorted(service_names)
+    if len(names) == 1:
+        return sanitize_compose_project_name(names[0])
+    return "mbctl-project-" + hashlib.sha256("\n".join(names).encode("utf-8")).hexdigest()[:16]
+
+
+def get_compose_project_dir(project_name: str) -> str:
+    return get_state_path("compose", project_name)
+
+
+def write_compose_project(compose_dict: dict[str, Any]) -> tuple[str, str]:
+    """把 compose 文档写入项目目录，返回 (项目名, compose 文件路径)。"""
+    project_name = get_compose_project_name(compose_dict["services"])
+    compose_file_path = posixpath.join(get_compose_project_dir(project_name), COMPOSE_FILE_NAME)
+    atomic_write_text(compose_file_path, yaml_dumps(compose_dict))
+    return project_name, compose_file_path
+
+
+@contextmanager
+def temporary_compose_project(compose_dict: dict[str, Any], project_name: str) -> Iterator[tuple[str, str]]:
+    """
+    把 compose 文件写入一次性的临时目录，产出 (项目名, compose 文件路径)，退出时删除临时目录。
+    用于临时替代某个容器的一次性容器（例如离线 shell），不覆盖该容器持久的项目目录，也不属于它的 compose 项目。
+    """
+    with TemporaryDirectory(prefix="mbctl-compose-") as tmpdir:
+        compose_file_path = posixpath.join(tmpdir, COMPOSE_FILE_NAME)
+        with open(compose_file_path, "w", encoding="utf-8") as compose_file:
+            compose_file.write(yaml_dumps(compose_dict))
+        yield sanitize_compose_project_name(project_name), compose_file_path
@@ -1,22 +1,23 @@
 # nerdctl api
-from typing import Optional
-from tempfile import TemporaryDirectory
+from typing import Any, Optional
 from mbctl.MBContainer import MBContainer
 from mbctl.MBConfig import mb_config
-from mbctl.datatypes import ComposeConf
-from mbctl.TempfileUtils import change_cwd
 from .NerdClientCliWrapper import (
     nerd_ps,
     nerd_get_container_state,
+    nerd_get_all_container_states,
     nerd_start_container,
     nerd_stop_and_wait_container,
+    nerd_stop_containers,
     nerd_force_delete_container,
     nerd_compose_up,
     nerd_rename_container,
     nerd_get_container_pid,
+    nerd_get_image_id,
     run_cmd,
 )
 from .NerdContainer import NerdContainerState
+from .ComposeProjectDir import temporary_compose_project, write_compose_project
 from enum import Enum
 import subprocess
 
@@ -42,6 +43,10 @@ class NerdClient:
     def get_container_state(self, container_name: str) -> NerdContainerState:
         return nerd_get_container_state(container_name)
 
+    # 一次性获得所有容器的状态快照。快照中缺失或状态不明确的容器，调用者需要用 get_container_state 单独查询。
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        return nerd_get_all_container_states()
+
     def start_container(self, container_name: str) -> None:
         nerd_start_container(container_name)
 
@@ -49,6 +54,11 @@ class NerdClient:
         if self.get_container_state(container_name) == NerdContainerState.running:
             nerd_stop_and_wait_container(container_name)
 
+    # 同时向一组正在运行的容器发送各自的停止信号，timeout 秒后仍未退出的被 SIGKILL，返回这些容器名。
+    # SIGKILL 后仍未退出的容器保持运行状态，调用者应以容器状态判断是否停止成功。
+    def stop_containers(self, container_names: list[str], timeout: float = 10) -> list[str]:
+        return nerd_stop_containers(container_names, timeout)
+
     def force_delete_container(self, container_name: str) -> None:
         self.stop_and_wait_container(container_name)
         nerd_force_delete_container(container_name)
@@ -62,21 +72,29 @@ class NerdClient:
     def get_container_pid(self, container_name: str) -> str:
         return nerd_get_container_pid(container_name)
 
+    def get_image_id(self, image: str) -> Optional[str]:
+        return nerd_get_image_id(image)
+
     # 这个函数不支持在远程执行
-    def compose_create_container(self, compose_conf: ComposeConf):
-        with TemporaryDirectory() as tmpdir:
-            with change_cwd(tmpdir):
-                with open("compose.yaml", "w", encoding="utf-8") as compose_conf_file:
-                    compose_conf_file.write(compose_conf.to_compose_yaml_str())
-                nerd_compose_up()
+    # compose_dict 是渲染好的 compose 文档（MBContainer.to_compose_dict 的结果），直接序列化为 compose 文件，不再构造 ComposeConf。
+    # compose 文件写入 storage_path 下该容器持久的项目目录，通过 -f 传给 nerdctl，nerdctl 以项目目录为工作目录运行，
+    # 不切换当前进程的工作目录，因此可以在多个线程中同时调用。
+    def compose_create_container(self, compose_dict: dict[str, Any]):
+        project_name, compose_file_path = write_compose_project(compose_dict)
+        nerd_compose_up(compose_file_path, project_name)
 
     # 不会抛出错误，只会返回退出码。
-    def compose_create_container_safe(self, compose_conf: ComposeConf) -> int:
-        with TemporaryDirectory() as tmpdir:
-            with change_cwd(tmpdir):
-                with open("compose.yaml", "w", encoding="utf-8") as compose_conf_file:
-                    compose_conf_file.write(compose_conf.to_compose_yaml_str())
-                return_code = self.execute_any_command_safely(
-                    ["nerdctl", "compose", "-f", "compose.yaml", "up", "-d"]
-                )
-                return return_code if return_code is not None else -2
+    # project_name 不为None时，compose 文件写入一次性的临时目录并使用这个项目名（例如离线 shell 的临时容器），不覆盖容器持久的项目目录。
+    def compose_create_container_safe(
+        self, compose_dict: dict[str, Any], project_name: Optional[str] = None
+    ) -> int:
+        if project_name is None:
+            project_name, compose_file_path = write_compose_project(compose_dict)
+            return_code = nerd_compose_up(compose_file_path, project_name, allow_error=True)
+        else:
+            with temporary_compose_project(compose_dict, project_name) as (
+                project_name,
+                compose_file_path,
+            ):
+                return_code = nerd_compose_up(compose_file_path, project_name, allow_error=True)
+        return return_code if return_code is not None else -2
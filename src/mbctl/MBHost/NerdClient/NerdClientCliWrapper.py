@@ -1,96 +1,329 @@
 # docker-on-wheals 有些时候不好用，它在list container的时候对数据结构的定义有问题。所以我们制作了一个nerdctl命令行的封装。
 # 这个函数只是临时代替了一些nerdclient的功能，未来可能会被废弃。
+import posixpath
 import subprocess
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from json import loads
-from typing import Optional
+from typing import Callable, Generator, Iterator, Optional, TextIO
+from mbctl.MBProfile import command_span
 from .NerdContainer import NerdContainerState
 
 
-def run_cmd_get_output(cmd: list[str], allow_error=False) -> tuple[str, int]:
-    proc = subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        check=not allow_error,
-    )
-    return proc.stdout, proc.returncode
-
-
-def run_cmd(cmd: list[str], allow_error=False) -> Optional[int]:
-    # 对长期运行的命令，比如nerdctl logs -f，不要在KeyboardInterrupt时抛出异常。
-    try:
+# timeout 秒后仍未结束的命令会被杀死，并抛出 subprocess.TimeoutExpired。
+# cwd 只作为子进程的工作目录，不会改变当前进程的工作目录。
+def run_cmd_get_output(
+    cmd: list[str], allow_error=False, timeout: Optional[float] = None, cwd: Optional[str] = None
+) -> tuple[str, int]:
+    with command_span(cmd) as span:
         proc = subprocess.run(
             cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            check=not allow_error,
+            timeout=timeout,
+            cwd=cwd,
         )
-        return proc.returncode
-    except KeyboardInterrupt:
-        return None
+        span.set(returncode=proc.returncode)
+    if not allow_error and proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, proc.stdout, proc.stderr)
+    return proc.stdout, proc.returncode
 
 
-def nerd_ps(all: bool = False) -> list[str]:
+# run_cmd 执行的命令的输出去向：回调参数为 ("stdout" 或 "stderr", 一行输出)。为 None 时子进程直接继承本进程的 stdout/stderr。
+# mbctld 在处理请求的线程中设置它，把 nerdctl 的输出转发给发出请求的 CLI。这是一个 ContextVar，只影响设置它的线程（及复制了其上下文的线程）。
+type CommandOutput = Callable[[str, str], None]
+_command_output: ContextVar[Optional[CommandOutput]] = ContextVar("mbctl_command_output", default=None)
+
+
+@contextmanager
+def forward_command_output(output: CommandOutput) -> Iterator[None]:
+    token = _command_output.set(output)
+    try:
+        yield
+    finally:
+        _command_output.reset(token)
+
+
+def _run_forwarding_output(cmd: list[str], cwd: Optional[str], output: CommandOutput) -> int:
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=cwd
+    )
+
+    def pump(pipe: TextIO, stream: str) -> None:
+        for line in pipe:
+            output(stream, line)
+
+    stderr_thread = threading.Thread(target=pump, args=(proc.stderr, "stderr"), daemon=True)
+    stderr_thread.start()
+    pump(proc.stdout, "stdout")  # type: ignore[arg-type]
+    stderr_thread.join()
+    return proc.wait()
+
+
+def run_cmd(cmd: list[str], allow_error=False, cwd: Optional[str] = None) -> Optional[int]:
+    output = _command_output.get()
+    # 对长期运行的命令，比如nerdctl logs -f，不要在KeyboardInterrupt时抛出异常。
+    with command_span(cmd) as span:
+        try:
+            if output is not None:
+                returncode = _run_forwarding_output(cmd, cwd, output)
+            else:
+                returncode = subprocess.run(cmd, text=True, cwd=cwd).returncode
+        except KeyboardInterrupt:
+            span.set(returncode=None)
+            return None
+        span.set(returncode=returncode)
+    if not allow_error and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return returncode
+
+
+# 下面的 nerd_*_cmd 函数构造 nerdctl 命令行，parse_nerd_* 函数解析其输出。
+# NerdClient 和 AsyncNerdClient 都使用它们，两个客户端只是执行命令的方式不同。
+def nerd_ps_cmd(all: bool = False) -> list[str]:
     cmd = ["nerdctl", "ps", "--format={{json .Names}}"]
     if all:
         cmd.append("-a")
-    output, _ = run_cmd_get_output(cmd)
+    return cmd
+
 
+def parse_nerd_ps_names(output: str) -> list[str]:
     return [loads(i) for i in output.splitlines()]
 
 
-# 这个函数返回None表示容器不存在，True表示运行中，False表示停止。3
-def nerd_get_container_state(container_name: str) -> NerdContainerState:
-    cmd = ["nerdctl", "inspect", "--format", "{{.State.Running}}", container_name]
-    output, return_code = run_cmd_get_output(cmd, True)
+def nerd_ps(all: bool = False) -> list[str]:
+    output, _ = run_cmd_get_output(nerd_ps_cmd(all))
+    return parse_nerd_ps_names(output)
+
+
+# 将 nerdctl ps 输出的 Status 字段映射为容器状态。无法明确判断的状态（如 Paused、Restarting）返回None，交由调用者单独 inspect。
+def _nerd_ps_status_to_state(status: str) -> Optional[NerdContainerState]:
+    if status.startswith("Up"):
+        return NerdContainerState.running
+    elif status.startswith("Exited") or status.startswith("Created"):
+        return NerdContainerState.stopped
+    else:
+        return None
+
+
+def parse_nerd_ps_states(output: str) -> dict[str, NerdContainerState]:
+    states: dict[str, NerdContainerState] = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = loads(line)
+        except ValueError:
+            continue
+        state = _nerd_ps_status_to_state(str(entry.get("Status", "")))
+        if state is None:
+            continue
+        # Names 可能是以逗号分隔的多个名字
+        for name in str(entry.get("Names", "")).split(","):
+            name = name.strip()
+            if name:
+                states[name] = state
+    return states
+
+
+def nerd_ps_states_cmd() -> list[str]:
+    return ["nerdctl", "ps", "-a", "--format", "{{json .}}"]
+
+
+# 一次 nerdctl ps -a 获得所有容器的状态。命令失败时返回空字典，调用者应退回到逐个 inspect。
+def nerd_get_all_container_states() -> dict[str, NerdContainerState]:
+    output, return_code = run_cmd_get_output(nerd_ps_states_cmd(), True)
+    if return_code != 0:
+        return {}
+    return parse_nerd_ps_states(output)
+
+
+def nerd_inspect_state_cmd(container_name: str) -> list[str]:
+    return ["nerdctl", "inspect", "--format", "{{.State.Running}}", container_name]
+
+
+def parse_nerd_inspect_state(output: str, return_code: int) -> NerdContainerState:
     if return_code != 0:
         return NerdContainerState.not_exist
+    elif output.strip() == "true":
+        return NerdContainerState.running
     else:
-        if output.strip() == "true":
-            return NerdContainerState.running
-        else:
-            return NerdContainerState.stopped
+        return NerdContainerState.stopped
+
+
+def nerd_get_container_state(container_name: str) -> NerdContainerState:
+    output, return_code = run_cmd_get_output(nerd_inspect_state_cmd(container_name), True)
+    return parse_nerd_inspect_state(output, return_code)
+
+
+def nerd_image_id_cmd(image: str) -> list[str]:
+    return ["nerdctl", "image", "inspect", "--format", "{{.ID}}", image]
+
+
+def parse_nerd_image_id(output: str, return_code: int) -> Optional[str]:
+    if return_code != 0:
+        return None
+    return output.strip() or None
+
+
+# 返回本地镜像的 ID（内容摘要），镜像不存在时返回None。
+def nerd_get_image_id(image: str) -> Optional[str]:
+    output, return_code = run_cmd_get_output(nerd_image_id_cmd(image), True)
+    return parse_nerd_image_id(output, return_code)
+
+
+def nerd_start_cmd(container_name: str) -> list[str]:
+    return ["nerdctl", "start", container_name]
 
 
 def nerd_start_container(container_name: str) -> None:
-    cmd = ["nerdctl", "start", container_name]
-    run_cmd_get_output(cmd)
+    run_cmd_get_output(nerd_start_cmd(container_name))
+
+
+def nerd_stop_cmd(container_name: str) -> list[str]:
+    return ["nerdctl", "stop", container_name]
+
+
+def nerd_wait_cmd(container_names: list[str]) -> list[str]:
+    return ["nerdctl", "wait", *container_names]
+
+
+def nerd_kill_cmd(container_names: list[str], signal: str) -> list[str]:
+    return ["nerdctl", "kill", "-s", signal, *container_names]
 
 
 def nerd_stop_and_wait_container(container_name: str) -> None:
-    run_cmd(["nerdctl", "stop", container_name])
-    run_cmd(["nerdctl", "wait", container_name])
+    run_cmd(nerd_stop_cmd(container_name))
+    run_cmd(nerd_wait_cmd([container_name]))
+
+
+# nerdctl 把容器的停止信号（--stop-signal、compose 的 stop_signal 或镜像的 StopSignal）记录在这个标签中，nerdctl stop 使用它。
+STOP_SIGNAL_LABEL = "nerdctl/stop-signal"
+DEFAULT_STOP_SIGNAL = "SIGTERM"
+
+
+def _stop_signal_from_labels_json(line: str) -> str:
+    try:
+        labels = loads(line) or {}
+    except ValueError:
+        return DEFAULT_STOP_SIGNAL
+    return labels.get(STOP_SIGNAL_LABEL) or DEFAULT_STOP_SIGNAL
+
+
+# 由多条 nerdctl 命令组成、后面的命令依赖前面的输出的操作写成生成器：产出 (命令, 超时秒数)，
+# 接收 (输出, 退出码)（命令失败不抛出异常），超时则接收 None；生成器的返回值就是操作的结果。
+# run_nerd_steps 同步地执行它们，AsyncNerdClient 用 asyncio 子进程执行同一个生成器，所以流程只有一份实现。
+type NerdSteps[T] = Generator[tuple[list[str], Optional[float]], Optional[tuple[str, int]], T]
+
+
+def run_nerd_steps[T](steps: NerdSteps[T]) -> T:
+    try:
+        cmd, timeout = next(steps)
+        while True:
+            try:
+                reply: Optional[tuple[str, int]] = run_cmd_get_output(cmd, True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                reply = None
+            cmd, timeout = steps.send(reply)
+    except StopIteration as stop:
+        return stop.value
+
+
+def nerd_stop_signals_cmd(container_names: list[str]) -> list[str]:
+    return ["nerdctl", "inspect", "--format", "{{json .Config.Labels}}", *container_names]
+
+
+# 返回一组容器的停止信号。一次 nerdctl inspect 查询所有容器，失败时（比如其中某个容器已被删除）逐个查询。
+def nerd_stop_signals_steps(container_names: list[str]) -> NerdSteps[dict[str, str]]:
+    output, return_code = yield nerd_stop_signals_cmd(container_names), None  # type: ignore[misc]
+    lines = output.splitlines()
+    if return_code == 0 and len(lines) == len(container_names):
+        return {
+            name: _stop_signal_from_labels_json(line)
+            for name, line in zip(container_names, lines)
+        }
+    signals: dict[str, str] = {}
+    for name in container_names:
+        output, return_code = yield nerd_stop_signals_cmd([name]), None  # type: ignore[misc]
+        signals[name] = (
+            _stop_signal_from_labels_json(output.strip())
+            if return_code == 0
+            else DEFAULT_STOP_SIGNAL
+        )
+    return signals
+
+
+def nerd_get_stop_signals(container_names: list[str]) -> dict[str, str]:
+    return run_nerd_steps(nerd_stop_signals_steps(container_names))
+
+
+# 批量停止一组正在运行的容器，返回超时后被 SIGKILL 的容器名。
+# nerdctl stop a b c 会逐个停止容器，每个容器都可能等满超时；这里按容器各自的停止信号分组，每组用一次 nerdctl kill
+# 同时发送停止信号，再用一次 nerdctl wait 等待它们全部退出（它们是同时退出的，所以总耗时接近最慢的那个容器），
+# 超过 timeout 仍在运行的容器用 SIGKILL 结束。SIGKILL 之后 timeout 秒内仍未退出的容器保持运行状态，由调用者按容器状态报告为失败。
+def nerd_stop_containers_steps(container_names: list[str], timeout: float) -> NerdSteps[list[str]]:
+    if not container_names:
+        return []
+    by_signal: dict[str, list[str]] = {}
+    signals = yield from nerd_stop_signals_steps(container_names)
+    for name, signal in signals.items():
+        by_signal.setdefault(signal, []).append(name)
+    for signal, names in by_signal.items():
+        yield nerd_kill_cmd(names, signal), None
+    if (yield nerd_wait_cmd(container_names), timeout) is not None:
+        return []
+    output, return_code = yield nerd_ps_states_cmd(), None  # type: ignore[misc]
+    states = parse_nerd_ps_states(output) if return_code == 0 else {}
+    still_running = [
+        name for name in container_names if states.get(name) == NerdContainerState.running
+    ]
+    if still_running:
+        yield nerd_kill_cmd(still_running, "SIGKILL"), None
+        yield nerd_wait_cmd(still_running), timeout
+    return still_running
+
+
+def nerd_stop_containers(container_names: list[str], timeout: float) -> list[str]:
+    return run_nerd_steps(nerd_stop_containers_steps(container_names, timeout))
+
+
+def nerd_rm_cmd(container_name: str) -> list[str]:
+    return ["nerdctl", "rm", container_name]
 
 
 def nerd_force_delete_container(container_name: str) -> None:
-    run_cmd(["nerdctl", "rm", container_name])
+    run_cmd(nerd_rm_cmd(container_name))
 
 
-def nerd_compose_up(compose_file_path: Optional[str] = None) -> None:
-    if compose_file_path is None:
-        cmd = ["nerdctl", "compose", "up", "-d"]
-    else:
-        cmd = ["nerdctl", "compose", "-f", compose_file_path, "up", "-d"]
-    run_cmd(cmd)
+def nerd_compose_up_cmd(compose_file_path: str, project_name: str) -> list[str]:
+    return ["nerdctl", "compose", "-f", compose_file_path, "-p", project_name, "up", "-d"]
+
+
+# 在 compose 文件所在的项目目录中执行 nerdctl compose up，返回退出码。
+def nerd_compose_up(compose_file_path: str, project_name: str, allow_error=False) -> Optional[int]:
+    return run_cmd(
+        nerd_compose_up_cmd(compose_file_path, project_name),
+        allow_error,
+        cwd=posixpath.dirname(compose_file_path),
+    )
+
+
+def nerd_rename_cmd(old_name: str, new_name: str) -> list[str]:
+    return ["nerdctl", "rename", old_name, new_name]
 
 
 def nerd_rename_container(old_name: str, new_name: str) -> None:
-    cmd = ["nerdctl", "rename", old_name, new_name]
-    run_cmd(cmd)
+    run_cmd(nerd_rename_cmd(old_name, new_name))
 
-def nerd_get_container_pid(container_name: str) -> str:
+
+def nerd_pid_cmd(container_name: str) -> list[str]:
     # nerdctl inspect -f '{{.State.Pid}}' container_name
+    return ["nerdctl", "inspect", "-f", "{{.State.Pid}}", container_name]
 
-    result = subprocess.run(
-        [
-            "nerdctl",
-            "inspect",
-            "-f",
-            "{{.State.Pid}}",
-            container_name,
-        ],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    return result.stdout.strip()
\ No newline at end of file
+
+def nerd_get_container_pid(container_name: str) -> str:
+    output, _ = run_cmd_get_output(nerd_pid_cmd(container_name))
+    return output.strip()
\ No newline at end of file
@@ -0,0 +1,327 @@
+# 进程内模拟的 nerdctl 后端，用于在没有 containerd 的机器上对编排逻辑做负载和规模测试。
+# 它模拟容器的存在与状态、改名、compose up、停止、pid 以及 compose up 时拉取的镜像，
+# 每次调用等待可配置的延迟（模拟 nerdctl 子进程的开销，等待时不持有锁，所以并发调用会真正重叠），
+# 可以按操作、容器名注入失败，并记录每一次调用。失败的表现与 NerdClientCliWrapper 一致：
+# 查询类操作返回"不存在"/空结果，其余操作抛出 subprocess.CalledProcessError。
+from __future__ import annotations
+
+import hashlib
+import random
+import subprocess
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+from mbctl.YamlUtils import yaml_dumps
+from .NerdClient import NerdClient
+from .NerdContainer import NerdContainerState
+from .ComposeProjectDir import get_compose_project_name, sanitize_compose_project_name
+
+FIRST_PID = 10000
+
+
+@dataclass
+class SimulatedContainer:
+    name: str
+    image: str
+    state: NerdContainerState = NerdContainerState.stopped
+    pid: int = 0
+    # 收到 SIGTERM 后退出所需的秒数，None 表示忽略 SIGTERM（只能被 SIGKILL）
+    stop_seconds: Optional[float] = 0.0
+    # 创建该容器的 compose 项目名，不是由 compose 创建的容器为None
+    project: Optional[str] = None
+
+
+@dataclass
+class SimulatedCall:
+    op: str
+    # 操作的对象：容器名、镜像名或命令行，查询全部容器的操作为None
+    target: Optional[str]
+    start: float
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class SimulatedFailure:
+    op: str
+    # None 表示对该操作的所有对象生效
+    target: Optional[str] = None
+    # 剩余的失败次数，None 表示一直失败
+    times: Optional[int] = None
+    returncode: int = 1
+    stderr: str = "simulated failure"
+    hits: int = field(default=0, init=False)
+
+
+class SimulatedNerdClient(NerdClient):
+    def __init__(
+        self,
+        latency: float = 0.0,
+        op_latency: Optional[Mapping[str, float]] = None,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        """
+        latency 是每次调用的默认延迟（秒），op_latency 按操作名（即方法名，如 "compose_create_container"）覆盖它。
+        failure_rate 是每次调用随机失败的概率，随机数由 seed 决定，便于复现。
+        """
+        super().__init__()
+        self.latency = latency
+        self.op_latency = dict(op_latency or {})
+        self.failure_rate = failure_rate
+        self.containers: dict[str, SimulatedContainer] = {}
+        self.images: dict[str, str] = {}
+        self.calls: list[SimulatedCall] = []
+        self.failures: list[SimulatedFailure] = []
+        self._rng = random.Random(seed)
+        self._next_pid = FIRST_PID
+        self._lock = threading.Lock()
+
+    # ---- 测试辅助 ----
+
+    def add_container(
+        self, name: str, image: str = "docker.io/library/busybox:latest", running: bool = True
+    ) -> SimulatedContainer:
+        """直接加入一个已存在的容器（不计为一次调用），镜像视为已拉取。"""
+        with self._lock:
+            container = SimulatedContainer(name, image)
+            self.containers[name] = container
+            self._pull(image)
+            if running:
+                self._run(container)
+            return container
+
+    def fail(
+        self,
+        op: str,
+        target: Optional[str] = None,
+        times: Optional[int] = 1,
+        returncode: int = 1,
+        stderr: str = "simulated failure",
+    ) -> SimulatedFailure:
+        """让之后对 target（None 为任意对象）的 op 调用失败 times 次（None 为一直失败）。"""
+        failure = SimulatedFailure(op, target, times, returncode, stderr)
+        with self._lock:
+            self.failures.append(failure)
+        return failure
+
+    def reset(self) -> None:
+        """清空所有容器、镜像、调用记录和注入的失败。"""
+        with self._lock:
+            self.containers.clear()
+            self.images.clear()
+            self.calls.clear()
+            self.failures.clear()
+            self._next_pid = FIRST_PID
+
+    def call_counts(self) -> Counter[str]:
+        with self._lock:
+            return Counter(call.op for call in self.calls)
+
+    def calls_of(self, op: str) -> list[SimulatedCall]:
+        with self._lock:
+            return [call for call in self.calls if call.op == op]
+
+    @property
+    def states(self) -> dict[str, NerdContainerState]:
+        with self._lock:
+            return {name: c.state for name, c in self.containers.items()}
+
+    # ---- 模拟内部 ----
+
+    def _pull(self, image: str) -> None:
+        if image not in self.images:
+            self.images[image] = "sha256:" + hashlib.sha256(image.encode("utf-8")).hexdigest()
+
+    def _run(self, container: SimulatedContainer) -> None:
+        container.state = NerdContainerState.running
+        container.pid = self._next_pid
+        self._next_pid += 1
+
+    def _begin(self, op: str, target: Optional[str]) -> SimulatedCall:
+        """等待 op 的延迟并记录这次调用，如果注入了失败则抛出 CalledProcessError。"""
+        call = SimulatedCall(op, target, time.perf_counter())
+        delay = self.op_latency.get(op, self.latency)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.calls.append(call)
+            failure = self._match_failure(op, target)
+            if failure is None and self.failure_rate and self._rng.random() < self.failure_rate:
+                failure = SimulatedFailure(op, target)
+            call.duration = time.perf_counter() - call.start
+            if failure is not None:
+                call.error = failure.stderr
+                raise subprocess.CalledProcessError(
+                    failure.returncode, ["nerdctl", op] + ([target] if target else []), "", failure.stderr
+                )
+        return call
+
+    def _match_failure(self, op: str, target: Optional[str]) -> Optional[SimulatedFailure]:
+        for failure in self.failures:
+            if failure.op != op or failure.target not in (None, target):
+                continue
+            if failure.times is not None:
+                if failure.times <= 0:
+                    continue
+                failure.times -= 1
+            failure.hits += 1
+            return failure
+        return None
+
+    def _error(self, call: SimulatedCall, message: str) -> subprocess.CalledProcessError:
+        call.error = message
+        return subprocess.CalledProcessError(1, ["nerdctl", call.op, call.target or ""], "", message)
+
+    def _get(self, call: SimulatedCall, name: str) -> SimulatedContainer:
+        container = self.containers.get(name)
+        if container is None:
+            raise self._error(call, f"no such container: {name}")
+        return container
+
+    # ---- NerdClient ----
+
+    def list_running_containers_names(self) -> list[str]:
+        self._begin("list_running_containers_names", None)
+        with self._lock:
+            return [c.name for c in self.containers.values() if c.state == NerdContainerState.running]
+
+    def list_all_containers_names(self) -> list[str]:
+        self._begin("list_all_containers_names", None)
+        with self._lock:
+            return list(self.containers)
+
+    def get_container_state(self, container_name: str) -> NerdContainerState:
+        try:
+            self._begin("get_container_state", container_name)
+        except subprocess.CalledProcessError:
+            return NerdContainerState.not_exist
+        with self._lock:
+            container = self.containers.get(container_name)
+            return container.state if container is not None else NerdContainerState.not_exist
+
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        try:
+            self._begin("get_all_container_states", None)
+        except subprocess.CalledProcessError:
+            return {}
+        return self.states
+
+    def start_container(self, container_name: str) -> None:
+        call = self._begin("start_container", container_name)
+        with self._lock:
+            container = self._get(call, container_name)
+            if container.state != NerdContainerState.running:
+                self._run(container)
+
+    def stop_and_wait_container(self, container_name: str) -> None:
+        self._begin("stop_and_wait_container", container_name)
+        with self._lock:
+            container = self.containers.get(container_name)
+            if container is not None and container.state == NerdContainerState.running:
+                container.state = NerdContainerState.stopped
+                container.pid = 0
+
+    def stop_containers(self, container_names: list[str], timeout: float = 10) -> list[str]:
+        """
+        所有容器同时收到 SIGTERM，这次调用耗时为它们中最大的 stop_seconds（不超过 timeout）。
+        对某个容器名注入的 "stop_containers" 失败让该容器继续运行，不指定容器名的失败让整个调用失败。
+        """
+        call = self._begin("stop_containers", None)
+        call.target = ",".join(container_names)
+        with self._lock:
+            targets = [
+                c for c in (self.containers.get(name) for name in container_names)
+                if c is not None and c.state == NerdContainerState.running
+            ]
+            stop_seconds = [timeout if c.stop_seconds is None else c.stop_seconds for c in targets]
+        wait = min(max(stop_seconds, default=0.0), timeout)
+        if wait:
+            time.sleep(wait)
+        killed = []
+        with self._lock:
+            for container, seconds in zip(targets, stop_seconds):
+                if self._match_failure("stop_containers", container.name) is not None:
+                    continue
+                if seconds >= timeout:
+                    killed.append(container.name)
+                container.state = NerdContainerState.stopped
+                container.pid = 0
+        return killed
+
+    def force_delete_container(self, container_name: str) -> None:
+        self.stop_and_wait_container(container_name)
+        call = self._begin("force_delete_container", container_name)
+        with self._lock:
+            self._get(call, container_name)
+            del self.containers[container_name]
+
+    def rename_container(self, old_name: str, new_name: str) -> None:
+        call = self._begin("rename_container", old_name)
+        with self._lock:
+            container = self._get(call, old_name)
+            if new_name in self.containers:
+                raise self._error(call, f"name {new_name} is already used")
+            del self.containers[old_name]
+            container.name = new_name
+            self.containers[new_name] = container
+
+    def execute_any_command_safely(self, command_args: list) -> Optional[int]:
+        """只模拟 nerdctl exec：容器没有运行时返回 1，其余命令只记录、返回 0。"""
+        call = self._begin("execute_any_command_safely", " ".join(map(str, command_args)))
+        if command_args[:2] == ["nerdctl", "exec"]:
+            target = next((arg for arg in command_args[2:] if not str(arg).startswith("-")), None)
+            with self._lock:
+                container = self.containers.get(target) if target else None
+                if container is None or container.state != NerdContainerState.running:
+                    call.error = f"container {target} is not running"
+                    return 1
+        return 0
+
+    def get_container_pid(self, container_name: str) -> str:
+        call = self._begin("get_container_pid", container_name)
+        with self._lock:
+            return str(self._get(call, container_name).pid)
+
+    def get_image_id(self, image: str) -> Optional[str]:
+        try:
+            self._begin("get_image_id", image)
+        except subprocess.CalledProcessError:
+            return None
+        with self._lock:
+            return self.images.get(image)
+
+    def compose_create_container(self, compose_dict: dict[str, Any]) -> None:
+        self._compose_up(compose_dict, get_compose_project_name(compose_dict["services"]))
+
+    def _compose_up(self, compose_dict: dict[str, Any], project_name: str) -> None:
+        # 与真实后端一样序列化 compose 文件，使基准测试包含这部分开销
+        yaml_dumps(compose_dict)
+        services = compose_dict["services"].values()
+        call = self._begin("compose_create_container", ",".join(s["container_name"] for s in services))
+        with self._lock:
+            # 同一个容器总是使用同一个 compose 项目，项目自己创建的容器会被重新创建；
+            # 同名容器属于其他项目或不是由 compose 创建时，nerdctl 会拒绝创建
+            for service in services:
+                existing = self.containers.get(service["container_name"])
+                if existing is not None and existing.project != project_name:
+                    raise self._error(call, f"name {service['container_name']} is already used")
+            for service in services:
+                container = SimulatedContainer(service["container_name"], service["image"], project=project_name)
+                self._pull(service["image"])
+                self._run(container)
+                self.containers[container.name] = container
+
+    def compose_create_container_safe(
+        self, compose_dict: dict[str, Any], project_name: Optional[str] = None
+    ) -> int:
+        if project_name is None:
+            project_name = get_compose_project_name(compose_dict["services"])
+        try:
+            self._compose_up(compose_dict, sanitize_compose_project_name(project_name))
+        except subprocess.CalledProcessError as e:
+            return e.returncode
+        return 0
@@ -1,2 +1,4 @@
 from .NerdClient import NerdClient
 from .NerdContainer import NerdContainerState
+from .AsyncNerdClient import AsyncNerdClient
+from .SimulatedNerdClient import SimulatedNerdClient
@@ -6,6 +6,10 @@ from typing import Dict, Optional
 
 from mbctl.network.yggdrasil_addr import get_host_yggdrasil_address_and_subnet
 from .NerdClient.NerdClient import NerdClient
+from .MBContainerConfCache import MBContainerConfCache
+from .MBContainerFingerprint import MBContainerFingerprintStore
+from .MBAddressIndex import MBAddressIndex
+from .MBMountSourceIndex import MBMountSourceIndex
 from mbctl.MBContainer import MBContainer, MBContainerTree
 from mbctl.datatypes import MountType
 from mbctl.MBConfig import mb_config
@@ -30,9 +34,13 @@ class MBHost:
 
         self.config_base_dir = join(mb_config.storage_path, MountType.conf.value)
         os.makedirs(self.config_base_dir, exist_ok=True)
+        self.conf_cache = MBContainerConfCache(enabled=mb_config.conf_cache)
+        self.fingerprints = MBContainerFingerprintStore()
 
         self._containers_by_name: Dict[str, MBContainer] = {}
         self._container_tree: MBContainerTree
+        self.address_index: MBAddressIndex
+        self.mount_sources: MBMountSourceIndex
         self._reload_and_resolve_containers()
 
     def get_container_confdir(self, container_name: str) -> str:
@@ -44,11 +52,28 @@ class MBHost:
     from .mbhost_get_and_resolve_containers import (
         _discover_container_names,
         _ensure_container_loaded,
+        _load_container_conf,
         _load_container_from_disk,
         _reload_and_resolve_containers,
+        reload_container,
+        unload_container,
+    )
+
+    from .mbhost_apply_container import (
+        apply_containers,
+        get_apply_targets,
+    )
+
+    from .mbhost_compose_project import (
+        compose_up_project,
+        get_project_containers,
+        to_compose_project,
     )
 
     from .mbhost_create_container import (
+        _create_container,
+        _record_fingerprint,
+        _store_fingerprint,
         build_new_container,
         build_all_containers,
         create_container_from_conf,
@@ -58,6 +83,18 @@ class MBHost:
         get_container_status,
         get_mbcontainer_conf,
         get_mbcontainer,
+        refresh_container_statuses,
+    )
+    from .mbhost_list_container import (
+        list_all_mbcontainer_names,
+        list_containers,
+        list_container_summaries,
+        whois,
+    )
+    from .mbhost_prepare_mounts import (
+        plan_container_mounts,
+        prepare_container_mounts,
     )
-    from .mbhost_list_container import list_all_mbcontainer_names, list_containers
     from .mbhost_remove_container import remove_container_mounts
+    from .mbhost_snapshot_container import snapshot_container_mounts
+    from .mbhost_stop_container import get_stop_batches, stop_containers
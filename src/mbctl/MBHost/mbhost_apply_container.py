@@ -0,0 +1,111 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Optional
+if TYPE_CHECKING:
+    from . import MBHost
+from mbctl.MBContainer import MBContainer
+from .MBContainerApplyResult import MBContainerApplyAction, MBContainerApplyResult
+from .MBContainerFingerprint import compute_fingerprint
+from .NerdClient import NerdContainerState
+
+import time
+
+
+def get_apply_targets(
+    self: MBHost,
+    container_name: Optional[str] = None,
+    with_deps: bool = False,
+    with_dependents: bool = False,
+) -> list[MBContainer]:
+    """
+    container_name 为 None 时返回所有容器；否则返回该容器，
+    with_deps 时加上它（传递地）require 的容器，with_dependents 时加上（传递地）依赖它的容器。依赖在前。
+    """
+    if container_name is None:
+        return list(self._container_tree.bfs_traversal())
+    self._ensure_container_loaded(container_name)
+    names = {container_name}
+    if with_deps:
+        names.update(c.name for c in self._container_tree.dependency_closure(container_name))
+    if with_dependents:
+        names.update(c.name for c in self._container_tree.dependents_closure(container_name))
+    return [c for c in self._container_tree.bfs_traversal() if c.name in names]
+
+
+def _apply_container(
+    self: MBHost,
+    container: MBContainer,
+    nerd_states: dict[str, NerdContainerState],
+    image_ids: dict[str, Optional[str]],
+) -> MBContainerApplyAction:
+    nerd_state = nerd_states.get(container.name)
+    if nerd_state is None:
+        nerd_state = self.client.get_container_state(container.name)
+    # compose 文档只渲染一次，既用于比较指纹，也用于创建容器
+    compose_dict = container.to_compose_dict()
+
+    if nerd_state == NerdContainerState.not_exist:
+        action = MBContainerApplyAction.created
+    else:
+        if container.image not in image_ids:
+            image_ids[container.image] = self.client.get_image_id(container.image)
+        fingerprint = compute_fingerprint(compose_dict, image_ids[container.image])
+        if self.fingerprints.get(container.name) == fingerprint:
+            return MBContainerApplyAction.unchanged
+        # 没有指纹记录的容器（比如在记录指纹之前创建的）无法确认配置未变，同样重建。
+        self.client.force_delete_container(container.name)
+        action = MBContainerApplyAction.recreated
+
+    self._create_container(container, compose_dict)
+    container.status = self.get_container_status(container.name)
+    return action
+
+
+def apply_containers(
+    self: MBHost,
+    container_name: Optional[str] = None,
+    with_deps: bool = False,
+    with_dependents: bool = False,
+    on_result: Optional[Callable[[MBContainerApplyResult], None]] = None,
+) -> list[MBContainerApplyResult]:
+    """
+    按依赖顺序处理目标容器：不存在的容器被创建，指纹改变的容器被删除后重建，指纹未变的容器不做任何操作。
+    某个容器失败时，目标中（传递地）依赖它的容器被取消。
+    """
+    targets = self.get_apply_targets(container_name, with_deps, with_dependents)
+    nerd_states = self.client.get_all_container_states() if targets else {}
+    image_ids: dict[str, Optional[str]] = {}
+    # 失败或被取消的容器名 -> 最初失败的那个容器名
+    failed: dict[str, str] = {}
+    results: list[MBContainerApplyResult] = []
+
+    for container in targets:
+        failed_dependency = next(
+            (failed[r] for r in sorted(container.require) if r in failed), None
+        )
+        if failed_dependency is not None:
+            failed[container.name] = failed_dependency
+            result = MBContainerApplyResult(
+                container.name,
+                MBContainerApplyAction.cancelled,
+                failed_dependency=failed_dependency,
+            )
+        else:
+            start = time.perf_counter()
+            try:
+                action = _apply_container(self, container, nerd_states, image_ids)
+            except Exception as e:
+                failed[container.name] = container.name
+                result = MBContainerApplyResult(
+                    container.name,
+                    MBContainerApplyAction.failed,
+                    time.perf_counter() - start,
+                    error=e,
+                )
+            else:
+                result = MBContainerApplyResult(
+                    container.name, action, time.perf_counter() - start
+                )
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
@@ -0,0 +1,79 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Optional
+if TYPE_CHECKING:
+    from . import MBHost
+from mbctl.MBContainer import MBContainer
+from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
+from mbctl.datatypes import ComposeConf
+
+
+# 把一组容器合并成一个 compose 项目，用一次 nerdctl compose up -d 创建全部容器，由 nerdctl 自己按 depends_on 并行。
+# 已经存在的容器属于它们自己的 compose 项目（run、apply 或另一次 up 创建的），nerdctl 不允许另一个项目创建同名容器，
+# 所以合并的项目只包含尚不存在的容器；已存在但停止的依赖在 compose up 之前单独启动。
+def get_project_containers(
+    self: MBHost, container_name: Optional[str] = None
+) -> list[MBContainer]:
+    """container_name 为 None 时返回所有容器，否则返回该容器及其依赖闭包。依赖在前。"""
+    if container_name is None:
+        return list(self._container_tree.bfs_traversal())
+    self._ensure_container_loaded(container_name)
+    return self._container_tree.dependency_closure(container_name)
+
+
+def _with_depends_on(
+    container: MBContainer, compose_dict: dict[str, Any], services: set[str]
+) -> dict[str, Any]:
+    # 不修改 compose_dict 本身，它同时用于计算单个容器的指纹。
+    # depends_on 只能引用同一个 compose 文档中的服务，项目外（已存在）的依赖由调用者在 compose up 之前启动。
+    depends_on = sorted(name for name in container.require if name in services)
+    if not depends_on:
+        return compose_dict
+    service = {**compose_dict["services"][container.name], "depends_on": depends_on}
+    return {**compose_dict, "services": {container.name: service}}
+
+
+def _merge_compose_dicts(
+    containers: list[MBContainer], compose_dicts: list[dict[str, Any]]
+) -> dict[str, Any]:
+    services = {container.name for container in containers}
+    return ComposeConf.merge_compose_dicts(
+        _with_depends_on(container, compose_dict, services)
+        for container, compose_dict in zip(containers, compose_dicts)
+    )
+
+
+def to_compose_project(
+    self: MBHost, container_name: Optional[str] = None
+) -> dict[str, Any]:
+    """生成包含多个服务的 compose 文档，require 转换为 depends_on。"""
+    containers = self.get_project_containers(container_name)
+    return _merge_compose_dicts(containers, [c.to_compose_dict() for c in containers])
+
+
+def compose_up_project(
+    self: MBHost, container_name: Optional[str] = None
+) -> list[str]:
+    """
+    启动已存在但停止的容器，准备其余容器的挂载点，然后用一次 compose up 创建所有尚不存在的容器。
+    容器是否存在以一次 nerdctl ps -a 快照为准，快照中没有的容器单独查询。返回项目范围内的所有容器名。
+    """
+    containers = self.get_project_containers(container_name)
+    nerd_states = self.client.get_all_container_states()
+    missing: list[MBContainer] = []
+    for container in containers:
+        nerd_state = nerd_states.get(container.name)
+        if nerd_state is None:
+            nerd_state = self.client.get_container_state(container.name)
+        if nerd_state == NerdContainerState.not_exist:
+            missing.append(container)
+        elif nerd_state == NerdContainerState.stopped:
+            # containers 中依赖在前，所以依赖先于依赖它的容器启动
+            self.client.start_container(container.name)
+    if missing:
+        self.prepare_container_mounts(missing)
+        compose_dicts = [container.to_compose_dict() for container in missing]
+        self.client.compose_create_container(_merge_compose_dicts(missing, compose_dicts))
+        # 指纹按单个容器渲染出的 compose 文档计算，与 build_new_container 记录的一致。
+        for container, compose_dict in zip(missing, compose_dicts):
+            self._record_fingerprint(container, compose_dict)
+    return [container.name for container in containers]
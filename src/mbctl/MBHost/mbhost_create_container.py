@@ -1,11 +1,18 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Optional
 if TYPE_CHECKING:
     from . import MBHost
 from mbctl.MBContainer import MBContainer, MBContainerMount, MBContainerMountEntry
 from mbctl.datatypes import MBContainerConf
+from .MBContainerFingerprint import compute_fingerprint
+from .MBMountPrep import prepare_mounts
+from .MBContainerBuildResult import MBContainerBuildResult, MBContainerBuildState
 
+from collections import deque
+from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import os
+import time
 
 def create_container_from_conf(
     self: MBHost, container_name: str, container_conf: MBContainerConf
@@ -15,8 +22,8 @@ def create_container_from_conf(
     # realize the path's parent directory
     os.makedirs(os.path.dirname(container_conf_path), exist_ok=True)
     container_conf.to_yaml_file(container_conf_path)
-    # reload cache to include the new container and keep references resolved
-    self._reload_and_resolve_containers()
+    # 只增量加载这一个容器，并重新解析依赖它的容器
+    self.reload_container(container_name)
 
 
 # 将一个MBContainer配置第一次运行起来成为一个container，是程序的主要功能。
@@ -24,42 +31,119 @@ def build_new_container(self: MBHost, container_name: str) -> None:
     # 1. 读取容器配置
     container = self.get_mbcontainer(container_name)
 
+    self._create_container(container, container.to_compose_dict())
+
+
+# compose_dict 只渲染一次，同时用于写入 compose 文件和计算指纹。
+def _create_container(
+    self: MBHost, container: MBContainer, compose_dict: dict[str, Any]
+) -> None:
     # 2. 创建挂载目录
-    for mount_entry in container.mount.mount_points:
-        prepare_mount_entry(mount_entry)
+    prepare_mounts(container.mount.mount_points)
     # 3. 使用nerdctl创建容器
-    self.client.compose_create_container(container.to_compose_conf())
+    self.client.compose_create_container(compose_dict)
+    # 4. 记录容器指纹
+    self._record_fingerprint(container, compose_dict)
 
-def build_all_containers(self: MBHost) -> None:
-    """Build all containers defined in the MBHost's container tree."""
-    for container in self._container_tree.bfs_traversal():
-        self.build_new_container(container.name)
 
-def realize_dir_mount_conf(
-    mount_dir: str, uid: int = 0, gid: int = 0, perm: str = "755"
+# 镜像可能是 compose up 时才拉取的，所以要在创建容器之后再查询镜像 ID。
+def _record_fingerprint(
+    self: MBHost, container: MBContainer, compose_dict: Optional[dict[str, Any]] = None
 ) -> None:
-    """Create mount directory with specified owner and permission."""
+    if compose_dict is None:
+        compose_dict = container.to_compose_dict()
+    self._store_fingerprint(container, compose_dict, self.client.get_image_id(container.image))
 
-    os.makedirs(mount_dir, exist_ok=True)
-    os.chown(mount_dir, uid, gid)
-    os.chmod(mount_dir, int(perm, 8))
 
+# 同步和 asyncio 两条创建路径共用：它们只是查询镜像 ID 的方式不同。
+def _store_fingerprint(
+    self: MBHost, container: MBContainer, compose_dict: dict[str, Any], image_id: Optional[str]
+) -> None:
+    self.fingerprints.record(
+        container.name, compute_fingerprint(compose_dict, image_id), image_id
+    )
 
-# 对一个挂载点进行准备工作（创建目录或检查文件存在性）
-def prepare_mount_entry(mount_entry: MBContainerMountEntry) -> None:
-    if not mount_entry.file:  # 只创建目录挂载点，跳过文件挂载点。
-        # 为什么要跳过？因为自动创建文件挂载点甚至只是创建它的父目录都会引起极大的困惑。
-        realize_dir_mount_conf(
-            mount_entry.source.real_mount_source_path,
-            mount_entry.owner[0],
-            mount_entry.owner[1],
-            mount_entry.perm,
+def _build_container_timed(self: MBHost, container_name: str) -> MBContainerBuildResult:
+    start = time.perf_counter()
+    try:
+        self.build_new_container(container_name)
+    except Exception as e:
+        return MBContainerBuildResult(
+            container_name,
+            MBContainerBuildState.failed,
+            time.perf_counter() - start,
+            error=e,
         )
-    else:
-        # 如果是文件挂载点，则检查此挂载点的实际源文件是否存在，如果不存在则报错并不要创建。
-        if not os.path.exists(mount_entry.source.real_mount_source_path):
-            raise FileNotFoundError(
-                f"Mount source file {mount_entry.source} does not exist."
+    return MBContainerBuildResult(
+        container_name, MBContainerBuildState.succeeded, time.perf_counter() - start
+    )
+
+
+def build_all_containers(
+    self: MBHost,
+    jobs: int = 1,
+    on_result: Optional[Callable[[MBContainerBuildResult], None]] = None,
+) -> list[MBContainerBuildResult]:
+    """
+    Build all containers defined in the MBHost's container tree.
+
+    最多同时构建 jobs 个容器。一个容器在它 require 的所有容器构建成功后立即开始构建，而不必等待整层完成；
+    某个容器构建失败时，只取消（传递地）依赖它的容器，其他容器继续构建。
+    每得到一个结果就调用 on_result，最终按完成顺序返回所有结果。
+    """
+    containers = list(self._container_tree.bfs_traversal())
+    pending_deps: dict[str, set[str]] = {c.name: set(c.require) for c in containers}
+    dependents: dict[str, list[str]] = {
+        c.name: self._container_tree.dependents(c.name) for c in containers
+    }
+
+    results: dict[str, MBContainerBuildResult] = {}
+
+    def record(result: MBContainerBuildResult) -> None:
+        results[result.name] = result
+        if on_result is not None:
+            on_result(result)
+
+    def cancel_dependents(failed_name: str) -> None:
+        queue = deque(dependents[failed_name])
+        while queue:
+            name = queue.popleft()
+            if name in results:
+                continue
+            record(
+                MBContainerBuildResult(
+                    name, MBContainerBuildState.cancelled, failed_dependency=failed_name
+                )
             )
-        elif not os.path.isfile(mount_entry.source.real_mount_source_path):
-            raise FileNotFoundError(f"Mount source {mount_entry.source} is not a file.")
+            queue.extend(dependents[name])
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        running: dict[Future[MBContainerBuildResult], str] = {}
+
+        def submit(name: str) -> None:
+            # 在复制的上下文中构建，使 forward_command_output 等上下文设置对工作线程同样有效
+            running[pool.submit(copy_context().run, _build_container_timed, self, name)] = name
+
+        for container in containers:
+            if not pending_deps[container.name]:
+                submit(container.name)
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                record(result)
+                if result.state != MBContainerBuildState.succeeded:
+                    cancel_dependents(name)
+                    continue
+                for dependent_name in dependents[name]:
+                    pending_deps[dependent_name].discard(name)
+                    if not pending_deps[dependent_name] and dependent_name not in results:
+                        submit(dependent_name)
+
+    return list(results.values())
+
+# 对一个挂载点进行准备工作（创建目录或检查文件存在性）
+def prepare_mount_entry(mount_entry: MBContainerMountEntry) -> None:
+    prepare_mounts([mount_entry])
@@ -1,22 +1,43 @@
 from __future__ import annotations
 
 import os
+from collections import deque
 from posixpath import join
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Mapping, Optional
 
 from mbctl.MBContainer import MBContainer, MBContainerTree
+from mbctl.MBProfile import profiled
 from mbctl.datatypes import MBContainerConf
+from mbctl.network.ygg_address_deriver import get_ygg_address_deriver
+from .MBAddressIndex import MBAddressIndex
+from .MBMountSourceIndex import MBMountSourceIndex
+from .NerdClient import NerdContainerState
+from .mbhost_get_container import nerd_state_to_mbcontainer_status
 
 if TYPE_CHECKING:  # pragma: no cover - for type hints only
     from . import MBHost
 
 
-# 从磁盘读取一个容器配置并构造 MBContainer
-def _load_container_from_disk(self: MBHost, container_name: str) -> MBContainer:
-    container_conf = MBContainerConf.from_yaml_file(
-        self.get_container_conffile_path(container_name)
+# 读取容器配置文件，未改变的配置直接从缓存读取。
+def _load_container_conf(self: MBHost, container_name: str) -> MBContainerConf:
+    return self.conf_cache.load(
+        container_name, self.get_container_conffile_path(container_name)
     )
-    container_status = self.get_container_status(container_name)
+
+
+# 从磁盘读取一个容器配置并构造 MBContainer
+# nerd_states 是一次 nerdctl ps -a 得到的状态快照，快照中没有的容器才单独 inspect。
+def _load_container_from_disk(
+    self: MBHost,
+    container_name: str,
+    nerd_states: Optional[Mapping[str, NerdContainerState]] = None,
+) -> MBContainer:
+    container_conf = _load_container_conf(self, container_name)
+    nerd_state = (nerd_states or {}).get(container_name)
+    if nerd_state is not None:
+        container_status = nerd_state_to_mbcontainer_status(nerd_state)
+    else:
+        container_status = self.get_container_status(container_name)
     return MBContainer(container_name, container_conf, self.yggprefix, container_status)
 
 
@@ -30,16 +51,89 @@ def _discover_container_names(self: MBHost) -> list[str]:
 
 
 # 重新加载并解析所有容器
+@profiled("MBHost.reload_and_resolve_containers")
 def _reload_and_resolve_containers(self: MBHost) -> None:
+    container_names = _discover_container_names(self)
+    # 没有容器时不必调用 nerdctl。
+    nerd_states = self.client.get_all_container_states() if container_names else {}
     containers = [
-        _load_container_from_disk(self, name) for name in _discover_container_names(self)
+        _load_container_from_disk(self, name, nerd_states) for name in container_names
     ]
     self._container_tree = MBContainerTree(containers)
     self._container_tree.resolve_all()
     self._containers_by_name = {c.name: c for c in containers}
+    self.address_index = MBAddressIndex.build(get_ygg_address_deriver(self.yggprefix), containers)
+    self.mount_sources = MBMountSourceIndex.build(containers)
+    self.conf_cache.prune(container_names)
+
+
+def _load_missing_dependency_closure(self: MBHost, container_name: str) -> dict[str, MBContainer]:
+    # 用显式的栈找出 container_name 以及它（传递地）require 的、尚未加载但配置文件存在的容器，依赖链再长也不会递归。
+    loaded: dict[str, MBContainer] = {}
+    stack = [container_name]
+    while stack:
+        name = stack.pop()
+        if name in loaded:
+            continue
+        container = _load_container_from_disk(self, name)
+        loaded[name] = container
+        for dep_name in container.require:
+            if (
+                dep_name not in self._containers_by_name
+                and dep_name not in loaded
+                and os.path.isfile(self.get_container_conffile_path(dep_name))
+            ):
+                stack.append(dep_name)
+    return loaded
+
+
+def _dependency_order(loaded: Mapping[str, MBContainer]) -> list[MBContainer]:
+    # 在新加载的容器之间做 Kahn 排序，依赖在前。构成环的容器排在最后，由 upsert 报告错误。
+    in_degree = {name: len(set(c.require) & loaded.keys() - {name}) for name, c in loaded.items()}
+    dependents: dict[str, list[str]] = {name: [] for name in loaded}
+    for name, container in loaded.items():
+        for dep_name in set(container.require) & loaded.keys() - {name}:
+            dependents[dep_name].append(name)
+    ready = deque(name for name, degree in in_degree.items() if degree == 0)
+    ordered: list[MBContainer] = []
+    while ready:
+        name = ready.popleft()
+        ordered.append(loaded[name])
+        for dependent in dependents[name]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                ready.append(dependent)
+    ordered += [c for c in loaded.values() if in_degree[c.name] > 0]
+    return ordered
+
+
+def reload_container(self: MBHost, container_name: str) -> MBContainer:
+    """
+    增量加载一个新增或修改过的容器：只读取这一个容器的配置和状态，将其加入（或替换进）已有的依赖树，
+    并重新解析它以及所有（传递地）依赖它的容器。其他容器保持不变。
+    若它 require 的容器尚未加载但配置文件存在，会先按依赖顺序加载这些容器。
+    """
+    for container in _dependency_order(_load_missing_dependency_closure(self, container_name)):
+        affected = self._container_tree.upsert(container)
+        self._containers_by_name[container.name] = container
+        self.address_index.add_container(container)
+        # 依赖它的容器被重新解析，引用挂载点的真实挂载源可能改变
+        for affected_container in affected:
+            self.mount_sources.add_container(affected_container)
+    return self._containers_by_name[container_name]
+
+
+def unload_container(self: MBHost, container_name: str) -> None:
+    """从已加载的模型中移除一个容器（例如它的配置文件已被删除）。被其他容器依赖时抛出 ValueError。"""
+    self._container_tree.remove(container_name)
+    del self._containers_by_name[container_name]
+    self.address_index.remove_container(container_name)
+    self.mount_sources.remove_container(container_name)
 
 
 # 确保缓存包含指定容器（用于延迟加载新增容器）
 def _ensure_container_loaded(self: MBHost, container_name: str) -> None:
-    if container_name not in self._containers_by_name:
-        _reload_and_resolve_containers(self)
+    if container_name not in self._containers_by_name and os.path.isfile(
+        self.get_container_conffile_path(container_name)
+    ):
+        reload_container(self, container_name)
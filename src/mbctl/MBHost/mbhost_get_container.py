@@ -2,7 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from . import MBHost
-from typing import Optional
+from typing import Mapping, Optional
 from mbctl.datatypes import MBContainerConf
 from mbctl.datatypes import MountType
 from mbctl.MBConfig import mb_config
@@ -11,11 +11,9 @@ from .NerdClient import NerdClient, NerdContainerState
 import os
 
 
-# 这里的所有函数，都不检查 container_name 的合法性，调用者必须保证传入的 container_name 对应着真正的MBContainer。
-def get_container_status(self: MBHost, container_name: str) -> MBContainerStatus:
-    """获得容器当前状态。"""
-    nerd_container_state = self.client.get_container_state(container_name)
-
+def nerd_state_to_mbcontainer_status(
+    nerd_container_state: NerdContainerState,
+) -> MBContainerStatus:
     if nerd_container_state == NerdContainerState.not_exist:
         return MBContainerStatus.never
     elif nerd_container_state == NerdContainerState.running:
@@ -26,11 +24,35 @@ def get_container_status(self: MBHost, container_name: str) -> MBContainerStatus
         return MBContainerStatus.unknown
 
 
+# 这里的所有函数，都不检查 container_name 的合法性，调用者必须保证传入的 container_name 对应着真正的MBContainer。
+def get_container_status(self: MBHost, container_name: str) -> MBContainerStatus:
+    """获得容器当前状态。"""
+    return nerd_state_to_mbcontainer_status(
+        self.client.get_container_state(container_name)
+    )
+
+
+def refresh_container_statuses(
+    self: MBHost, nerd_states: Optional[Mapping[str, NerdContainerState]] = None
+) -> None:
+    """
+    用一次 nerdctl ps -a 快照刷新所有已加载容器的状态，快照中没有的容器单独查询。
+    nerd_states 是调用者事先取得的快照，为 None 时在这里执行 nerdctl ps -a。
+    """
+    if nerd_states is None:
+        nerd_states = self.client.get_all_container_states() if self._containers_by_name else {}
+    for container_name, container in self._containers_by_name.items():
+        nerd_state = nerd_states.get(container_name)
+        if nerd_state is not None:
+            container.status = nerd_state_to_mbcontainer_status(nerd_state)
+        else:
+            container.status = self.get_container_status(container_name)
+
+
 def get_mbcontainer_conf(self: MBHost, container_name: str) -> MBContainerConf:
     """根据缓存或配置文件获得一个MBContainerConf对象。"""
     self._ensure_container_loaded(container_name)
-    container_conf_path = self.get_container_conffile_path(container_name)
-    return MBContainerConf.from_yaml_file(container_conf_path)
+    return self._load_container_conf(container_name)
 
 
 def get_mbcontainer(self: MBHost, container_name: str) -> MBContainer:
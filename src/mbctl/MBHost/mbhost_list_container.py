@@ -2,9 +2,8 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from . import MBHost
+from typing import Any
 from mbctl.MBContainer import MBContainer
-from prettytable import PrettyTable, TableStyle
-import os
 
 def list_all_mbcontainer_names(self: MBHost) -> list[str]:
     """List all container names on this host."""
@@ -14,3 +13,20 @@ def list_containers(self: MBHost) -> list[MBContainer]:
     """List all containers on this host."""
         # 列出所有的容器，并整理他们的状态，打印他们的名字、镜像、运行状态以及ygg地址。
     return list(self._containers_by_name.values())
+
+def list_container_summaries(self: MBHost) -> list[dict[str, Any]]:
+    """以可以直接序列化为 JSON 的形式列出所有容器的名字、镜像、运行状态、自启动以及ygg地址。"""
+    return [
+        {
+            "name": container.name,
+            "image": container.image,
+            "status": container.status.value,
+            "autostart": container.autostart,
+            "yggdrasil_addr": container.yggdrasil_addr,
+        }
+        for container in self._containers_by_name.values()
+    ]
+
+def whois(self: MBHost, address: str) -> list[dict[str, Any]]:
+    """反查 Yggdrasil 地址对应的容器名或 local_access、dns 中引用的名字。地址无效时抛出 ValueError。"""
+    return self.address_index.lookup(address)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Iterable, Optional
+if TYPE_CHECKING:
+    from . import MBHost
+from mbctl.MBContainer import MBContainer, MBContainerMountEntry
+from .MBMountPrep import MBMountPlan, plan_mounts, prepare_mounts
+
+# 同时检查或准备多少个挂载源路径。大部分时间花在 stat 等待存储上，所以线程数可以比 CPU 数多。
+DEFAULT_MOUNT_JOBS = 16
+
+
+def _mount_entries(containers: Iterable[MBContainer]) -> list[MBContainerMountEntry]:
+    return [entry for container in containers for entry in container.mount.mount_points]
+
+
+def _containers_or_all(
+    self: MBHost, containers: Optional[Iterable[MBContainer]]
+) -> Iterable[MBContainer]:
+    return containers if containers is not None else self._container_tree.bfs_traversal()
+
+
+def plan_container_mounts(
+    self: MBHost,
+    containers: Optional[Iterable[MBContainer]] = None,
+    jobs: int = DEFAULT_MOUNT_JOBS,
+) -> MBMountPlan:
+    """列出准备这些容器（默认所有容器）的挂载点需要执行的操作，不修改文件系统。"""
+    return plan_mounts(_mount_entries(_containers_or_all(self, containers)), jobs)
+
+
+def prepare_container_mounts(
+    self: MBHost,
+    containers: Optional[Iterable[MBContainer]] = None,
+    jobs: int = DEFAULT_MOUNT_JOBS,
+) -> MBMountPlan:
+    """并行地准备这些容器（默认所有容器）的挂载点，返回实际执行的操作。"""
+    return prepare_mounts(_mount_entries(_containers_or_all(self, containers)), jobs)
@@ -11,15 +11,21 @@ from mbctl.MBContainer.MBContainerMount import (
     MBContainerMountEntry,
     get_mount_point_src,
 )
-from shutil import rmtree
+from .MBMountBackend import get_mount_backend, get_mount_root
+from .MBTrash import MBTrash
 
 
 def remove_container_mounts(
     self: MBHost,
     container_name: str,
     target_mount_type: Optional[list[MountType]] = None,
-) -> None:
-    """Remove mount directories of specified types for a container."""
+) -> list[str]:
+    """
+    Remove mount directories of specified types for a container.
+    目录被原子地移动到回收站，返回回收站中的条目名，由回收进程或 mbctl gc --trash 真正删除。
+    使用 btrfs 挂载后端时，位于容器自己的挂载根子卷中的挂载点随整个子卷一起被删除，不经过回收站。
+    挂载源仍被其他容器使用时抛出 RuntimeError，不删除任何挂载点。
+    """
     if target_mount_type is None:
         # 默认删除所有类型的挂载点
         target_mount_type = [
@@ -37,10 +43,48 @@ def remove_container_mounts(
             f"Cannot remove mount points for running container '{container_name}'. Please stop it first."
         )
     else:
-        for mount_entry in target_container.mount.mount_points:
-            if mount_entry.type in target_mount_type:
-                if not mount_entry.file:
-                    if os.path.exists(mount_entry.source.real_mount_source_path):
-                        rmtree(mount_entry.source.real_mount_source_path)
-                else:
-                    os.remove(mount_entry.source.real_mount_source_path)
+        # 引用其他容器的挂载点不属于这个容器，不删除；仍被其他容器挂载的目录拒绝删除。
+        mount_entries = [
+            mount_entry
+            for mount_entry in target_container.mount.mount_points
+            if mount_entry.type in target_mount_type and not mount_entry.source.is_reference
+        ]
+        in_use = {
+            mount_entry.source.real_mount_source_path: users
+            for mount_entry in mount_entries
+            if (
+                users := self.mount_sources.other_users(
+                    mount_entry.source.real_mount_source_path, container_name
+                )
+            )
+        }
+        if in_use:
+            details = "; ".join(f"{src} is mounted by {', '.join(users)}" for src, users in in_use.items())
+            raise RuntimeError(
+                f"Cannot remove mount points of container '{container_name}' that other containers still use: {details}."
+            )
+
+        trash = MBTrash()
+        backend = get_mount_backend()
+        trashed: list[str] = []
+        deleted_roots: set[str] = set()
+        for mount_entry in mount_entries:
+            mount_root = get_mount_root(mount_entry.source.real_mount_source_path)
+            own_root = get_mount_root(get_mount_point_src(container_name, mount_entry.type))
+            if mount_root is not None and mount_root == own_root:
+                if mount_root in deleted_roots:
+                    continue
+                if backend.is_subvolume(mount_root):
+                    backend.delete_root(mount_root)
+                    deleted_roots.add(mount_root)
+                    continue
+            if not mount_entry.file:
+                entry_name = trash.move_to_trash(
+                    mount_entry.source.real_mount_source_path,
+                    f"{container_name}-{mount_entry.type.value}",
+                )
+                if entry_name is not None:
+                    trashed.append(entry_name)
+            else:
+                os.remove(mount_entry.source.real_mount_source_path)
+        return trashed
@@ -0,0 +1,40 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+if TYPE_CHECKING:
+    from . import MBHost
+from posixpath import join
+import time
+from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import get_mount_point_src
+from mbctl.datatypes import MountType
+from .MBMountBackend import SUBVOLUME_MOUNT_TYPES, get_mount_backend, get_mount_root
+
+SNAPSHOT_DIR_NAME = ".snapshots"
+
+
+def snapshot_container_mounts(
+    self: MBHost, container_name: str, dest_dir: Optional[str] = None, readonly: bool = True
+) -> list[str]:
+    """
+    为容器每个是 btrfs 子卷的挂载根目录创建快照，默认是只读的，返回快照路径。
+    快照默认保存在 storage_path/.snapshots/<容器名>/<时间戳>/<挂载类型>，供备份与克隆使用。
+    """
+    self._ensure_container_loaded(container_name)
+    backend = get_mount_backend()
+    if dest_dir is None:
+        dest_dir = join(
+            mb_config.storage_path,
+            SNAPSHOT_DIR_NAME,
+            container_name,
+            time.strftime("%Y%m%dT%H%M%S"),
+        )
+    snapshots: list[str] = []
+    for mount_type in MountType:
+        if mount_type.value not in SUBVOLUME_MOUNT_TYPES:
+            continue
+        mount_root = get_mount_root(get_mount_point_src(container_name, mount_type))
+        if mount_root is not None and backend.is_subvolume(mount_root):
+            snapshot_path = join(dest_dir, mount_type.value)
+            backend.snapshot(mount_root, snapshot_path, readonly=readonly)
+            snapshots.append(snapshot_path)
+    return snapshots
@@ -0,0 +1,114 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
+if TYPE_CHECKING:
+    from . import MBHost
+from mbctl.MBContainer import MBContainer
+from mbctl.MBProfile import span
+from .MBContainerStopResult import MBContainerStopResult, MBContainerStopState
+from .mbhost_get_container import nerd_state_to_mbcontainer_status
+from .NerdClient import NerdContainerState
+
+import time
+
+
+def get_stop_batches(
+    self: MBHost,
+    container_names: Optional[Sequence[str]] = None,
+    with_dependents: bool = False,
+) -> list[list[MBContainer]]:
+    """
+    按停止顺序返回分批的目标容器：依赖树从根到叶子的每一层是一批，所以依赖者总是先于它 require 的容器停止。
+    container_names 为 None 时返回所有容器；否则返回这些容器，with_dependents 时加上（传递地）依赖它们的容器。
+    未知的容器名抛出 KeyError。
+    """
+    names: Optional[set[str]] = None
+    if container_names is not None:
+        names = set()
+        for container_name in container_names:
+            names.add(self.get_mbcontainer(container_name).name)
+            if with_dependents:
+                names.update(c.name for c in self._container_tree.dependents_closure(container_name))
+    batches = []
+    for level in reversed(self._container_tree.levels()):
+        batch = [c for c in level if names is None or c.name in names]
+        if batch:
+            batches.append(batch)
+    return batches
+
+
+def stop_containers(
+    self: MBHost,
+    container_names: Optional[Sequence[str]] = None,
+    with_dependents: bool = False,
+    timeout: float = 10,
+    on_result: Optional[Callable[[MBContainerStopResult], None]] = None,
+) -> list[MBContainerStopResult]:
+    """
+    逐批停止目标容器（见 get_stop_batches）。每一批中正在运行的容器通过一次 client.stop_containers 同时停止，
+    共用 timeout 秒的超时，所以总耗时约为各批中最慢的容器的停止时间之和，而不是所有容器停止时间之和。
+    某个容器没能停止时，它（传递地）require 的容器不会被停止，结果为 cancelled。
+    """
+    batches = self.get_stop_batches(container_names, with_dependents)
+    nerd_states = self.client.get_all_container_states() if batches else {}
+    # 没能停止或被取消的容器 require 的容器名 -> 最初没能停止的那个容器名
+    blocked: dict[str, str] = {}
+    results: list[MBContainerStopResult] = []
+
+    def record(result: MBContainerStopResult) -> None:
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    def block_requires(container: MBContainer, failed_dependent: str) -> None:
+        for require in container.require:
+            blocked.setdefault(require, failed_dependent)
+
+    for batch in batches:
+        to_stop: list[MBContainer] = []
+        for container in batch:
+            if container.name in blocked:
+                block_requires(container, blocked[container.name])
+                record(
+                    MBContainerStopResult(
+                        container.name,
+                        MBContainerStopState.cancelled,
+                        failed_dependent=blocked[container.name],
+                    )
+                )
+                continue
+            nerd_state = nerd_states.get(container.name)
+            if nerd_state is None:
+                nerd_state = self.client.get_container_state(container.name)
+            if nerd_state == NerdContainerState.running:
+                to_stop.append(container)
+            else:
+                container.status = nerd_state_to_mbcontainer_status(nerd_state)
+                record(MBContainerStopResult(container.name, MBContainerStopState.not_running))
+        if not to_stop:
+            continue
+
+        start = time.perf_counter()
+        error: Optional[BaseException] = None
+        killed: set[str] = set()
+        with span("MBHost.stop_batch", size=len(to_stop)):
+            try:
+                killed = set(self.client.stop_containers([c.name for c in to_stop], timeout))
+            except Exception as e:
+                error = e
+            after = self.client.get_all_container_states()
+        duration = time.perf_counter() - start
+
+        for container in to_stop:
+            nerd_state = after.get(container.name)
+            if nerd_state is None:
+                nerd_state = self.client.get_container_state(container.name)
+            container.status = nerd_state_to_mbcontainer_status(nerd_state)
+            if nerd_state == NerdContainerState.running:
+                block_requires(container, container.name)
+                state = MBContainerStopState.failed
+                container_error = error or RuntimeError(f"Container '{container.name}' is still running.")
+            else:
+                state = MBContainerStopState.killed if container.name in killed else MBContainerStopState.stopped
+                container_error = None
+            record(MBContainerStopResult(container.name, state, duration, error=container_error))
+    return results
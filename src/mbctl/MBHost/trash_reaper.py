@@ -0,0 +1,19 @@
+# 后台回收进程的入口：MBTrash.start_background_reaper 以 python -m mbctl.MBHost.trash_reaper <回收站目录> 启动它。
+# 包内不导入这个模块，所以 runpy 执行它时不会因为模块已在 sys.modules 中而发出 RuntimeWarning。
+# 进程的 stdout/stderr 被重定向到 .mbctl 下的日志文件，删除失败的条目由 mb_logger 记录在那里。
+import sys
+
+from mbctl.MBHost.MBTrash import MBTrash
+from mbctl.MBLog import mb_logger
+
+
+def main() -> None:
+    trash = MBTrash(sys.argv[1] if len(sys.argv) > 1 else None)
+    report = trash.empty(wait=False)
+    if report is not None:
+        for entry in report.errors:
+            mb_logger.error(f"Failed to delete trash entry {entry.name}: {entry.error}")
+
+
+if __name__ == "__main__":
+    main()
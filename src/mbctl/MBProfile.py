@@ -0,0 +1,176 @@
+# 计时 span：记录 mbctl 各阶段（加载配置、解析依赖、渲染 compose、准备挂载点）以及每个 nerdctl / yggdrasilctl 子进程的耗时。
+# 默认关闭：span() 返回一个什么都不做的共享对象，profiled 装饰的函数只多一次全局变量检查。
+# mbctl --profile 打开后，命令结束时打印按总耗时排序的汇总，或用 --profile-output 写出 Chrome trace（chrome://tracing、Perfetto 可以打开）。
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, TypeVar
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+@dataclass
+class MBSpan:
+    name: str
+    start: float
+    duration: float = 0.0
+    thread_id: int = 0
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+class _ActiveSpan:
+    __slots__ = ("_profiler", "_span")
+
+    def __init__(self, profiler: "MBProfiler", span: MBSpan) -> None:
+        self._profiler = profiler
+        self._span = span
+
+    def set(self, **attrs: Any) -> None:
+        self._span.attrs.update(attrs)
+
+    def __enter__(self) -> "_ActiveSpan":
+        self._span.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._span.duration = time.perf_counter() - self._span.start
+        if exc_type is not None:
+            self._span.attrs["error"] = exc_type.__name__
+        self._profiler._finish(self._span)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class MBProfiler:
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.spans: list[MBSpan] = []
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs: Any) -> _ActiveSpan:
+        return _ActiveSpan(self, MBSpan(name, 0.0, thread_id=threading.get_ident(), attrs=attrs))
+
+    def _finish(self, span: MBSpan) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> list[dict[str, Any]]:
+        """按 span 名字汇总，按总耗时从大到小排序。耗时单位为秒。"""
+        groups: dict[str, list[float]] = {}
+        with self._lock:
+            for span in self.spans:
+                groups.setdefault(span.name, []).append(span.duration)
+        rows = [
+            {
+                "name": name,
+                "count": len(durations),
+                "total": sum(durations),
+                "mean": sum(durations) / len(durations),
+                "max": max(durations),
+            }
+            for name, durations in groups.items()
+        ]
+        return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+    def format_summary(self) -> str:
+        lines = [f"{'span':<48} {'count':>6} {'total ms':>10} {'mean ms':>10} {'max ms':>10}"]
+        for row in self.summary():
+            lines.append(
+                f"{row['name']:<48} {row['count']:>6} {row['total'] * 1e3:>10.2f} "
+                f"{row['mean'] * 1e3:>10.2f} {row['max'] * 1e3:>10.2f}"
+            )
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Chrome trace event 格式，每个 span 是一个 complete（"X"）事件，时间单位为微秒。"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": (span.start - self.origin) * 1e6,
+                    "dur": span.duration * 1e6,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v) for k, v in span.attrs.items()},
+                }
+                for span in sorted(spans, key=lambda s: s.start)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_chrome_trace(self, file_path: str) -> None:
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+_profiler: Optional[MBProfiler] = None
+
+
+def enable_profiling() -> MBProfiler:
+    global _profiler
+    _profiler = MBProfiler()
+    return _profiler
+
+
+def disable_profiling() -> None:
+    global _profiler
+    _profiler = None
+
+
+def get_profiler() -> Optional[MBProfiler]:
+    return _profiler
+
+
+def span(name: str, **attrs: Any) -> _ActiveSpan | _NullSpan:
+    """返回一个计时 span，用于 with 语句。未开启 profiling 时返回共享的空 span。"""
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.span(name, **attrs)
+
+
+def command_span(cmd: list[str]) -> _ActiveSpan | _NullSpan:
+    """子进程的 span，以程序名和子命令命名（例如 "exec nerdctl inspect"），完整的 argv 记录在属性中。"""
+    if _profiler is None:
+        return _NULL_SPAN
+    return _profiler.span("exec " + " ".join(cmd[:2]), argv=" ".join(cmd))
+
+
+def profiled(name: Optional[str] = None) -> Callable[[_F], _F]:
+    """把整个函数调用记录为一个 span，默认以函数的 __qualname__ 命名。"""
+
+    def decorate(fn: _F) -> _F:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _profiler is None:
+                return fn(*args, **kwargs)
+            with _profiler.span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
@@ -0,0 +1,37 @@
+# mbctl 自己的状态与缓存文件都放在 storage_path/.mbctl 下。
+import os
+import posixpath
+from tempfile import NamedTemporaryFile
+
+from mbctl.MBConfig import mb_config
+
+STATE_DIR_NAME = ".mbctl"
+
+
+def get_state_path(*parts: str) -> str:
+    # 每次调用时读取 storage_path，方便测试中替换存储路径。
+    return posixpath.join(mb_config.storage_path, STATE_DIR_NAME, *parts)
+
+
+# 先写入同目录下的临时文件再 rename，读者要么看到旧文件，要么看到完整的新文件，多个进程同时写入也是安全的。
+def atomic_write_bytes(file_path: str, content: bytes) -> None:
+    dir_path = posixpath.dirname(file_path)
+    os.makedirs(dir_path, mode=0o700, exist_ok=True)
+    with NamedTemporaryFile(
+        "wb", dir=dir_path, prefix=".tmp-", delete=False
+    ) as temp_file:
+        try:
+            temp_file.write(content)
+            temp_file.flush()
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+    try:
+        os.replace(temp_file.name, file_path)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
+
+
+def atomic_write_text(file_path: str, content: str) -> None:
+    atomic_write_bytes(file_path, content.encode("utf-8"))
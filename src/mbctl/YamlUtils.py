@@ -0,0 +1,31 @@
+# mbctl 所有 yaml 读写的统一入口。
+# PyYAML 带有 libyaml 绑定时使用 C 实现的 CSafeLoader / CSafeDumper，否则退回纯 Python 的 SafeLoader / SafeDumper。
+# 两者加载结果相同，输出逐字节相同（有测试保证），调用者不需要关心使用的是哪一种。
+from typing import IO, Any, Union
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+
+    HAS_LIBYAML = True
+except ImportError:
+    from yaml import SafeDumper, SafeLoader  # type: ignore[assignment]
+
+    HAS_LIBYAML = False
+
+
+def yaml_load(stream: Union[str, bytes, IO[Any]]) -> Any:
+    """与 yaml.safe_load 相同。"""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def yaml_dump(data: Any, stream: IO[Any], sort_keys: bool = False) -> None:
+    """与 yaml.safe_dump 相同，默认保持字典的键顺序。"""
+    yaml.dump(data, stream, Dumper=SafeDumper, sort_keys=sort_keys)
+
+
+def yaml_dumps(data: Any, sort_keys: bool = False) -> str:
+    """把 data 序列化为 yaml 字符串。"""
+    return yaml.dump(data, Dumper=SafeDumper, sort_keys=sort_keys)
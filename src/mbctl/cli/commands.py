@@ -0,0 +1,798 @@
+# mbctl 的 typer 子命令。这个模块只在真正需要执行 mbctl 子命令时才被 main.py 导入，
+# 而 MBHost 以及其他较重的依赖会在具体命令中按需加载，从而让 --help 也不需要加载整个主机。
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Annotated, Any, Callable, Optional
+import time
+import typer
+from mbctl.cli.main import __version__, just_like_nerdctl
+from mbctl.MBDaemon import MBDaemonClient, MBDaemonError, connect_daemon
+from mbctl.MBProfile import enable_profiling, span
+
+if TYPE_CHECKING:
+    from mbctl.MBHost import MBHost
+
+app = typer.Typer(
+    help=(
+        "mbctl is a Man8S container orchestration tool built on nerdctl/containerd. "
+        "It delivers core Man8S workflows such as building or recreating containers, "
+        "managing autostart policy, and wiring Yggdrasil networking. When a command "
+        "is not recognized, mbctl proxies to nerdctl so you can keep using familiar "
+        "container maintenance commands."
+    )
+)
+_host: Optional[MBHost] = None
+
+
+# 第一次调用时才构造 MBHost（读取配置、解析容器树、查询容器状态）。
+def get_host() -> MBHost:
+    global _host
+    if _host is None:
+        from mbctl.MBHost import MBHost
+
+        _host = MBHost()
+    return _host
+
+
+# MBContainerStatus.running 的值。与 mbctld 通信时直接比较字符串，避免为此导入整个 MBContainer 模块。
+RUNNING_STATUS = "running"
+
+_daemon: Optional[MBDaemonClient] = None
+_daemon_checked = False
+
+
+# 如果 mbctld 正在运行，命令会交给它执行，从而不必在本进程中加载主机；否则返回None，命令在本进程中执行。
+def get_daemon() -> Optional[MBDaemonClient]:
+    global _daemon, _daemon_checked
+    if not _daemon_checked:
+        _daemon = connect_daemon()
+        _daemon_checked = True
+    return _daemon
+
+
+def run_interactive(cmd: list[str]) -> Optional[int]:
+    import subprocess
+
+    try:
+        return subprocess.run(cmd).returncode
+    except KeyboardInterrupt:
+        return None
+
+
+def daemon_request(
+    daemon: MBDaemonClient,
+    op: str,
+    on_event: Optional[Callable[[Any], None]] = None,
+    **args: Any,
+) -> Any:
+    try:
+        with span(f"mbctld {op}"):
+            return daemon.request(op, on_event=on_event, **args)
+    except MBDaemonError as e:
+        print(f"mbctld: {e}")
+        raise typer.Exit(code=1)
+
+
+def _version_callback(value: bool):
+    if value:
+        typer.echo(f"mbctl {__version__}")
+        raise typer.Exit()
+
+
+def _start_profiling(ctx: typer.Context, print_summary: bool, output: Optional[str]) -> None:
+    import sys
+
+    profiler = enable_profiling()
+
+    def finish() -> None:
+        if print_summary:
+            print(profiler.format_summary(), file=sys.stderr)
+        if output:
+            profiler.write_chrome_trace(output)
+
+    ctx.call_on_close(finish)
+
+
+@app.callback()
+def main_callback(
+    ctx: typer.Context,
+    version: Annotated[
+        bool,
+        typer.Option(
+            "--version",
+            "-v",
+            is_eager=True,
+            callback=_version_callback,
+            help="Show mbctl version and exit.",
+        ),
+    ] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Print a per-operation timing summary (including every nerdctl/yggdrasilctl call) to stderr.",
+        ),
+    ] = False,
+    profile_output: Annotated[
+        Optional[str],
+        typer.Option(
+            "--profile-output",
+            help="Write a Chrome trace (chrome://tracing, Perfetto) of the command to this file.",
+        ),
+    ] = None,
+):
+    """Entrypoint for global options such as --version and --profile."""
+    if profile or profile_output:
+        _start_profiling(ctx, profile, profile_output)
+    return version
+
+
+@app.command("run", help="Build and start a Man8S-managed container by name.")
+def build_mbcontainer(
+    container_name: Annotated[
+        str, typer.Argument(help="Container name defined in Man8S compose-style specs.")
+    ],
+):
+    print(f"Building container: {container_name}")
+    daemon = get_daemon()
+    if daemon is not None:
+        daemon_request(daemon, "run", name=container_name)
+    else:
+        get_host().build_new_container(container_name)
+
+
+@app.command(
+    "run-all",
+    help="Build and start every Man8S-managed container in dependency order.",
+)
+def build_all_mbcontainers(
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=1,
+            help="Maximum number of containers to build at the same time.",
+        ),
+    ] = 1,
+):
+    from mbctl.MBHost.MBContainerBuildResult import (
+        MBContainerBuildResult,
+        MBContainerBuildState,
+    )
+
+    def print_result(result: MBContainerBuildResult) -> None:
+        if result.state == MBContainerBuildState.succeeded:
+            print(f"[ok]        {result.name} ({result.duration:.2f}s)")
+        elif result.state == MBContainerBuildState.failed:
+            print(f"[failed]    {result.name} ({result.duration:.2f}s): {result.error}")
+        else:
+            print(
+                f"[cancelled] {result.name}: dependency '{result.failed_dependency}' failed"
+            )
+
+    start = time.perf_counter()
+    daemon = get_daemon()
+    if daemon is not None:
+        results: list[MBContainerBuildResult] = []
+
+        def on_event(event: dict[str, Any]) -> None:
+            result = MBContainerBuildResult(
+                event["name"],
+                MBContainerBuildState(event["state"]),
+                event["duration"],
+                error=RuntimeError(event["error"]) if event["error"] else None,
+                failed_dependency=event["failed_dependency"],
+            )
+            results.append(result)
+            print_result(result)
+
+        daemon_request(daemon, "run_all", on_event=on_event, jobs=jobs)
+    else:
+        results = get_host().build_all_containers(jobs=jobs, on_result=print_result)
+    elapsed = time.perf_counter() - start
+
+    counts = {state: 0 for state in MBContainerBuildState}
+    for result in results:
+        counts[result.state] += 1
+    print(
+        f"Built {len(results)} containers in {elapsed:.2f}s: "
+        f"{counts[MBContainerBuildState.succeeded]} succeeded, "
+        f"{counts[MBContainerBuildState.failed]} failed, "
+        f"{counts[MBContainerBuildState.cancelled]} cancelled."
+    )
+    if counts[MBContainerBuildState.succeeded] != len(results):
+        raise typer.Exit(code=1)
+
+
+@app.command(
+    "up",
+    help=(
+        "Create every container (or one container and everything it requires) "
+        "with a single multi-service nerdctl compose project. Containers that already "
+        "exist are left in their own projects and only started if stopped."
+    ),
+)
+def compose_up_mbcontainers(
+    container_name: Annotated[
+        Optional[str],
+        typer.Argument(
+            help="Only bring up this container and its dependency closure. Defaults to all containers."
+        ),
+    ] = None,
+):
+    start = time.perf_counter()
+    daemon = get_daemon()
+    if daemon is not None:
+        names = daemon_request(daemon, "up", name=container_name)
+    else:
+        names = get_host().compose_up_project(container_name)
+    print(
+        f"Brought up {len(names)} containers in {time.perf_counter() - start:.2f}s: "
+        + ", ".join(names)
+    )
+
+
+@app.command(
+    "apply",
+    help=(
+        "Create missing containers and recreate only the containers whose rendered "
+        "compose configuration or image changed since they were built."
+    ),
+)
+def apply_mbcontainers(
+    container_name: Annotated[
+        Optional[str],
+        typer.Argument(help="Only apply this container. Defaults to all containers."),
+    ] = None,
+    with_deps: Annotated[
+        bool,
+        typer.Option("--with-deps", help="Also apply every container it requires."),
+    ] = False,
+    with_dependents: Annotated[
+        bool,
+        typer.Option("--with-dependents", help="Also apply every container that requires it."),
+    ] = False,
+):
+    from mbctl.MBHost.MBContainerApplyResult import (
+        MBContainerApplyAction,
+        MBContainerApplyResult,
+    )
+
+    def print_result(result: MBContainerApplyResult) -> None:
+        if result.action == MBContainerApplyAction.failed:
+            print(f"[failed]    {result.name}: {result.error}")
+        elif result.action == MBContainerApplyAction.cancelled:
+            print(
+                f"[cancelled] {result.name}: dependency '{result.failed_dependency}' failed"
+            )
+        elif result.action != MBContainerApplyAction.unchanged:
+            print(f"[{result.action.value}] {result.name} ({result.duration:.2f}s)")
+
+    daemon = get_daemon()
+    if daemon is not None:
+        results: list[MBContainerApplyResult] = []
+
+        def on_event(event: dict[str, Any]) -> None:
+            result = MBContainerApplyResult(
+                event["name"],
+                MBContainerApplyAction(event["action"]),
+                event["duration"],
+                error=RuntimeError(event["error"]) if event["error"] else None,
+                failed_dependency=event["failed_dependency"],
+            )
+            results.append(result)
+            print_result(result)
+
+        daemon_request(
+            daemon,
+            "apply",
+            on_event=on_event,
+            name=container_name,
+            with_deps=with_deps,
+            with_dependents=with_dependents,
+        )
+    else:
+        results = get_host().apply_containers(
+            container_name, with_deps, with_dependents, on_result=print_result
+        )
+
+    counts = {action: 0 for action in MBContainerApplyAction}
+    for result in results:
+        counts[result.action] += 1
+    print(", ".join(f"{count} {action.value}" for action, count in counts.items()))
+    if counts[MBContainerApplyAction.failed] or counts[MBContainerApplyAction.cancelled]:
+        raise typer.Exit(code=1)
+
+
+@app.command(
+    "mounts",
+    help="Create mount source directories and fix their owner and permissions, or show what would change.",
+)
+def prepare_mbcontainer_mounts(
+    container_name: Annotated[
+        Optional[str],
+        typer.Argument(help="Only prepare this container's mounts. Defaults to all containers."),
+    ] = None,
+    dry_run: Annotated[
+        bool,
+        typer.Option("--dry-run", "-n", help="Only print the pending changes."),
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=1, help="Number of mount sources to check at the same time."),
+    ] = 16,
+):
+    daemon = get_daemon()
+    if daemon is not None:
+        report = daemon_request(daemon, "mounts", name=container_name, dry_run=dry_run, jobs=jobs)
+    else:
+        host = get_host()
+        containers = None if container_name is None else [host.get_mbcontainer(container_name)]
+        try:
+            if dry_run:
+                plan = host.plan_container_mounts(containers, jobs)
+            else:
+                plan = host.prepare_container_mounts(containers, jobs)
+        except OSError as e:
+            print(e)
+            raise typer.Exit(code=1)
+        report = {"lines": plan.describe(), "checked": plan.checked_paths}
+    for line in report["lines"]:
+        print(line)
+    verb = "pending" if dry_run else "applied"
+    print(f"{report['checked']} mount sources checked, {len(report['lines'])} changes {verb}.")
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+
+def _empty_trash(jobs: int) -> None:
+    from mbctl.MBHost.MBTrash import MBTrash, MBTrashEntryReport
+
+    def print_progress(entry: MBTrashEntryReport) -> None:
+        if entry.error is not None:
+            print(f"[failed]  {entry.name}: {entry.error}")
+        else:
+            print(f"[deleted] {entry.name}: {entry.files} files, {_format_bytes(entry.bytes)}")
+
+    start = time.perf_counter()
+    report = MBTrash().empty(jobs=jobs, on_progress=print_progress)
+    assert report is not None
+    print(
+        f"Deleted {len(report.entries) - len(report.errors)} trash entries, {report.files} files, "
+        f"{_format_bytes(report.bytes)} in {time.perf_counter() - start:.2f}s."
+    )
+    if report.errors:
+        raise typer.Exit(code=1)
+
+
+@app.command("prune", help="Remove mounts and cached data for a container.")
+def prune_mbcontainer(
+    container_name: Annotated[
+        str, typer.Argument(help="Target container name to prune mounts for.")
+    ],
+    wait: Annotated[
+        bool,
+        typer.Option(
+            "--wait",
+            "-w",
+            help="Delete the pruned mounts in the foreground instead of in a background process.",
+        ),
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=1, help="Number of trash entries to delete at the same time."),
+    ] = 4,
+):
+    print(f"Pruning container: {container_name}")
+    daemon = get_daemon()
+    if daemon is not None:
+        trashed = daemon_request(daemon, "prune", name=container_name)
+    else:
+        try:
+            trashed = get_host().remove_container_mounts(container_name)
+        except RuntimeError as e:
+            print(e)
+            raise typer.Exit(code=1)
+    print(f"Moved {len(trashed)} mount directories to the trash.")
+    if not trashed:
+        return
+    if wait:
+        _empty_trash(jobs)
+    else:
+        from mbctl.MBHost.MBTrash import MBTrash
+
+        MBTrash().start_background_reaper()
+        print("Deleting them in the background, run `mbctl gc --trash` to follow up.")
+
+
+@app.command("gc", help="Reclaim disk space left behind by earlier operations.")
+def garbage_collect(
+    trash: Annotated[
+        bool,
+        typer.Option("--trash", help="Delete everything in the trash left by prune."),
+    ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=1, help="Number of trash entries to delete at the same time."),
+    ] = 4,
+):
+    if not trash:
+        print("Nothing to collect, pass --trash to empty the trash.")
+        raise typer.Exit(code=2)
+    _empty_trash(jobs)
+
+
+@app.command(
+    "create",
+    help="Create a new container from an image with optional Yggdrasil and autostart settings.",
+)
+def create_new_mbcontainer(
+    container_name: Annotated[
+        str,
+        typer.Argument(help="Container name to register under Man8S management."),
+    ],
+    image: Annotated[
+        str,
+        typer.Option(
+            prompt="Please input a image.",
+            help="Container image reference, for example: library/redis:latest.",
+        ),
+    ],
+):
+    print(f"preparing container: {container_name}")
+    daemon = get_daemon()
+    if daemon is not None:
+        daemon_request(daemon, "create", name=container_name, image=image)
+    else:
+        from mbctl.datatypes import MBContainerConf
+
+        container_conf = MBContainerConf(image=image)
+        get_host().create_container_from_conf(container_name, container_conf)
+
+
+@app.command(
+    "rerun",
+    help="Recreate a container by forcing deletion and rebuilding it from its source image.",
+)
+def rebuild_mbcontainer(
+    container_name: Annotated[
+        str, typer.Argument(help="Container name to rebuild from scratch.")
+    ],
+    pull: Annotated[
+        bool,
+        typer.Option("--pull", "-p", help="Pull the latest image before recreating."),
+    ] = False,
+):
+    print(f"Recreating container: {container_name}")
+    daemon = get_daemon()
+    if daemon is not None:
+        daemon_request(daemon, "rerun", name=container_name)
+        return
+    host = get_host()
+    host.client.force_delete_container(container_name)
+    host.build_new_container(container_name)
+
+
+@app.command("autostart", help="Start every container marked with autostart.")
+def start_all_autostart_mbcontainers():
+    daemon = get_daemon()
+    if daemon is not None:
+        daemon_request(
+            daemon, "autostart", on_event=lambda name: print(f"Starting container: {name}")
+        )
+        return
+    host = get_host()
+    containers = host.list_containers()
+    for container in containers:
+        if container.autostart:
+            print(f"Starting container: {container.name}")
+            host.client.start_container(container.name)
+
+
+def _stop_mbcontainers(
+    container_names: Optional[list[str]], with_dependents: bool, timeout: float
+) -> None:
+    from mbctl.MBHost.MBContainerStopResult import (
+        MBContainerStopResult,
+        MBContainerStopState,
+    )
+
+    def print_result(result: MBContainerStopResult) -> None:
+        if result.state == MBContainerStopState.failed:
+            print(f"[failed]    {result.name}: {result.error}")
+        elif result.state == MBContainerStopState.cancelled:
+            print(
+                f"[cancelled] {result.name}: dependent '{result.failed_dependent}' is still running"
+            )
+        elif result.state != MBContainerStopState.not_running:
+            print(f"[{result.state.value}] {result.name} ({result.duration:.2f}s)")
+
+    start = time.perf_counter()
+    daemon = get_daemon()
+    if daemon is not None:
+        results: list[MBContainerStopResult] = []
+
+        def on_event(event: dict[str, Any]) -> None:
+            result = MBContainerStopResult(
+                event["name"],
+                MBContainerStopState(event["state"]),
+                event["duration"],
+                error=RuntimeError(event["error"]) if event["error"] else None,
+                failed_dependent=event["failed_dependent"],
+            )
+            results.append(result)
+            print_result(result)
+
+        daemon_request(
+            daemon,
+            "stop",
+            on_event=on_event,
+            names=container_names,
+            with_dependents=with_dependents,
+            timeout=timeout,
+        )
+    else:
+        try:
+            results = get_host().stop_containers(
+                container_names, with_dependents, timeout, on_result=print_result
+            )
+        except KeyError as e:
+            print(e.args[0])
+            raise typer.Exit(code=1)
+    elapsed = time.perf_counter() - start
+
+    counts = {state: 0 for state in MBContainerStopState}
+    for result in results:
+        counts[result.state] += 1
+    print(
+        f"Stopped {counts[MBContainerStopState.stopped] + counts[MBContainerStopState.killed]} "
+        f"containers in {elapsed:.2f}s: "
+        + ", ".join(f"{count} {state.value}" for state, count in counts.items())
+    )
+    if counts[MBContainerStopState.failed] or counts[MBContainerStopState.cancelled]:
+        raise typer.Exit(code=1)
+
+
+StopTimeoutOption = Annotated[
+    float,
+    typer.Option(
+        "--timeout",
+        "-t",
+        min=0,
+        help="Seconds to wait after SIGTERM before killing the containers of a level with SIGKILL.",
+    ),
+]
+
+
+# 不叫 stop：mbctl stop 透传给 nerdctl stop，供把 mbctl 当作 nerdctl 使用的脚本调用。
+@app.command(
+    "halt",
+    help=(
+        "Stop Man8S-managed containers with one batched nerdctl call per dependency level. "
+        "With --with-dependents, everything that requires them is stopped first."
+    ),
+)
+def halt_mbcontainers(
+    container_names: Annotated[
+        list[str], typer.Argument(help="Containers to stop.")
+    ],
+    with_dependents: Annotated[
+        bool,
+        typer.Option(
+            "--with-dependents",
+            help="Also stop every container that (transitively) requires the named containers, dependents first.",
+        ),
+    ] = False,
+    timeout: StopTimeoutOption = 10,
+):
+    _stop_mbcontainers(container_names, with_dependents, timeout)
+
+
+@app.command(
+    "stop-all",
+    help="Stop every Man8S-managed container in reverse dependency order, one batched level at a time.",
+)
+def stop_all_mbcontainers(timeout: StopTimeoutOption = 10):
+    _stop_mbcontainers(None, True, timeout)
+
+
+@app.command("list", help="List all managed containers and their runtime details.")
+def list_all_mbcontainers():
+    from prettytable import PrettyTable, TableStyle
+
+    table = PrettyTable()
+    table.field_names = ["Container", "Image", "Status", "AutoStart", "YggAddr"]
+
+    daemon = get_daemon()
+    if daemon is not None:
+        summaries = daemon_request(daemon, "list")
+    else:
+        summaries = get_host().list_container_summaries()
+    table.add_rows(
+        [
+            [
+                summary["name"],
+                summary["image"],
+                summary["status"],
+                "Yes" if summary["autostart"] else "No",
+                summary["yggdrasil_addr"],
+            ]
+            for summary in summaries
+        ]
+    )
+    table.set_style(TableStyle.PLAIN_COLUMNS)
+    table.align = "l"
+    # table.padding_width = 1
+    print(table)
+
+
+@app.command("whois", help="Find the containers and names behind a Yggdrasil address.")
+def whois_yggdrasil_address(
+    address: Annotated[str, typer.Argument(help="Yggdrasil IPv6 address to look up.")],
+):
+    daemon = get_daemon()
+    try:
+        if daemon is not None:
+            entries = daemon_request(daemon, "whois", address=address)
+        else:
+            entries = get_host().whois(address)
+    except ValueError as e:
+        print(e)
+        raise typer.Exit(code=1)
+    if not entries:
+        print(f"No container or name maps to {address}.")
+        raise typer.Exit(code=1)
+    if len(entries) > 1:
+        print(f"Warning: {len(entries)} names map to {address}.")
+    for entry in entries:
+        kind = "container" if entry["container"] else "name"
+        line = f"{entry['name']} ({kind}) {entry['address']}"
+        if entry["referenced_by"]:
+            line += f", referenced by {', '.join(entry['referenced_by'])}"
+        print(line)
+
+
+@app.command(
+    "shell",
+    help="Execute commands just like nerdctl's executing, default to bash shell.",
+)
+def nerdctl_shell(
+    container_name: Annotated[
+        str,
+        typer.Argument(help="Target container name to execute commands in."),
+    ],
+    rename_offline: Annotated[
+        bool,
+        typer.Option(
+            "--rename-offline",
+            help=(
+                "Use the old offline mode: rename the stopped container, run a temporary "
+                "compose project in its place, then delete it and rename the container back."
+            ),
+        ),
+    ] = False,
+):
+    import os
+
+    shell_command = [
+        "sh",
+        "-c",
+        "if [ -x /bin/bash ]; then exec /bin/bash; else exec /bin/sh; fi",
+    ]
+    # 离线 shell 的临时容器名，带上本进程的 pid，同一个容器可以同时打开多个离线 shell
+    run_name = f"{container_name}-mbctl-shell-{os.getpid()}"
+
+    daemon = get_daemon()
+    if daemon is not None and not rename_offline:
+        if daemon_request(daemon, "status", name=container_name) == RUNNING_STATUS:
+            # 容器正在运行时不需要加载主机，直接交给 nerdctl exec
+            raise typer.Exit(
+                code=just_like_nerdctl(
+                    ["nerdctl", "exec", "-it", container_name] + shell_command
+                )
+            )
+        print(f"Container '{container_name}' is not running. Starting a temporary shell container...")
+        run_command = daemon_request(
+            daemon, "shell_command", name=container_name, command=shell_command, run_name=run_name
+        )
+        raise typer.Exit(code=just_like_nerdctl(run_command))
+
+    from mbctl.MBContainer import MBContainerStatus
+
+    host = get_host()
+    if host.get_container_status(container_name) == MBContainerStatus.running:
+        rc = host.client.execute_any_command_safely(
+            ["nerdctl", "exec", "-it", container_name] + shell_command
+        )
+        raise typer.Exit(code=rc if rc is not None else -2)
+    elif not rename_offline:
+        # 离线模式：用一次 nerdctl run --rm 启动一个与原容器配置相同（镜像、挂载点、网络、hostname、extra_hosts、DNS）的交互式临时容器。
+        # 原容器不会被改名或重建，临时容器在退出后由 nerdctl 删除，所以任何一步失败都不会在主机上留下改名的容器。
+        print(f"Container '{container_name}' is not running. Starting a temporary shell container...")
+        run_command = host.get_mbcontainer(container_name).to_nerdctl_run_command(
+            shell_command, run_name
+        )
+        raise typer.Exit(code=just_like_nerdctl(run_command))
+    else:
+        # 离线模式：以代替模式启动一个配置等同，但交互运行
+        # 离线模式的原理是，启动一个临时的容器，采用和原容器一样的dhcp hostname，这样确保ygg地址和原容器一致，但命令行改为交互式shell。
+        # 至于resolve reference，
+        print(
+            f"Container '{container_name}' is not running. Starting a temporary shell container..."
+        )
+        # 首先需要retag原容器，防止新容器与原容器冲突。
+        host.client.rename_container(
+            container_name, f"{container_name}_mbctl_offline_temp"
+        )
+        # 然后创建一个临时容器，配置和原容器一样，但是命令行改为交互式shell。
+        temp_container = host.get_mbcontainer(container_name)
+        temp_container.extra_compose_configs.update(
+            {
+                "tty": True,
+                "stdin_open": True,
+                "entrypoint": shell_command,
+            }
+        )
+        # 程序会阻塞在此，直到用户退出shell。
+        # 临时容器使用自己的 compose 项目和临时目录，不属于原容器的项目，也不覆盖原容器持久的 compose 文件。
+        exit_code = host.client.compose_create_container_safe(
+            temp_container.to_compose_dict(), project_name=run_name
+        )
+        # 确保容器退出
+        host.client.stop_and_wait_container(f"{container_name}_mbctl_offline_temp")
+        # 最后删除与原容器名字相同的临时容器，并将原容器名改回来。
+        print("Cleaning up temporary shell container...")
+        host.client.force_delete_container(f"{container_name}")
+        host.client.rename_container(
+            f"{container_name}_mbctl_offline_temp", container_name
+        )
+        print("Cleanup complete.")
+        raise typer.Exit(code=exit_code)
+
+
+@app.command(
+    "netshell",
+    help="Execute commands just like nerdctl's executing, default to bash shell.",
+)
+def nerdctl_netshell(
+    container_name: Annotated[
+        str,
+        typer.Argument(help="Target container name to execute commands in."),
+    ],
+):
+    daemon = get_daemon()
+    if daemon is not None:
+        is_running = daemon_request(daemon, "status", name=container_name) == RUNNING_STATUS
+        get_pid = lambda: daemon_request(daemon, "pid", name=container_name)
+        execute = run_interactive
+    else:
+        from mbctl.MBContainer import MBContainerStatus
+
+        host = get_host()
+        is_running = host.get_container_status(container_name) == MBContainerStatus.running
+        get_pid = lambda: host.client.get_container_pid(container_name)
+        execute = host.client.execute_any_command_safely
+    # 只进入容器的网络名字空间，使用nsenter命令，不进入容器的挂载点。
+    if is_running:
+        pid = get_pid()
+        nsenter_command = [
+            "nsenter",
+            "-t",
+            str(pid),
+            "-n",
+            "bash",
+        ]
+        print(f"Entering network namespace of container '{container_name}' (PID: {pid})...")
+        rc = execute(nsenter_command)
+        print(f"Exited network namespace of container '{container_name}'.")
+        raise typer.Exit(code=rc if rc is not None else -2)
+    else:
+        print(f"Container '{container_name}' is not running. Cannot enter network namespace.")
+        raise typer.Exit(code=-2)
@@ -1,9 +1,10 @@
 # represent a docker compose file's structure.
-from typing import Any, Dict, List, Optional
+import functools
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import yaml
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from mbctl.MBLog import mb_logger
+from mbctl.YamlUtils import yaml_dumps
 
 # This is a simplified Compose file structure for mbctl only.
 class ComposeServiceConf(BaseModel):
@@ -19,6 +20,7 @@ class ComposeServiceConf(BaseModel):
     restart: str
     extra_hosts: Dict[str, str] = Field(default_factory=dict)
     dns: Optional[str] = None
+    depends_on: List[str] = Field(default_factory=list)
 
 
 class ComposeNetworkConfig(BaseModel):
@@ -27,47 +29,155 @@ class ComposeNetworkConfig(BaseModel):
     external: bool
 
 
+@functools.cache
+def _field_defaults(model_cls: type[BaseModel]) -> List[Tuple[str, bool, Any]]:
+    # (字段名, 是否必填, 默认值)，按字段定义顺序
+    return [
+        (name, field.is_required(), None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model_cls.model_fields.items()
+    ]
+
+
+def render_trusted_model(model_cls: type[BaseModel], fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    不构造模型，直接得到与 model_cls(**fields).model_dump(mode="python", exclude_defaults=True) 相同的字典。
+    调用者保证 fields 已经是正确的类型（例如派生自已校验的配置），并且模型的字段值只有标量、标量列表或标量字典。
+    """
+    result: Dict[str, Any] = {}
+    for name, required, default in _field_defaults(model_cls):
+        if name not in fields:
+            continue
+        value = fields[name]
+        if not required and value == default:
+            continue
+        result[name] = value
+    return result
+
+
 class ComposeConf(BaseModel):
     model_config = ConfigDict(extra="forbid", populate_by_name=True)
 
     services: Dict[str, ComposeServiceConf] = Field(default_factory=dict)
     networks: Dict[str, ComposeNetworkConfig] = Field(default_factory=dict)
     _extra_configs: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    # 服务名 -> 该服务的额外配置。extra_compose_configs 只作用于第一个服务，多服务的 compose 文件使用这个。
+    _service_extra_configs: Dict[str, Dict[str, Any]] = PrivateAttr(default_factory=dict)
 
-    def __init__(self, extra_compose_configs={}, **data):
+    def __init__(self, extra_compose_configs={}, service_extra_configs={}, **data):
         # Call the parent's __init__ first
         # Extract extra compose configurations if provided
         super().__init__(**data)
         self._extra_configs = extra_compose_configs
+        self._service_extra_configs = service_extra_configs
+
+    def extra_configs_by_service(self) -> Dict[str, Dict[str, Any]]:
+        """返回 服务名 -> 额外配置，extra_compose_configs 计入第一个服务。"""
+        extra_configs = {name: dict(conf) for name, conf in self._service_extra_configs.items()}
+        if self._extra_configs and self.services:
+            first_service_key = next(iter(self.services))
+            extra_configs.setdefault(first_service_key, {}).update(self._extra_configs)
+        return extra_configs
+
+    @classmethod
+    def merge(cls, compose_confs: Iterable["ComposeConf"]) -> "ComposeConf":
+        """
+        将多个 ComposeConf 合并成一个多服务的 ComposeConf，每个服务保留自己的额外配置。
+        服务名不能重复；同名网络的配置必须一致。
+        """
+        services: Dict[str, ComposeServiceConf] = {}
+        networks: Dict[str, ComposeNetworkConfig] = {}
+        service_extra_configs: Dict[str, Dict[str, Any]] = {}
+        for compose_conf in compose_confs:
+            for name, service in compose_conf.services.items():
+                if name in services:
+                    raise ValueError(f"Duplicate compose service '{name}'.")
+                services[name] = service
+            for name, network in compose_conf.networks.items():
+                if name in networks and networks[name] != network:
+                    raise ValueError(f"Conflicting definitions for compose network '{name}'.")
+                networks[name] = network
+            service_extra_configs.update(compose_conf.extra_configs_by_service())
+        return cls(
+            service_extra_configs=service_extra_configs,
+            services=services,
+            networks=networks,
+        )
+
+    @staticmethod
+    def merge_compose_dicts(compose_dicts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        与 merge 相同，但合并的是已经渲染好的 compose 文档（例如 MBContainer.to_compose_dict 的结果），
+        每个服务的额外配置已经在各自的文档中，不需要重新构造模型。
+        """
+        services: Dict[str, Any] = {}
+        networks: Dict[str, Any] = {}
+        for compose_dict in compose_dicts:
+            for name, service in compose_dict.get("services", {}).items():
+                if name in services:
+                    raise ValueError(f"Duplicate compose service '{name}'.")
+                services[name] = service
+            for name, network in compose_dict.get("networks", {}).items():
+                if name in networks and networks[name] != network:
+                    raise ValueError(f"Conflicting definitions for compose network '{name}'.")
+                networks[name] = network
+        merged: Dict[str, Any] = {}
+        if services:
+            merged["services"] = services
+        if networks:
+            merged["networks"] = networks
+        return merged
+
+    @staticmethod
+    def render_trusted_dict(
+        services: Dict[str, Dict[str, Any]],
+        networks: Dict[str, Dict[str, Any]],
+        extra_compose_configs: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        直接由字段字典渲染 compose 文档，不构造、不校验任何模型，结果与
+        ComposeConf(extra_compose_configs, services=..., networks=...).to_compose_dict() 相同。
+        只用于派生自已校验的 MBContainerConf 的数据。
+        """
+        compose_dict: Dict[str, Any] = {}
+        if services:
+            compose_dict["services"] = {
+                name: render_trusted_model(ComposeServiceConf, fields) for name, fields in services.items()
+            }
+        if networks:
+            compose_dict["networks"] = {
+                name: render_trusted_model(ComposeNetworkConfig, fields) for name, fields in networks.items()
+            }
+        if extra_compose_configs and services:
+            ComposeConf._merge_extra_configs(
+                compose_dict, {next(iter(services)): extra_compose_configs}
+            )
+        return compose_dict
+
+    @staticmethod
+    def _merge_extra_configs(
+        compose_dict: Dict[str, Any], extra_configs_by_service: Dict[str, Dict[str, Any]]
+    ) -> None:
+        services = compose_dict.get("services", {})
+        for service_key, extra_configs in extra_configs_by_service.items():
+            compose_service_dict = services.get(service_key)
+            if compose_service_dict is None:
+                continue
+            for key, value in extra_configs.items():
+                if key in compose_service_dict:
+                    mb_logger.warning(
+                        f"Overriding existing key '{key}' in compose service '{service_key}' with extra configuration."
+                    )
+                compose_service_dict[key] = value
 
     def to_compose_dict(self) -> Dict[str, Any]:
         """Convert the ComposeConf instance to a dictionary, merging extra configurations."""
         compose_dict: Dict[str, Any] = self.model_dump(
             mode="python", by_alias=True, exclude_defaults=True
         )
-
-        services = compose_dict.get("services", {})
-        compose_service_dict: Dict[str, Any]
-
-        if services:
-            compose_service_dict = list(services.values())[0]
-        else:
-            compose_service_dict = {}
-
-        for key, value in self._extra_configs.items():
-            if key in compose_service_dict:
-                mb_logger.warning(
-                    f"Overriding existing key '{key}' in compose service with extra configuration."
-                )
-            compose_service_dict[key] = value
-
-        if compose_service_dict and services:
-            first_service_key = list(services.keys())[0]
-            services[first_service_key] = compose_service_dict
-
+        self._merge_extra_configs(compose_dict, self.extra_configs_by_service())
         return compose_dict
 
     def to_compose_yaml_str(self) -> str:
         """Serialize the ComposeConf instance to a YAML string."""
         compose_dict = self.to_compose_dict()
-        return yaml.safe_dump(compose_dict, sort_keys=False)
+        return yaml_dumps(compose_dict)
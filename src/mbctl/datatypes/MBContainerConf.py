@@ -2,9 +2,11 @@ import json
 from datetime import datetime
 from typing import Any, Optional, Sequence, Tuple, Union
 
-import yaml
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
+from mbctl.MBProfile import profiled
+from mbctl.YamlUtils import yaml_dump, yaml_load
+
 
 def is_valid_path_or_reference(p: str) -> bool:
     # Supports two forms:
@@ -123,14 +125,15 @@ class MBContainerConf(BaseModel):
         return self
 
     @classmethod
+    @profiled("MBContainerConf.from_yaml_file")
     def from_yaml_file(cls, file_path: str) -> "MBContainerConf":
         with open(file_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
+            data = yaml_load(f) or {}
         return cls.model_validate(data)
 
     def to_yaml_file(self, file_path: str) -> None:
         with open(file_path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(self.model_dump(mode="json"), f, sort_keys=False)
+            yaml_dump(self.model_dump(mode="json"), f)
 
     @staticmethod
     def to_json_schema_file(file_path: str) -> None:
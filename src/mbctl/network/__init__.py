@@ -1,2 +1,3 @@
 from .string_to_v6suffix import string_to_v6suffix
+from .ygg_address_deriver import YggAddressDeriver, get_ygg_address_deriver
 from .yggdrasil_addr import get_host_yggdrasil_address_and_subnet
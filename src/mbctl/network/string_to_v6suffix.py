@@ -1,34 +1,12 @@
-import ipaddress
-import hashlib
-
-def string_to_v6suffix(prefix: str, src_str: str) -> str:
-    """
-    计算nspawn容器的IPv6地址。
-
-    :param prefix: IPv6前缀，例如 "2001:db8:1:2::/64"
-    :param container_name: 容器名称，例如 "mycontainer"
-    :return: IPv6地址字符串，例如 "2001:db8:1:2:abcd:1234:a123:b124"
-    """
-    # 解析前缀
-    network = ipaddress.IPv6Network(prefix, strict=False)
-    prefix_len = network.prefixlen
-    
-    # 把前缀转为整数
-    prefix_int = int(network.network_address)
-    
-    # 计算哈希
-    digest = hashlib.sha256(src_str.encode("utf-8")).digest()
-    hash_int = int.from_bytes(digest, "big")
-    
-    # IPv6 是 128 位，剩余位数
-    remaining_bits = 128 - prefix_len
-    
-    # 从哈希中取对应长度的比特
-    suffix = hash_int & ((1 << remaining_bits) - 1)
-    
-    # 拼接完整IPv6整数
-    ipv6_int = (prefix_int & (~((1 << remaining_bits) - 1))) | suffix
-    
-    # 转换回 IPv6 地址
-    ipv6_addr = ipaddress.IPv6Address(ipv6_int)
-    return str(ipv6_addr)
\ No newline at end of file
+from .ygg_address_deriver import get_ygg_address_deriver
+
+def string_to_v6suffix(prefix: str, src_str: str) -> str:
+    """
+    计算nspawn容器的IPv6地址。
+    地址由前缀与 sha256(src_str) 的低位拼接而成，见 YggAddressDeriver；同一前缀的解析结果与计算结果会被缓存。
+
+    :param prefix: IPv6前缀，例如 "2001:db8:1:2::/64"
+    :param container_name: 容器名称，例如 "mycontainer"
+    :return: IPv6地址字符串，例如 "2001:db8:1:2:abcd:1234:a123:b124"
+    """
+    return get_ygg_address_deriver(prefix).derive(src_str)
@@ -0,0 +1,74 @@
+import functools
+import hashlib
+import ipaddress
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+
+# 与某个 IPv6 前缀绑定的地址计算器。
+# 前缀只在构造时解析一次；计算结果保存在一个 LRU 缓存中，同一个名字重复计算（构造容器、渲染 extra_hosts 和 dns）时直接命中缓存。
+class YggAddressDeriver:
+    def __init__(self, prefix: str, maxsize: int = 4096) -> None:
+        network = ipaddress.IPv6Network(prefix, strict=False)
+        self.prefix = prefix
+        self.maxsize = maxsize
+        remaining_bits = 128 - network.prefixlen
+        self._suffix_mask = (1 << remaining_bits) - 1
+        self._prefix_int = int(network.network_address) & ~self._suffix_mask
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _compute(self, name: str) -> str:
+        digest = hashlib.sha256(name.encode("utf-8")).digest()
+        suffix = int.from_bytes(digest, "big") & self._suffix_mask
+        return str(ipaddress.IPv6Address(self._prefix_int | suffix))
+
+    def _store(self, name: str, address: str) -> None:
+        self._cache[name] = address
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def derive(self, name: str) -> str:
+        """计算 name 在此前缀下的 IPv6 地址。"""
+        with self._lock:
+            address = self._cache.get(name)
+            if address is not None:
+                self._cache.move_to_end(name)
+                return address
+        address = self._compute(name)
+        with self._lock:
+            self._store(name, address)
+        return address
+
+    def derive_many(self, names: Iterable[str]) -> Dict[str, str]:
+        """一次计算多个名字的地址，返回 名字 -> 地址。只对缓存中没有的名字计算哈希，整个过程只加两次锁。"""
+        result: Dict[str, str] = {}
+        missing = []
+        with self._lock:
+            for name in names:
+                if name in result:
+                    continue
+                address = self._cache.get(name)
+                if address is None:
+                    missing.append(name)
+                    # 占位，保持返回值的顺序与 names 一致
+                    result[name] = ""
+                else:
+                    self._cache.move_to_end(name)
+                    result[name] = address
+        computed = [(name, self._compute(name)) for name in missing]
+        with self._lock:
+            for name, address in computed:
+                result[name] = address
+                self._store(name, address)
+        return result
+
+    def cache_size(self) -> int:
+        return len(self._cache)
+
+
+@functools.lru_cache(maxsize=16)
+def get_ygg_address_deriver(prefix: str) -> YggAddressDeriver:
+    """返回 prefix 对应的共享 YggAddressDeriver，同一个前缀的所有调用者共用一个缓存。"""
+    return YggAddressDeriver(prefix)
@@ -1,35 +1,175 @@
-import argparse
-from .string_to_v6suffix import string_to_v6suffix
-
-
-# return addr, subnet
-def get_host_yggdrasil_address_and_subnet() -> tuple[str, str]:
-    """
-    获取宿主机的 Yggdrasil IPv6 地址。
-    假设宿主机已经配置并运行了 Yggdrasil。
-    """
-    import subprocess
-    result = subprocess.run(["yggdrasilctl", "getself"], capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError("无法获取 Yggdrasil 地址，请确保 Yggdrasil 已正确安装和运行。")
-    ygg_info = {line.split(":", 1)[0].strip(): line.split(":", 1)[1].strip() for line in result.stdout.splitlines()}
-    return ygg_info["IPv6 address"], ygg_info["IPv6 subnet"]
-
-def string_to_host_ygg_subnet_v6addr(src_str: str) -> str:
-    """
-    计算宿主机的 Yggdrasil IPv6 地址。
-    假设宿主机已经配置并运行了 Yggdrasil。
-    """
-    ygg_address, ygg_subnet = get_host_yggdrasil_address_and_subnet()
-    return string_to_v6suffix(ygg_subnet, src_str)
-
-def main():
-    parser = argparse.ArgumentParser(description="Calculate nspawn container IPv6 address.")
-    parser.add_argument("prefix", help="IPv6 前缀, e.g. '2001:db8:1:2::/64'")
-    parser.add_argument("container_name", help="容器名称, e.g. 'mycontainer'")
-    args = parser.parse_args()
-
-    print(string_to_v6suffix(args.prefix, args.container_name))
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import argparse
+import json
+import os
+import socket
+import time
+from typing import Any, Optional
+
+from .string_to_v6suffix import string_to_v6suffix
+from mbctl.MBConfig import mb_config
+from mbctl.MBLog import mb_logger
+from mbctl.MBProfile import command_span
+from mbctl.StateFileUtils import atomic_write_text, get_state_path
+
+YGGDRASIL_STATE_FILE = "yggdrasil-self.json"
+
+# 进程内缓存，同一次 mbctl 执行中只解析一次。
+_host_identity: Optional[tuple[str, str]] = None
+
+
+def _query_yggdrasilctl_getself() -> tuple[str, str]:
+    import subprocess
+    cmd = ["yggdrasilctl", "getself"]
+    with command_span(cmd) as span:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        span.set(returncode=result.returncode)
+    if result.returncode != 0:
+        raise RuntimeError("无法获取 Yggdrasil 地址，请确保 Yggdrasil 已正确安装和运行。")
+    ygg_info = {line.split(":", 1)[0].strip(): line.split(":", 1)[1].strip() for line in result.stdout.splitlines()}
+    return ygg_info["IPv6 address"], ygg_info["IPv6 subnet"]
+
+
+def _connect_admin_socket(admin_socket: str, timeout: float) -> socket.socket:
+    # 支持 yggdrasil 配置中 AdminListen 的两种写法：unix:///path 与 tcp://host:port，也接受裸路径。
+    if admin_socket.startswith("tcp://"):
+        host, port = admin_socket[len("tcp://"):].rsplit(":", 1)
+        return socket.create_connection((host.strip("[]"), int(port)), timeout=timeout)
+    path = admin_socket[len("unix://"):] if admin_socket.startswith("unix://") else admin_socket
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _parse_getself_response(response: Any) -> tuple[str, str]:
+    # yggdrasil 0.5: {"address": ..., "subnet": ...}
+    if "address" in response and "subnet" in response:
+        return response["address"], response["subnet"]
+    # yggdrasil 0.4: {"self": {"<address>": {"subnet": ...}}}
+    if "self" in response:
+        address, info = next(iter(response["self"].items()))
+        return address, info["subnet"]
+    raise ValueError(f"Unexpected yggdrasil getself response: {response}")
+
+
+def query_admin_socket_getself(admin_socket: str, timeout: float = 2.0) -> tuple[str, str]:
+    """直接通过 yggdrasil 管理套接字执行 getself，返回 (address, subnet)。"""
+    request = json.dumps({"request": "getself", "keepalive": False}).encode("utf-8")
+    decoder = json.JSONDecoder()
+    buffer = b""
+    with _connect_admin_socket(admin_socket, timeout) as sock:
+        sock.sendall(request)
+        # 服务端可能不关闭连接，因此读到一个完整的 JSON 对象就停止。
+        while True:
+            chunk = sock.recv(65536)
+            if chunk:
+                buffer += chunk
+            try:
+                reply, _ = decoder.raw_decode(buffer.decode("utf-8").strip())
+                break
+            except ValueError:
+                if not chunk:
+                    raise ValueError("Incomplete reply from yggdrasil admin socket.")
+    if reply.get("status") != "success":
+        raise RuntimeError(f"yggdrasil admin socket returned an error: {reply.get('error')}")
+    return _parse_getself_response(reply["response"])
+
+
+def _query_host_identity() -> tuple[str, str]:
+    admin_socket = mb_config.yggdrasil.admin_socket
+    if admin_socket:
+        try:
+            return query_admin_socket_getself(admin_socket)
+        except (OSError, ValueError, RuntimeError, KeyError) as e:
+            mb_logger.warning(
+                f"Failed to query yggdrasil admin socket {admin_socket}: {e}, falling back to yggdrasilctl."
+            )
+    return _query_yggdrasilctl_getself()
+
+
+# 被监视文件的 stat 签名，文件不存在时记为 None。
+def _watch_files_signature() -> list[Optional[list]]:
+    signature: list[Optional[list]] = []
+    for file_path in mb_config.yggdrasil.watch_files:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append([file_path, st.st_ino, st.st_size, st.st_mtime_ns])
+    return signature
+
+
+def _read_state_file(watch_signature: list) -> Optional[tuple[str, str]]:
+    try:
+        with open(get_state_path(YGGDRASIL_STATE_FILE), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if (
+            state["watch"] == watch_signature
+            and 0 <= time.time() - state["fetched_at"] < mb_config.yggdrasil.cache_ttl
+        ):
+            return state["address"], state["subnet"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_state_file(identity: tuple[str, str], watch_signature: list) -> None:
+    state = {
+        "address": identity[0],
+        "subnet": identity[1],
+        "fetched_at": time.time(),
+        "watch": watch_signature,
+    }
+    try:
+        atomic_write_text(get_state_path(YGGDRASIL_STATE_FILE), json.dumps(state))
+    except OSError as e:
+        mb_logger.debug(f"Failed to write yggdrasil state file: {e}")
+
+
+# return addr, subnet
+def get_host_yggdrasil_address_and_subnet(refresh: bool = False) -> tuple[str, str]:
+    """
+    获取宿主机的 Yggdrasil IPv6 地址。
+    假设宿主机已经配置并运行了 Yggdrasil。
+    依次使用：mbctl 配置中的静态值、进程内缓存、storage_path/.mbctl 下的状态文件（未过期且 yggdrasil 配置未改变），
+    最后才真正查询 yggdrasil。refresh 为 True 时跳过缓存。
+    """
+    global _host_identity
+    ygg_config = mb_config.yggdrasil
+    if ygg_config.address and ygg_config.subnet:
+        return ygg_config.address, ygg_config.subnet
+    if _host_identity is not None and not refresh:
+        return _host_identity
+
+    watch_signature = _watch_files_signature()
+    identity = None if refresh else _read_state_file(watch_signature)
+    if identity is None:
+        identity = _query_host_identity()
+        _write_state_file(identity, watch_signature)
+    _host_identity = identity
+    return identity
+
+
+def string_to_host_ygg_subnet_v6addr(src_str: str) -> str:
+    """
+    计算宿主机的 Yggdrasil IPv6 地址。
+    假设宿主机已经配置并运行了 Yggdrasil。
+    """
+    ygg_address, ygg_subnet = get_host_yggdrasil_address_and_subnet()
+    return string_to_v6suffix(ygg_subnet, src_str)
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculate nspawn container IPv6 address.")
+    parser.add_argument("prefix", help="IPv6 前缀, e.g. '2001:db8:1:2::/64'")
+    parser.add_argument("container_name", help="容器名称, e.g. 'mycontainer'")
+    args = parser.parse_args()
+
+    print(string_to_v6suffix(args.prefix, args.container_name))
+
+if __name__ == "__main__":
+    main()
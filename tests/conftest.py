@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Mapping, Optional, Union
+
+import pytest
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBHost import MBHost
+from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
+from mbctl.datatypes import MBContainerConf, MountType
+
+FAKE_NERDCTL = Path(__file__).with_name("fake_nerdctl.py")
+
+
+class FakeNerdctl:
+    def __init__(self, bin_dir: Path, state_path: Path, log_path: Path) -> None:
+        self.path = (bin_dir / "nerdctl").as_posix()
+        self.state_path = state_path
+        self.log_path = log_path
+
+    def set_containers(self, containers: dict[str, bool]) -> None:
+        """容器名 -> 是否正在运行"""
+        self.state_path.write_text(
+            json.dumps({name: {"running": running} for name, running in containers.items()})
+        )
+
+    def containers(self) -> dict[str, bool]:
+        if not self.state_path.exists():
+            return {}
+        return {name: info["running"] for name, info in json.loads(self.state_path.read_text()).items()}
+
+    def calls(self) -> list[dict]:
+        if not self.log_path.exists():
+            return []
+        return [json.loads(line) for line in self.log_path.read_text().splitlines()]
+
+
+class EmptyNerdClient:
+    """没有任何容器的 nerdctl 客户端，用于只关心配置加载的测试。"""
+
+    def get_container_state(self, container_name: str) -> NerdContainerState:
+        return NerdContainerState.not_exist
+
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        return {}
+
+
+class StoppedNerdClient(EmptyNerdClient):
+    """所有容器都已停止的 nerdctl 客户端，用于需要删除或快照挂载目录的测试。"""
+
+    def get_container_state(self, container_name: str) -> NerdContainerState:
+        return NerdContainerState.stopped
+
+
+@pytest.fixture
+def empty_nerd_client() -> EmptyNerdClient:
+    return EmptyNerdClient()
+
+
+@pytest.fixture
+def stopped_nerd_client() -> StoppedNerdClient:
+    return StoppedNerdClient()
+
+
+@pytest.fixture
+def fake_nerdctl(tmp_path, monkeypatch) -> FakeNerdctl:
+    """在 PATH 最前面放一个假的 nerdctl 可执行文件，容器状态保存在临时目录中。"""
+    bin_dir = tmp_path / "fake-bin"
+    bin_dir.mkdir()
+    executable = bin_dir / "nerdctl"
+    executable.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_NERDCTL}" "$@"\n')
+    executable.chmod(0o755)
+
+    fake = FakeNerdctl(bin_dir, tmp_path / "fake-nerdctl-state.json", tmp_path / "fake-nerdctl-log.jsonl")
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("FAKE_NERDCTL_STATE", fake.state_path.as_posix())
+    monkeypatch.setenv("FAKE_NERDCTL_LOG", fake.log_path.as_posix())
+    monkeypatch.delenv("FAKE_NERDCTL_DELAY", raising=False)
+    monkeypatch.delenv("FAKE_NERDCTL_FAIL", raising=False)
+    return fake
+
+
+@pytest.fixture
+def write_conf(tmp_path):
+    """
+    返回 write(name, conf=None, storage=None, **fields)：把容器配置写入 storage（默认 tmp_path）的配置目录，返回配置文件路径。
+    conf 为 None 时写入以 example/<name>:latest 为镜像、以 fields 为其余字段的配置。
+    """
+
+    def write(
+        name: str, conf: Optional[MBContainerConf] = None, storage: Optional[Path] = None, **fields: Any
+    ) -> str:
+        if conf is None:
+            conf = MBContainerConf(image=f"example/{name}:latest", **fields)
+        conf_path = (storage or tmp_path) / MountType.conf.value / name / mb_config.config_file
+        conf_path.parent.mkdir(parents=True, exist_ok=True)
+        conf.to_yaml_file(conf_path.as_posix())
+        return conf_path.as_posix()
+
+    return write
+
+
+@pytest.fixture
+def make_host(tmp_path, monkeypatch, write_conf):
+    """
+    返回 make(client, confs={}, storage=None, **host_args)：把 mb_config.storage_path 指向 storage（默认 tmp_path），
+    写入 confs 后创建 MBHost。confs 为容器名 -> 配置，或容器名 -> 依赖列表（写入 write_conf 的默认配置）。
+    """
+
+    def make(
+        client: Any,
+        confs: Mapping[str, Union[MBContainerConf, list[str]]] = {},
+        storage: Optional[Path] = None,
+        yggaddr: str = "ygg",
+        yggprefix: str = "2001:db8::/64",
+    ) -> MBHost:
+        monkeypatch.setattr(mb_config, "storage_path", (storage or tmp_path).as_posix())
+        for name, conf in confs.items():
+            if isinstance(conf, MBContainerConf):
+                write_conf(name, conf, storage=storage)
+            else:
+                write_conf(name, storage=storage, require=conf)
+        return MBHost(client=client, yggaddr=yggaddr, yggprefix=yggprefix)
+
+    return make
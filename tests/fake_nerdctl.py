@@ -0,0 +1,158 @@
+"""
+A fake `nerdctl` executable for tests.
+
+It keeps container states in a JSON file ($FAKE_NERDCTL_STATE), appends every
+invocation to a JSON-lines log ($FAKE_NERDCTL_LOG), sleeps $FAKE_NERDCTL_DELAY
+seconds per call and fails for containers listed in $FAKE_NERDCTL_FAIL.
+Containers whose state has "ignore_sigterm" survive `kill -s SIGTERM`, a
+"stop_signal" is reported as the nerdctl/stop-signal label and only that
+signal (or SIGKILL) stops the container, and "unkillable" containers survive
+every signal.
+Only the subcommands mbctl uses are implemented.
+"""
+
+import fcntl
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def locked_state():
+    state_path = os.environ["FAKE_NERDCTL_STATE"]
+    with open(state_path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        yield state
+        # 原子地替换状态文件：超时的 nerdctl wait 会被 subprocess 杀死，不能留下写了一半的状态文件
+        with open(state_path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(state_path + ".tmp", state_path)
+
+
+def compose_service_names(compose_file: str) -> list[str]:
+    import yaml
+
+    with open(compose_file) as f:
+        services = yaml.safe_load(f)["services"]
+    return [svc.get("container_name", name) for name, svc in services.items()]
+
+
+def wait(names: list[str], failing: set[str]) -> int:
+    # 轮询直到所有容器都不在运行，轮询之间不持有状态锁，这样 kill 可以在 wait 期间执行
+    while True:
+        with locked_state() as state:
+            if any(name not in state or name in failing for name in names):
+                print("no such container", file=sys.stderr)
+                return 1
+            if not any(state[name]["running"] for name in names):
+                for _ in names:
+                    print(0)
+                return 0
+        time.sleep(0.01)
+
+
+def _stopped_by(info: dict, signal: str) -> bool:
+    if info.get("unkillable"):
+        return False
+    if signal == "SIGKILL":
+        return True
+    if signal == "SIGTERM" and info.get("ignore_sigterm"):
+        return False
+    return signal == info.get("stop_signal", "SIGTERM")
+
+
+def run(args: list[str]) -> int:
+    failing = set(filter(None, os.environ.get("FAKE_NERDCTL_FAIL", "").split(",")))
+    if args[0] == "wait":
+        return wait(args[1:], failing)
+    with locked_state() as state:
+        cmd = args[0]
+        if cmd == "ps":
+            show_all = "-a" in args
+            for name, info in state.items():
+                if info["running"] or show_all:
+                    status = "Up 1 second" if info["running"] else "Exited (0) 1 second ago"
+                    if "{{json .Names}}" in " ".join(args):
+                        print(json.dumps(name))
+                    else:
+                        print(json.dumps({"Names": name, "Status": status}))
+            return 0
+        if cmd == "inspect" and "{{json .Config.Labels}}" in args:
+            names = args[args.index("{{json .Config.Labels}}") + 1 :]
+            if any(name not in state for name in names):
+                print("no such container", file=sys.stderr)
+                return 1
+            for name in names:
+                stop_signal = state[name].get("stop_signal")
+                print(json.dumps({"nerdctl/stop-signal": stop_signal} if stop_signal else {}))
+            return 0
+        if cmd == "inspect":
+            name = args[-1]
+            if name not in state:
+                print(f"no such container: {name}", file=sys.stderr)
+                return 1
+            if "{{.State.Pid}}" in args:
+                print(state[name].get("pid", 4242) if state[name]["running"] else 0)
+            else:
+                print("true" if state[name]["running"] else "false")
+            return 0
+        if cmd in ("start", "stop", "kill", "wait", "rm"):
+            names = [a for a in args[1:] if not a.startswith("-")]
+            if cmd == "kill" and "-s" in args:
+                names.remove(args[args.index("-s") + 1])
+            for name in names:
+                if name not in state or name in failing:
+                    print(f"failed to {cmd} {name}", file=sys.stderr)
+                    return 1
+                if cmd == "start":
+                    state[name]["running"] = True
+                elif cmd == "kill" and not _stopped_by(state[name], args[args.index("-s") + 1] if "-s" in args else "SIGKILL"):
+                    continue
+                elif cmd in ("stop", "kill"):
+                    state[name]["running"] = False
+                elif cmd == "wait":
+                    print(0)
+                elif cmd == "rm":
+                    del state[name]
+            return 0
+        if cmd == "image" and args[1] == "inspect":
+            print("sha256:" + args[-1].encode().hex())
+            return 0
+        if cmd == "rename":
+            old, new = args[1], args[2]
+            state[new] = state.pop(old)
+            return 0
+        if cmd == "compose":
+            compose_file = args[args.index("-f") + 1] if "-f" in args else "compose.yaml"
+            names = compose_service_names(compose_file)
+            if failing & set(names):
+                print(f"compose up failed for {sorted(failing & set(names))}", file=sys.stderr)
+                return 1
+            for name in names:
+                state[name] = {"running": True}
+            return 0
+    print(f"fake nerdctl: unsupported command {args}", file=sys.stderr)
+    return 2
+
+
+def main() -> int:
+    start = time.time()
+    time.sleep(float(os.environ.get("FAKE_NERDCTL_DELAY", "0")))
+    rc = run(sys.argv[1:])
+    log_path = os.environ.get("FAKE_NERDCTL_LOG")
+    if log_path:
+        entry = {"args": sys.argv[1:], "cwd": os.getcwd(), "start": start, "end": time.time(), "rc": rc}
+        with open(log_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
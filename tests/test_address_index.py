@@ -0,0 +1,82 @@
+import ipaddress
+import logging
+
+import pytest
+
+from mbctl.datatypes import MBContainerConf
+from mbctl.network import string_to_v6suffix
+
+PREFIX = "2001:db8::/64"
+# 只剩 8 位主机位，很容易找到冲突的名字
+SMALL_PREFIX = "2001:db8::/120"
+
+
+def _colliding_names(prefix: str) -> tuple[str, str]:
+    seen: dict[str, str] = {}
+    for i in range(1000):
+        name = f"ct{i}"
+        address = string_to_v6suffix(prefix, name)
+        if address in seen:
+            return seen[address], name
+        seen[address] = name
+    raise AssertionError("no collision found")
+
+
+def test_whois_finds_containers_and_referenced_names(make_host, empty_nerd_client):
+    host = make_host(
+        empty_nerd_client,
+        {
+            "web": MBContainerConf(image="example/web", local_access={"db"}, dns="resolver"),
+            "db": MBContainerConf(image="example/db"),
+        },
+    )
+
+    web_address = host.get_mbcontainer("web").yggdrasil_addr
+    assert host.whois(web_address) == [
+        {"name": "web", "address": web_address, "container": True, "referenced_by": []}
+    ]
+    # 地址的其他写法也能查到
+    assert host.whois(ipaddress.IPv6Address(web_address).exploded)[0]["name"] == "web"
+
+    db_entry = host.whois(string_to_v6suffix(PREFIX, "db"))[0]
+    assert db_entry["container"] and db_entry["referenced_by"] == ["web"]
+    resolver_entry = host.whois(string_to_v6suffix(PREFIX, "resolver"))[0]
+    assert not resolver_entry["container"] and resolver_entry["referenced_by"] == ["web"]
+
+    assert host.whois("2001:db8::1") == []
+    with pytest.raises(ValueError):
+        host.whois("not-an-address")
+
+
+def test_collisions_are_reported_at_load(make_host, caplog, empty_nerd_client):
+    first, second = _colliding_names(SMALL_PREFIX)
+    confs = {
+        first: MBContainerConf(image="example/a"),
+        "other": MBContainerConf(image="example/b", local_access={second}),
+    }
+
+    with caplog.at_level(logging.WARNING, logger="mbctl"):
+        host = make_host(empty_nerd_client, confs, yggprefix=SMALL_PREFIX)
+
+    address = string_to_v6suffix(SMALL_PREFIX, first)
+    assert host.address_index.collisions() == {address: sorted([first, second])}
+    assert any("collision" in r.getMessage() and address in r.getMessage() for r in caplog.records)
+    assert [e["name"] for e in host.whois(address)] == sorted([first, second])
+
+
+def test_index_follows_incremental_reload_and_unload(make_host, write_conf, empty_nerd_client):
+    host = make_host(empty_nerd_client, {"web": MBContainerConf(image="example/web", local_access={"cache"})})
+    cache_address = string_to_v6suffix(PREFIX, "cache")
+    assert host.whois(cache_address)[0]["referenced_by"] == ["web"]
+
+    write_conf("web", MBContainerConf(image="example/web"))
+    host.reload_container("web")
+    assert host.whois(cache_address) == []
+
+    write_conf("api", MBContainerConf(image="example/api"))
+    host.reload_container("api")
+    api_address = host.get_mbcontainer("api").yggdrasil_addr
+    assert host.whois(api_address)[0]["container"]
+
+    host.unload_container("api")
+    assert host.whois(api_address) == []
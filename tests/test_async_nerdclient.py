@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import time
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import MBContainerStatus
+from mbctl.MBHost.AsyncMBHost import AsyncMBHost
+from mbctl.MBHost.MBContainerBuildResult import MBContainerBuildState
+from mbctl.MBHost.NerdClient import AsyncNerdClient, NerdClient, NerdContainerState
+
+
+def _max_overlap(calls: list[dict]) -> int:
+    edges = sorted([(c["start"], 1) for c in calls] + [(c["end"], -1) for c in calls])
+    current = peak = 0
+    for _, delta in edges:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def test_async_client_container_lifecycle(fake_nerdctl):
+    fake_nerdctl.set_containers({"web": False})
+    client = AsyncNerdClient()
+
+    async def scenario():
+        assert await client.get_container_state("web") == NerdContainerState.stopped
+        assert await client.get_container_state("ghost") == NerdContainerState.not_exist
+        await client.start_container("web")
+        assert await client.get_all_container_states() == {"web": NerdContainerState.running}
+        assert await client.get_container_pid("web") == "4242"
+        await client.rename_container("web", "web-old")
+        assert await client.list_all_containers_names() == ["web-old"]
+        await client.force_delete_container("web-old")
+
+    asyncio.run(scenario())
+    assert fake_nerdctl.containers() == {}
+
+
+def test_async_client_limits_concurrency(fake_nerdctl, monkeypatch):
+    monkeypatch.setenv("FAKE_NERDCTL_DELAY", "0.3")
+    fake_nerdctl.set_containers({f"c{i}": False for i in range(8)})
+    client = AsyncNerdClient(max_concurrency=4)
+
+    async def scenario():
+        return await asyncio.gather(*(client.get_container_state(f"c{i}") for i in range(8)))
+
+    states = asyncio.run(scenario())
+
+    assert states == [NerdContainerState.stopped] * 8
+    calls = fake_nerdctl.calls()
+    assert len(calls) == 8
+    assert _max_overlap(calls) <= 4
+
+
+def test_async_client_is_reusable_across_event_loops(fake_nerdctl):
+    fake_nerdctl.set_containers({f"c{i}": True for i in range(4)})
+    client = AsyncNerdClient(max_concurrency=2)
+
+    async def scenario():
+        # 调用数多于并发上限，信号量上会有等待者；绑定到旧事件循环的信号量会让等待者永远挂起
+        calls = asyncio.gather(*(client.get_container_state(f"c{i}") for i in range(4)))
+        return await asyncio.wait_for(calls, timeout=30)
+
+    for _ in range(2):
+        assert asyncio.run(scenario()) == [NerdContainerState.running] * 4
+
+
+def test_async_client_cancellation_kills_nerdctl(fake_nerdctl, monkeypatch):
+    monkeypatch.setenv("FAKE_NERDCTL_DELAY", "5")
+    client = AsyncNerdClient()
+
+    async def scenario():
+        task = asyncio.create_task(client.get_container_state("web"))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    start = time.perf_counter()
+    assert asyncio.run(scenario())
+    assert time.perf_counter() - start < 2.0
+    # 被杀死的 nerdctl 来不及写调用日志
+    assert fake_nerdctl.calls() == []
+
+
+def test_async_client_stop_containers(fake_nerdctl):
+    fake_nerdctl.state_path.write_text(
+        json.dumps(
+            {
+                "web": {"running": True},
+                "init": {"running": True, "stop_signal": "SIGRTMIN+3", "ignore_sigterm": True},
+                "stuck": {"running": True, "ignore_sigterm": True},
+            }
+        )
+    )
+    client = AsyncNerdClient()
+
+    killed = asyncio.run(client.stop_containers(["web", "init", "stuck"], timeout=1.5))
+
+    assert killed == ["stuck"]
+    assert fake_nerdctl.containers() == {"web": False, "init": False, "stuck": False}
+    kills = [tuple(call["args"][2:]) for call in fake_nerdctl.calls() if call["args"][0] == "kill"]
+    assert sorted(kills) == [("SIGKILL", "stuck"), ("SIGRTMIN+3", "init"), ("SIGTERM", "web", "stuck")]
+
+
+def test_async_client_compose_create_container_safe(fake_nerdctl, monkeypatch, tmp_path):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    monkeypatch.setenv("FAKE_NERDCTL_FAIL", "broken")
+    client = AsyncNerdClient()
+
+    async def scenario():
+        ok = await client.compose_create_container_safe({"services": {"web": {"container_name": "web"}}})
+        failed = await client.compose_create_container_safe(
+            {"services": {"broken": {"container_name": "broken"}}}, project_name="broken-shell"
+        )
+        return ok, failed
+
+    ok, failed = asyncio.run(scenario())
+
+    assert ok == 0 and failed != 0
+    assert fake_nerdctl.containers() == {"web": True}
+    compose_calls = [call for call in fake_nerdctl.calls() if call["args"][0] == "compose"]
+    assert [call["args"][4] for call in compose_calls] == ["web", "broken-shell"]
+    # 临时项目目录在 compose up 之后被删除
+    assert not os.path.exists(compose_calls[1]["cwd"])
+
+
+def test_async_host_builds_in_dependency_order(monkeypatch, fake_nerdctl, make_host):
+    host = make_host(NerdClient(), {"a": [], "b": [], "c": ["a", "b"], "d": ["c"]})
+    monkeypatch.setenv("FAKE_NERDCTL_FAIL", "b")
+    async_host = AsyncMBHost(host)
+
+    results = asyncio.run(async_host.build_all_containers())
+
+    by_name = {r.name: r for r in results}
+    assert by_name["a"].state == MBContainerBuildState.succeeded
+    assert by_name["b"].state == MBContainerBuildState.failed
+    assert by_name["c"].state == MBContainerBuildState.cancelled
+    assert by_name["c"].failed_dependency == "b"
+    assert by_name["d"].state == MBContainerBuildState.cancelled
+    assert by_name["d"].failed_dependency == "b"
+    assert fake_nerdctl.containers() == {"a": True}
+
+
+def test_async_host_list_and_autostart(fake_nerdctl, make_host):
+    host = make_host(NerdClient(), {"a": [], "b": [], "c": []})
+    fake_nerdctl.set_containers({"a": False, "b": False})
+    async_host = AsyncMBHost(host)
+
+    containers = asyncio.run(async_host.list_containers())
+    assert {c.name: c.status for c in containers} == {
+        "a": MBContainerStatus.stopped,
+        "b": MBContainerStatus.stopped,
+        "c": MBContainerStatus.never,
+    }
+
+    errors = asyncio.run(async_host.autostart())
+    assert errors["a"] is None and errors["b"] is None
+    assert errors["c"] is not None  # 从未创建的容器无法启动
+    assert host.get_mbcontainer("a").status == MBContainerStatus.running
+    assert fake_nerdctl.containers() == {"a": True, "b": True}
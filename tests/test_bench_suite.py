@@ -0,0 +1,41 @@
+from benchmarks.bench_suite import compare, run
+from benchmarks.synthetic_host import SyntheticHostSpec, make_container_confs
+from mbctl.MBConfig import mb_config
+
+
+def test_synthetic_host_shape():
+    confs = make_container_confs(SyntheticHostSpec(count=60, depth=3, max_requires=2, local_access=5))
+    names = list(confs)
+    assert len(names) == 60
+    # 第一层没有依赖，依赖总是在前面
+    assert all(not conf.require for conf in list(confs.values())[:20])
+    assert all(names.index(dep) < names.index(name) for name, conf in confs.items() for dep in conf.require)
+    assert any(conf.require for conf in confs.values())
+    assert all(len(conf.local_access) == 5 for conf in confs.values())
+    for conf in confs.values():
+        references = [p.source for p in conf.mount.data.values() if p.source]
+        assert all(ref.split(":")[0] in conf.require for ref in references)
+
+
+def test_suite_runs_and_restores_config():
+    storage_path = mb_config.storage_path
+    results = run([12], latency=0.0, jobs=4, repeat=1, cli_repeat=0)
+    assert mb_config.storage_path == storage_path
+    assert set(results["hosts"]["12"]) == {
+        "host_load",
+        "host_load_cached",
+        "tree_build_resolve",
+        "render_compose",
+        "build_all",
+        "list",
+    }
+
+
+def test_compare_flags_regressions():
+    baseline = {"hosts": {"10": {"host_load": 1.0, "list": 1.0}}, "cli_startup": {"help": 0.2}}
+    current = {"hosts": {"10": {"host_load": 1.5, "list": 0.9}}, "cli_startup": {}}
+    rows = compare(baseline, current, threshold=0.2)
+    assert [(r["name"], r["regression"]) for r in rows] == [
+        ("hosts.10.host_load", True),
+        ("hosts.10.list", False),
+    ]
@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from mbctl.cli.main import COMMAND_NAMES
+
+HEAVY_MODULES = ["typer", "pydantic", "yaml", "prettytable", "mbctl.MBHost"]
+
+CHECK_SCRIPT = """
+import os
+import sys
+
+def fake_execvp(file, args):
+    print("EXEC:" + " ".join(args))
+    sys.exit(3)
+
+os.execvp = fake_execvp
+sys.argv = ["mbctl"] + sys.argv[1:]
+from mbctl.cli.main import main
+try:
+    main()
+except SystemExit as e:
+    code = e.code
+else:
+    code = 0
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print("LOADED:" + ",".join(loaded))
+sys.exit(code)
+""".format(heavy=HEAVY_MODULES)
+
+
+def _run_cli(args: list[str], env: dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", CHECK_SCRIPT, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+
+
+def test_command_names_match_registered_commands():
+    from mbctl.cli.commands import app
+
+    assert {c.name for c in app.registered_commands} == COMMAND_NAMES
+
+
+def test_version_does_not_load_heavy_modules():
+    proc = _run_cli(["--version"], dict(os.environ))
+
+    assert proc.returncode == 0
+    assert "mbctl v" in proc.stdout
+    assert "LOADED:\n" in proc.stdout
+
+
+def test_passthrough_does_not_load_heavy_modules():
+    proc = _run_cli(["ps", "-a"], dict(os.environ))
+
+    assert proc.returncode == 3
+    assert "EXEC:nerdctl ps -a\n" in proc.stdout
+    assert "LOADED:\n" in proc.stdout
+
+
+def test_stop_passes_through_to_nerdctl():
+    # 脚本把 mbctl 当作 nerdctl 使用，mbctl stop 必须保持 nerdctl stop 的行为（包括不由 mbctl 管理的容器和 --time）
+    proc = _run_cli(["stop", "--time", "5", "web"], dict(os.environ))
+
+    assert proc.returncode == 3
+    assert "EXEC:nerdctl stop --time 5 web\n" in proc.stdout
+
+
+def test_passthrough_returns_nerdctl_exit_code(tmp_path: Path):
+    fake_nerdctl = tmp_path / "nerdctl"
+    fake_nerdctl.write_text("#!/bin/sh\nexit 3\n")
+    fake_nerdctl.chmod(0o755)
+    env = dict(os.environ)
+    env["PATH"] = f"{tmp_path}{os.pathsep}{env.get('PATH', '')}"
+
+    proc = subprocess.run([sys.executable, "-m", "mbctl", "ps"], env=env)
+
+    assert proc.returncode == 3
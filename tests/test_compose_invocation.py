@@ -0,0 +1,123 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import MBContainer
+from mbctl.MBHost.NerdClient import AsyncNerdClient, NerdClient
+from mbctl.MBHost.NerdClient.ComposeProjectDir import get_compose_project_name
+from mbctl.datatypes import MBContainerConf
+
+PREFIX = "300:64f7:cae4:9395::/64"
+NAMES = [f"svc{i}" for i in range(12)]
+
+
+def _compose_conf(name: str, **extra_compose_configs):
+    container = MBContainer(
+        name,
+        MBContainerConf(image=f"example/{name}:latest", extra_compose_configs=extra_compose_configs),
+        PREFIX,
+    )
+    container.resolve_references()
+    return container.to_compose_dict()
+
+
+def _project_dir(storage_path: Path, name: str) -> Path:
+    return storage_path / ".mbctl" / "compose" / name
+
+
+def test_concurrent_compose_up_uses_per_container_project_dirs(tmp_path, monkeypatch, fake_nerdctl):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    monkeypatch.setenv("FAKE_NERDCTL_DELAY", "0.05")
+    client = NerdClient()
+    cwd = os.getcwd()
+
+    with ThreadPoolExecutor(max_workers=len(NAMES)) as pool:
+        list(pool.map(lambda name: client.compose_create_container(_compose_conf(name)), NAMES))
+
+    assert os.getcwd() == cwd
+    assert fake_nerdctl.containers() == {name: True for name in NAMES}
+    for call in fake_nerdctl.calls():
+        args = call["args"]
+        compose_file = Path(args[args.index("-f") + 1])
+        project = args[args.index("-p") + 1]
+        # 每个 nerdctl 子进程都在自己容器的项目目录中运行
+        assert compose_file == _project_dir(tmp_path, project) / "compose.yaml"
+        assert call["cwd"] == compose_file.parent.as_posix()
+        assert list(yaml.safe_load(compose_file.read_text())["services"]) == [project]
+
+
+def test_similar_names_get_separate_project_dirs(tmp_path, monkeypatch, fake_nerdctl):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    client = NerdClient()
+    names = ["web-a", "web.a", "Web-a"]
+
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        list(pool.map(lambda name: client.compose_create_container(_compose_conf(name)), names))
+
+    assert fake_nerdctl.containers() == {name: True for name in names}
+    assert len({call["cwd"] for call in fake_nerdctl.calls()}) == len(names)
+
+
+def test_project_dir_is_reused(tmp_path, monkeypatch, fake_nerdctl):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    client = NerdClient()
+
+    assert client.compose_create_container_safe(_compose_conf("web")) == 0
+    fake_nerdctl.set_containers({})
+    monkeypatch.setenv("FAKE_NERDCTL_FAIL", "web")
+    assert client.compose_create_container_safe(_compose_conf("web")) == 1
+
+    assert [p.name for p in (tmp_path / ".mbctl" / "compose").iterdir()] == ["web"]
+    assert sorted(p.name for p in _project_dir(tmp_path, "web").iterdir()) == ["compose.yaml"]
+    first, second = fake_nerdctl.calls()
+    assert first["args"] == second["args"] and first["cwd"] == second["cwd"]
+
+
+def test_temporary_project_leaves_project_dir_alone(tmp_path, monkeypatch, fake_nerdctl):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    client = NerdClient()
+    client.compose_create_container(_compose_conf("web"))
+    compose_file = _project_dir(tmp_path, "web") / "compose.yaml"
+    original = compose_file.read_text()
+
+    fake_nerdctl.set_containers({})
+    shell_conf = _compose_conf("web", tty=True, stdin_open=True)
+    assert client.compose_create_container_safe(shell_conf, project_name="web-mbctl-shell-1") == 0
+
+    assert compose_file.read_text() == original
+    assert [p.name for p in (tmp_path / ".mbctl" / "compose").iterdir()] == ["web"]
+    args = fake_nerdctl.calls()[-1]["args"]
+    assert args[args.index("-p") + 1] == "web-mbctl-shell-1"
+    assert not os.path.exists(args[args.index("-f") + 1])
+
+
+def test_async_compose_up_uses_project_dir(tmp_path, monkeypatch, fake_nerdctl):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    client = AsyncNerdClient(max_concurrency=4)
+
+    async def main():
+        await asyncio.gather(*(client.compose_create_container(_compose_conf(name)) for name in NAMES))
+
+    asyncio.run(main())
+
+    assert fake_nerdctl.containers() == {name: True for name in NAMES}
+    assert {call["cwd"] for call in fake_nerdctl.calls()} == {
+        _project_dir(tmp_path, name).as_posix() for name in NAMES
+    }
+
+
+def test_project_names():
+    assert get_compose_project_name(["web"]) == "web"
+    assert get_compose_project_name(["web_1-a"]) == "web_1-a"
+    # 需要改写的名字带上原名的摘要，不同的容器名不会落到同一个项目目录
+    colliding = ["web-a", "web.a", "Web-a", "WEB.A", "web", "Web"]
+    projects = [get_compose_project_name([name]) for name in colliding]
+    assert len(set(projects)) == len(colliding)
+    assert projects[1].startswith("web-a-") and projects[5].startswith("web-")
+    multi = get_compose_project_name(["web", "db"])
+    assert multi == get_compose_project_name(["db", "web"])
+    assert multi.startswith("mbctl-project-") and multi != get_compose_project_name(["web", "cache"])
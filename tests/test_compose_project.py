@@ -0,0 +1,134 @@
+import pytest
+
+from mbctl.MBHost.NerdClient import SimulatedNerdClient
+from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
+from mbctl.datatypes import (
+    ComposeConf,
+    ComposeNetworkConfig,
+    ComposeServiceConf,
+    MBContainerConf,
+)
+
+
+def _service(name: str) -> ComposeServiceConf:
+    return ComposeServiceConf(
+        image=f"example/{name}", container_name=name, hostname=name, restart="no"
+    )
+
+
+def test_merge_keeps_extra_configs_per_service():
+    a = ComposeConf(
+        extra_compose_configs={"tty": True},
+        services={"a": _service("a")},
+        networks={"man8s": ComposeNetworkConfig(external=True)},
+    )
+    b = ComposeConf(
+        extra_compose_configs={"cap_add": ["NET_ADMIN"]},
+        services={"b": _service("b")},
+        networks={"man8s": ComposeNetworkConfig(external=True)},
+    )
+
+    services = ComposeConf.merge([a, b]).to_compose_dict()["services"]
+
+    assert services["a"]["tty"] is True and "cap_add" not in services["a"]
+    assert services["b"]["cap_add"] == ["NET_ADMIN"] and "tty" not in services["b"]
+
+
+def test_merge_rejects_duplicate_services():
+    a = ComposeConf(services={"a": _service("a")})
+    with pytest.raises(ValueError, match="Duplicate"):
+        ComposeConf.merge([a, ComposeConf(services={"a": _service("a")})])
+    with pytest.raises(ValueError, match="Duplicate"):
+        ComposeConf.merge_compose_dicts([a.to_compose_dict(), a.to_compose_dict()])
+
+
+def test_merge_compose_dicts_matches_merge():
+    a = ComposeConf(
+        extra_compose_configs={"tty": True},
+        services={"a": _service("a")},
+        networks={"man8s": ComposeNetworkConfig(external=True)},
+    )
+    b = ComposeConf(services={"b": _service("b")}, networks={"man8s": ComposeNetworkConfig(external=True)})
+
+    merged = ComposeConf.merge_compose_dicts([a.to_compose_dict(), b.to_compose_dict()])
+
+    assert merged == ComposeConf.merge([a, b]).to_compose_dict()
+    with pytest.raises(ValueError, match="Conflicting"):
+        ComposeConf.merge_compose_dicts(
+            [a.to_compose_dict(), {"networks": {"man8s": {"external": False}}}]
+        )
+
+
+class ProjectNerdClient:
+    def __init__(self) -> None:
+        self.composed: list[dict] = []
+
+    def get_container_state(self, container_name: str) -> NerdContainerState:
+        return NerdContainerState.not_exist
+
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        return {}
+
+    def get_image_id(self, image: str) -> str:
+        return f"sha256:{image}"
+
+    def compose_create_container(self, compose_dict: dict) -> None:
+        self.composed.append(compose_dict)
+
+
+def _labelled(tree: dict[str, list[str]]) -> dict[str, MBContainerConf]:
+    return {
+        name: MBContainerConf(
+            image=f"example/{name}:latest",
+            require=require,
+            extra_compose_configs={"labels": {"app": name}},
+        )
+        for name, require in tree.items()
+    }
+
+
+def test_compose_up_project_uses_one_compose_invocation(make_host):
+    client = ProjectNerdClient()
+    host = make_host(client, _labelled({"db": [], "cache": [], "web": ["db", "cache"], "other": []}))
+
+    names = host.compose_up_project()
+
+    assert sorted(names) == ["cache", "db", "other", "web"]
+    assert len(client.composed) == 1
+    services = client.composed[0]["services"]
+    assert services["web"]["depends_on"] == ["cache", "db"]
+    assert "depends_on" not in services["db"]
+    assert {name: svc["labels"] for name, svc in services.items()} == {
+        name: {"app": name} for name in names
+    }
+
+
+def test_compose_up_project_dependency_closure(make_host):
+    client = ProjectNerdClient()
+    host = make_host(client, _labelled({"db": [], "web": ["db"], "proxy": ["web"], "other": []}))
+
+    names = host.compose_up_project("web")
+
+    assert names == ["db", "web"]
+    assert list(client.composed[0]["services"]) == ["db", "web"]
+
+
+def test_compose_up_project_leaves_existing_containers_alone(make_host):
+    client = SimulatedNerdClient()
+    host = make_host(client, {"db": [], "cache": [], "web": ["db", "cache"]})
+    host.build_new_container("db")
+    host.build_new_container("cache")
+    client.stop_and_wait_container("cache")
+
+    names = host.compose_up_project("web")
+
+    assert sorted(names) == ["cache", "db", "web"]
+    # 只有尚不存在的 web 由合并的项目创建，停止的 cache 被单独启动
+    assert [call.target for call in client.calls_of("compose_create_container")] == ["db", "cache", "web"]
+    assert [call.target for call in client.calls_of("start_container")] == ["cache"]
+    assert client.states == {name: NerdContainerState.running for name in ("db", "cache", "web")}
+    # 已存在的容器仍属于自己的项目，之后可以单独重建
+    assert client.containers["db"].project == "db"
+    host.client.force_delete_container("web")
+    host.build_new_container("web")
+    assert client.containers["web"].project == "web"
@@ -0,0 +1,125 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+from mbctl.datatypes import MBContainerConf
+from mbctl.MBHost.MBContainerConfCache import MBContainerConfCache, _cache_key
+
+
+def test_unchanged_conf_skips_validation(tmp_path, monkeypatch, write_conf):
+    conf_path = write_conf("web", MBContainerConf(image="example/web:1", port=[(80, 8080)]))
+    cache = MBContainerConfCache(cache_dir=(tmp_path / "cache").as_posix())
+    first = cache.load("web", conf_path)
+
+    def fail_validate(*args, **kwargs):
+        raise AssertionError("cached config must not be re-validated")
+
+    monkeypatch.setattr(MBContainerConf, "model_validate", fail_validate)
+    # a second cache object stands in for a later mbctl process
+    second = MBContainerConfCache(cache_dir=(tmp_path / "cache").as_posix()).load(
+        "web", conf_path
+    )
+
+    assert second == first
+    assert second.port == [(80, 8080)]
+
+
+def test_changed_conf_is_reloaded(tmp_path, write_conf):
+    conf_path = write_conf("web", MBContainerConf(image="example/web:1"))
+    cache = MBContainerConfCache(cache_dir=(tmp_path / "cache").as_posix())
+    assert cache.load("web", conf_path).image == "example/web:1"
+
+    write_conf("web", MBContainerConf(image="example/web:2"))
+    st = os.stat(conf_path)
+    # make sure the signature changes even on filesystems with coarse mtimes
+    os.utime(conf_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+
+    assert cache.load("web", conf_path).image == "example/web:2"
+
+
+def test_model_source_change_invalidates_entries(tmp_path, monkeypatch, write_conf):
+    # mbctl.MBHost 重新导出了同名的类，从 sys.modules 取模块本身
+    cache_module = sys.modules[MBContainerConfCache.__module__]
+    source_dir = tmp_path / "datatypes"
+    shutil.copytree(cache_module._CONF_SOURCE_DIR, source_dir, ignore=shutil.ignore_patterns("__pycache__"))
+    monkeypatch.setattr(cache_module, "_CONF_SOURCE_DIR", source_dir.as_posix())
+    _cache_key.cache_clear()
+    conf_path = write_conf("web", MBContainerConf(image="example/web:1"))
+    cache = MBContainerConfCache(cache_dir=(tmp_path / "cache").as_posix())
+    cache.load("web", conf_path)
+
+    # an upgraded mbctl whose MBContainerConf gained a field
+    with open(source_dir / "MBContainerConf.py", "a") as f:
+        f.write("\n# new_field: Optional[str] = None\n")
+    _cache_key.cache_clear()
+    validated = []
+    original_validate = MBContainerConf.model_validate
+    monkeypatch.setattr(
+        MBContainerConf,
+        "model_validate",
+        classmethod(lambda cls, *a, **kw: validated.append(1) or original_validate(*a, **kw)),
+    )
+    try:
+        assert cache.load("web", conf_path).image == "example/web:1"
+    finally:
+        _cache_key.cache_clear()
+
+    assert validated
+
+
+def test_corrupt_entry_is_treated_as_miss(tmp_path, write_conf):
+    conf_path = write_conf("web", MBContainerConf(image="example/web:1"))
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "web.pickle").write_bytes(b"not a pickle")
+    cache = MBContainerConfCache(cache_dir=cache_dir.as_posix())
+
+    assert cache.load("web", conf_path).image == "example/web:1"
+    assert cache.load("web", conf_path).image == "example/web:1"
+
+
+def test_invalid_conf_is_not_cached(tmp_path):
+    conf_file = tmp_path / "conf" / "web" / "container.yaml"
+    conf_file.parent.mkdir(parents=True)
+    conf_file.write_text("enable_ygg: true\n")
+    cache = MBContainerConfCache(cache_dir=(tmp_path / "cache").as_posix())
+
+    with pytest.raises(ValueError):
+        cache.load("web", conf_file.as_posix())
+    assert not (tmp_path / "cache" / "web.pickle").exists()
+
+
+def test_prune_removes_stale_entries(tmp_path, write_conf):
+    cache_dir = tmp_path / "cache"
+    cache = MBContainerConfCache(cache_dir=cache_dir.as_posix())
+    for name in ["web", "gone"]:
+        cache.load(name, write_conf(name, MBContainerConf(image=f"example/{name}:1")))
+
+    cache.prune(["web"])
+
+    assert sorted(os.listdir(cache_dir)) == ["web.pickle"]
+
+
+def test_concurrent_readers_and_writers(tmp_path, write_conf):
+    from concurrent.futures import ThreadPoolExecutor
+
+    conf_path = write_conf("web", MBContainerConf(image="example/web:1"))
+    cache_dir = (tmp_path / "cache").as_posix()
+
+    def load_many(worker: int) -> set[str]:
+        images = set()
+        for i in range(50):
+            if worker == 0 and i % 5 == 0:
+                # one writer keeps invalidating the entry while others read it
+                st = os.stat(conf_path)
+                os.utime(conf_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+            images.add(MBContainerConfCache(cache_dir=cache_dir).load("web", conf_path).image)
+        return images
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(load_many, range(8)))
+
+    assert all(images == {"example/web:1"} for images in results)
+    assert [n for n in os.listdir(cache_dir) if n.startswith(".tmp-")] == []
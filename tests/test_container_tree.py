@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+
+import pytest
+
+from mbctl.MBContainer import MBContainerTree
+
+
+@dataclass
+class StubContainer:
+    name: str
+    require: list[str] = field(default_factory=list)
+    resolved_with: list[str] | None = None
+
+    def resolve_references(self, reference_containers) -> None:
+        self.resolved_with = sorted(reference_containers)
+
+
+def _tree(spec: dict[str, list[str]]) -> MBContainerTree:
+    return MBContainerTree([StubContainer(n, r) for n, r in spec.items()])  # type: ignore
+
+
+def test_levels_from_leaves_to_roots():
+    tree = _tree({"app": ["db", "cache"], "db": ["base"], "cache": [], "base": [], "web": ["app"]})
+
+    levels = [sorted(c.name for c in level) for level in tree.levels()]
+
+    assert levels == [["base", "cache"], ["db"], ["app"], ["web"]]
+    assert sorted(tree.dependents("db")) == ["app"]
+
+
+def test_resolve_all_passes_required_containers():
+    containers = [StubContainer("a"), StubContainer("b", ["a"])]
+    MBContainerTree(containers).resolve_all()  # type: ignore
+
+    assert containers[0].resolved_with == []
+    assert containers[1].resolved_with == ["a"]
+
+
+def test_cycle_reports_exact_path():
+    with pytest.raises(ValueError, match=r"cycle: a -> b -> c -> a$"):
+        _tree({"a": ["b"], "b": ["c"], "c": ["a"], "d": [], "e": ["a"]})
+
+
+def test_self_dependency_is_a_cycle():
+    with pytest.raises(ValueError, match=r"cycle: a -> a$"):
+        _tree({"a": ["a"]})
+
+
+def test_missing_dependency():
+    with pytest.raises(ValueError, match="requires missing containers"):
+        _tree({"a": ["ghost"]})
+
+
+def test_upsert_re_resolves_only_dependents():
+    containers = {
+        n: StubContainer(n, r)
+        for n, r in {"a": [], "b": ["a"], "c": ["b"], "d": []}.items()
+    }
+    tree = MBContainerTree(list(containers.values()))  # type: ignore
+
+    affected = tree.upsert(StubContainer("a2", ["d"]))  # type: ignore
+    assert [c.name for c in affected] == ["a2"]
+
+    new_a = StubContainer("a", ["d"])
+    affected = tree.upsert(new_a)  # type: ignore
+
+    assert [c.name for c in affected] == ["a", "b", "c"]
+    assert new_a.resolved_with == ["d"]
+    assert [sorted(c.name for c in level) for level in tree.levels()] == [
+        ["d"], ["a", "a2"], ["b"], ["c"]
+    ]
+
+
+def test_upsert_rejects_cycle_and_missing():
+    tree = _tree({"a": [], "b": ["a"]})
+
+    with pytest.raises(ValueError, match=r"cycle: a -> b -> a$"):
+        tree.upsert(StubContainer("a", ["b"]))  # type: ignore
+    with pytest.raises(ValueError, match="requires missing containers"):
+        tree.upsert(StubContainer("c", ["ghost"]))  # type: ignore
@@ -0,0 +1,217 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBDaemon import MBDaemonClient, MBDaemonError, connect_daemon
+from mbctl.MBDaemon.MBDaemonServer import MBDaemon
+from mbctl.MBDaemon.MBDaemonWatcher import ConfDirWatcher, NerdEventsWatcher
+from mbctl.MBHost.NerdClient.NerdClientCliWrapper import run_cmd
+from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
+from mbctl.datatypes import MBContainerConf, MountType
+
+
+class FakeNerdClient:
+    def __init__(self) -> None:
+        self.states: dict[str, NerdContainerState] = {}
+
+    def get_container_state(self, container_name: str) -> NerdContainerState:
+        return self.states.get(container_name, NerdContainerState.not_exist)
+
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        return dict(self.states)
+
+    def get_image_id(self, image: str) -> str:
+        return f"sha256:{image}"
+
+    def compose_create_container(self, compose_dict: dict) -> None:
+        for name in compose_dict["services"]:
+            self.states[name] = NerdContainerState.running
+
+    def start_container(self, container_name: str) -> None:
+        self.states[container_name] = NerdContainerState.running
+
+
+@pytest.fixture
+def daemon(tmp_path, make_host):
+    host = make_host(
+        FakeNerdClient(),
+        {"web": [], "db": MBContainerConf(image="example/db:latest", autostart=False)},
+    )
+    daemon = MBDaemon(
+        host,
+        socket_path=(tmp_path / "mbctld.sock").as_posix(),
+        watch_conf=False,
+        watch_events=False,
+    )
+    daemon.start()
+    yield daemon
+    daemon.shutdown()
+
+
+def test_daemon_serves_list_and_run(daemon):
+    client = MBDaemonClient(daemon.socket_path)
+
+    assert client.request("ping")["version"].startswith("v")
+    summaries = {s["name"]: s for s in client.request("list")}
+    assert summaries["web"]["status"] == "never"
+    assert summaries["db"]["autostart"] is False
+
+    client.request("run", name="web")
+
+    assert client.request("status", name="web") == "running"
+
+
+def test_daemon_builds_offline_shell_command(daemon):
+    client = MBDaemonClient(daemon.socket_path)
+
+    cmd = client.request("shell_command", name="web", command=["sh"], run_name="web-shell")
+
+    assert cmd[:6] == ["nerdctl", "run", "--rm", "-it", "--name", "web-shell"]
+    assert cmd[-3:] == ["--entrypoint", "sh", "example/web:latest"]
+
+
+def test_daemon_streams_events(daemon):
+    started: list[str] = []
+    MBDaemonClient(daemon.socket_path).request("autostart", on_event=started.append)
+
+    assert started == ["web"]
+
+
+def test_daemon_forwards_command_output(daemon, monkeypatch):
+    client = daemon.host.client
+    compose_up = client.compose_create_container
+
+    def noisy_compose_up(compose_dict: dict) -> None:
+        run_cmd([sys.executable, "-c", "import sys; print('pulling'); print('warning', file=sys.stderr)"])
+        compose_up(compose_dict)
+
+    monkeypatch.setattr(client, "compose_create_container", noisy_compose_up)
+    output: list[tuple[str, str]] = []
+
+    MBDaemonClient(daemon.socket_path).request("run", on_output=lambda *line: output.append(line), name="web")
+
+    assert sorted(output) == [("stderr", "warning\n"), ("stdout", "pulling\n")]
+
+
+def test_daemon_serves_list_during_long_operation(daemon, monkeypatch):
+    client = daemon.host.client
+    compose_up = client.compose_create_container
+    entered, release = threading.Event(), threading.Event()
+
+    def blocking_compose_up(compose_dict: dict) -> None:
+        entered.set()
+        assert release.wait(10)
+        compose_up(compose_dict)
+
+    monkeypatch.setattr(client, "compose_create_container", blocking_compose_up)
+    run = threading.Thread(target=MBDaemonClient(daemon.socket_path).request, args=("run",), kwargs={"name": "web"})
+    run.start()
+    try:
+        assert entered.wait(10)
+        # nerdctl 调用不持有模型锁，run 进行中 list 和 status 不会被阻塞
+        summaries = {s["name"]: s for s in MBDaemonClient(daemon.socket_path).request("list")}
+        assert summaries["web"]["status"] == "never"
+        assert MBDaemonClient(daemon.socket_path).request("status", name="db") == "never"
+    finally:
+        release.set()
+        run.join()
+
+    assert MBDaemonClient(daemon.socket_path).request("status", name="web") == "running"
+
+
+def test_daemon_reports_errors(daemon):
+    client = MBDaemonClient(daemon.socket_path)
+
+    with pytest.raises(MBDaemonError, match="not found"):
+        client.request("status", name="ghost")
+    with pytest.raises(MBDaemonError, match="Unknown mbctld operation"):
+        client.request("explode")
+
+
+def test_daemon_applies_conf_changes(daemon, tmp_path, write_conf):
+    write_conf("cache")
+    (tmp_path / MountType.conf.value / "db" / mb_config.config_file).unlink()
+
+    daemon.handle_conf_changes({"cache", "db"})
+
+    names = {s["name"] for s in MBDaemonClient(daemon.socket_path).request("list")}
+    assert names == {"web", "cache"}
+
+
+def test_connect_daemon_falls_back(tmp_path, monkeypatch, daemon):
+    assert connect_daemon((tmp_path / "absent.sock").as_posix()) is None
+    assert connect_daemon(daemon.socket_path) is not None
+    monkeypatch.setenv("MBCTL_NO_DAEMON", "1")
+    assert connect_daemon(daemon.socket_path) is None
+
+
+def test_cli_uses_daemon_without_loading_host(daemon, monkeypatch):
+    from typer.testing import CliRunner
+
+    from mbctl.cli import commands
+
+    monkeypatch.setenv("MBCTL_DAEMON_SOCKET", daemon.socket_path)
+    monkeypatch.setattr(commands, "_daemon_checked", False)
+
+    def no_host():
+        raise AssertionError("the CLI must not load the host when mbctld is running")
+
+    monkeypatch.setattr(commands, "get_host", no_host)
+    result = CliRunner().invoke(commands.app, ["list"])
+
+    assert result.exit_code == 0, result.output
+    assert "web" in result.output and "db" in result.output
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_conf_dir_watcher(tmp_path, use_inotify):
+    conf_dir = tmp_path / "conf"
+    (conf_dir / "web").mkdir(parents=True)
+    (conf_dir / "web" / "container.yaml").write_text("image: a\n")
+    changes: list[set[str]] = []
+    watcher = ConfDirWatcher(
+        conf_dir.as_posix(),
+        "container.yaml",
+        changes.append,
+        use_inotify=use_inotify,
+        poll_interval=0.05,
+    )
+    watcher.start()
+    try:
+        (conf_dir / "new").mkdir()
+        (conf_dir / "new" / "container.yaml").write_text("image: b\n")
+        (conf_dir / "web" / "container.yaml").write_text("image: a2\n")
+
+        assert _wait_for(lambda: set().union(*changes) >= {"new", "web"})
+    finally:
+        watcher.stop()
+
+
+def test_nerd_events_watcher_filters_container_events(tmp_path):
+    script = tmp_path / "events.sh"
+    script.write_text(
+        "#!/bin/sh\n"
+        'echo \'{"Topic":"/images/create"}\'\n'
+        'echo \'{"Topic":"/tasks/start"}\'\n'
+        "exec sleep 5\n"
+    )
+    script.chmod(0o755)
+    events: list[int] = []
+    watcher = NerdEventsWatcher(lambda: events.append(1), cmd=[script.as_posix()])
+    watcher.start()
+    try:
+        assert _wait_for(lambda: events == [1])
+    finally:
+        watcher.stop()
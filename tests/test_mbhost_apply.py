@@ -0,0 +1,127 @@
+from typing import Union
+
+from mbctl.MBHost.MBContainerApplyResult import MBContainerApplyAction
+from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
+from mbctl.datatypes import (
+    MBContainerConf,
+    MBContainerMountConf,
+    MBContainerMountPointConf,
+)
+
+
+class StatefulNerdClient:
+    def __init__(self) -> None:
+        self.states: dict[str, NerdContainerState] = {}
+        self.created: list[str] = []
+        self.deleted: list[str] = []
+        self.image_ids: dict[str, str] = {}
+
+    def get_container_state(self, container_name: str) -> NerdContainerState:
+        return self.states.get(container_name, NerdContainerState.not_exist)
+
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        return dict(self.states)
+
+    def get_image_id(self, image: str) -> str:
+        return self.image_ids.get(image, f"sha256:{image}")
+
+    def force_delete_container(self, container_name: str) -> None:
+        self.deleted.append(container_name)
+        del self.states[container_name]
+
+    def compose_create_container(self, compose_dict: dict) -> None:
+        for name in compose_dict["services"]:
+            self.created.append(name)
+            self.states[name] = NerdContainerState.running
+
+
+def _base_conf(data_source=None) -> MBContainerConf:
+    return MBContainerConf(
+        image="example/base:latest",
+        mount=MBContainerMountConf(
+            data={"/data": MBContainerMountPointConf(source=data_source)}
+        ),
+    )
+
+
+def _child_conf(image: str = "example/child:latest") -> MBContainerConf:
+    return MBContainerConf(
+        image=image,
+        require=["base"],
+        mount=MBContainerMountConf(
+            data={"/frombase": MBContainerMountPointConf(source="base:/data")}
+        ),
+    )
+
+
+def _confs() -> dict[str, Union[MBContainerConf, list[str]]]:
+    return {"base": _base_conf(), "child": _child_conf(), "other": []}
+
+
+def _actions(results) -> dict[str, MBContainerApplyAction]:
+    return {r.name: r.action for r in results}
+
+
+def test_apply_creates_then_skips_unchanged(make_host):
+    client = StatefulNerdClient()
+    host = make_host(client, _confs())
+
+    first = host.apply_containers()
+    assert _actions(first) == {n: MBContainerApplyAction.created for n in ("base", "child", "other")}
+
+    client.created.clear()
+    second = host.apply_containers()
+    assert _actions(second) == {
+        n: MBContainerApplyAction.unchanged for n in ("base", "child", "other")
+    }
+    assert client.created == [] and client.deleted == []
+
+
+def test_apply_recreates_only_changed_container(make_host, write_conf):
+    client = StatefulNerdClient()
+    host = make_host(client, _confs())
+    host.apply_containers()
+    client.created.clear()
+
+    write_conf("other", MBContainerConf(image="example/other:v2"))
+    host.reload_container("other")
+    results = host.apply_containers()
+
+    assert _actions(results)["other"] == MBContainerApplyAction.recreated
+    assert client.deleted == ["other"] and client.created == ["other"]
+
+
+def test_apply_follows_changes_through_reference_mounts(tmp_path, make_host, write_conf):
+    client = StatefulNerdClient()
+    host = make_host(client, _confs())
+    host.apply_containers()
+
+    # base 的 /data 换了源目录，child 通过引用挂载到同一个目录，因此两个容器都要重建
+    write_conf("base", _base_conf((tmp_path / "moved-data").as_posix()))
+    host.reload_container("base")
+    results = host.apply_containers()
+
+    assert _actions(results) == {
+        "base": MBContainerApplyAction.recreated,
+        "child": MBContainerApplyAction.recreated,
+        "other": MBContainerApplyAction.unchanged,
+    }
+
+
+def test_apply_detects_image_change(make_host):
+    client = StatefulNerdClient()
+    host = make_host(client, _confs())
+    host.apply_containers()
+
+    client.image_ids["example/other:latest"] = "sha256:pulled-again"
+    results = host.apply_containers("other")
+
+    assert _actions(results) == {"other": MBContainerApplyAction.recreated}
+
+
+def test_apply_targets(make_host):
+    host = make_host(StatefulNerdClient(), _confs())
+
+    assert [c.name for c in host.get_apply_targets("child")] == ["child"]
+    assert [c.name for c in host.get_apply_targets("child", with_deps=True)] == ["base", "child"]
+    assert [c.name for c in host.get_apply_targets("base", with_dependents=True)] == ["base", "child"]
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from mbctl.MBHost.MBContainerBuildResult import MBContainerBuildState
+from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
+
+
+class RecordingNerdClient:
+    def __init__(self, build_seconds: float = 0.1, failing: frozenset[str] = frozenset()) -> None:
+        self.build_seconds = build_seconds
+        self.failing = failing
+        self.spans: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_container_state(self, container_name: str) -> NerdContainerState:
+        return NerdContainerState.not_exist
+
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        return {}
+
+    def get_image_id(self, image: str) -> str:
+        return f"sha256:{image}"
+
+    def compose_create_container(self, compose_dict: dict) -> None:
+        (name,) = compose_dict["services"].keys()
+        start = time.perf_counter()
+        time.sleep(self.build_seconds)
+        with self._lock:
+            self.spans[name] = (start, time.perf_counter())
+        if name in self.failing:
+            raise RuntimeError(f"compose up failed for {name}")
+
+
+def test_parallel_build_respects_dependencies(make_host):
+    client = RecordingNerdClient()
+    host = make_host(client, {"a": [], "b": [], "c": ["a", "b"], "d": []})
+
+    results = host.build_all_containers(jobs=3)
+
+    assert {r.name: r.state for r in results} == {
+        n: MBContainerBuildState.succeeded for n in "abcd"
+    }
+    assert all(r.duration > 0 for r in results)
+    # independent containers overlap, the dependent starts after both requirements
+    assert client.spans["b"][0] < client.spans["a"][1]
+    assert client.spans["c"][0] >= max(client.spans["a"][1], client.spans["b"][1])
+
+
+def test_failure_cancels_only_dependents(make_host):
+    client = RecordingNerdClient(build_seconds=0.01, failing=frozenset({"a"}))
+    host = make_host(client, {"a": [], "b": ["a"], "c": ["b"], "d": [], "e": ["d"]})
+    seen = []
+
+    results = host.build_all_containers(jobs=2, on_result=lambda r: seen.append(r.name))
+    by_name = {r.name: r for r in results}
+
+    assert by_name["a"].state == MBContainerBuildState.failed
+    assert isinstance(by_name["a"].error, RuntimeError)
+    assert by_name["b"].state == MBContainerBuildState.cancelled
+    assert by_name["c"].state == MBContainerBuildState.cancelled
+    assert by_name["c"].failed_dependency == "a"
+    assert by_name["d"].state == MBContainerBuildState.succeeded
+    assert by_name["e"].state == MBContainerBuildState.succeeded
+    assert set(client.spans) == {"a", "d", "e"}
+    assert sorted(seen) == sorted(by_name)
@@ -1,29 +1,30 @@
-from pathlib import Path
-
 from mbctl.MBHost import MBHost
 from mbctl.datatypes import (
     MBContainerConf,
     MBContainerMountConf,
     MBContainerMountPointConf,
-    MountType,
 )
 from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import MBContainerStatus
 from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
 
 
-class FakeNerdClient:
+class SnapshotNerdClient:
+    def __init__(self, states: dict[str, NerdContainerState]) -> None:
+        self.states = states
+        self.inspected: list[str] = []
+        self.snapshots = 0
+
     def get_container_state(self, container_name: str) -> NerdContainerState:
+        self.inspected.append(container_name)
         return NerdContainerState.not_exist
 
-
-def _write_conf(base_dir: Path, name: str, conf: MBContainerConf) -> None:
-    conf_dir = base_dir / MountType.conf.value / name
-    conf_dir.mkdir(parents=True, exist_ok=True)
-    conf_path = conf_dir / mb_config.config_file
-    conf.to_yaml_file(conf_path.as_posix())
+    def get_all_container_states(self) -> dict[str, NerdContainerState]:
+        self.snapshots += 1
+        return self.states
 
 
-def test_mbhost_resolves_dependencies(tmp_path, monkeypatch):
+def test_mbhost_resolves_dependencies(tmp_path, monkeypatch, write_conf, empty_nerd_client):
     # isolate storage under tmp and write two dependent container configs
     monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
 
@@ -42,10 +43,10 @@ def test_mbhost_resolves_dependencies(tmp_path, monkeypatch):
         ),
     )
 
-    _write_conf(tmp_path, "base", base_conf)
-    _write_conf(tmp_path, "child", child_conf)
+    write_conf("base", base_conf)
+    write_conf("child", child_conf)
 
-    host = MBHost(client=FakeNerdClient(), yggaddr="ygg", yggprefix="2001:db8::/64") # type: ignore
+    host = MBHost(client=empty_nerd_client, yggaddr="ygg", yggprefix="2001:db8::/64") # type: ignore
 
     assert set(host.list_all_mbcontainer_names()) == {"base", "child"}
     assert {c.name for c in host.list_containers()} == {"base", "child"}
@@ -58,3 +59,133 @@ def test_mbhost_resolves_dependencies(tmp_path, monkeypatch):
 
     assert child_mount.source.real_mount_source == base_mount.source.real_mount_source
     assert child.resolved
+
+
+def test_mbhost_uses_one_state_snapshot(tmp_path, monkeypatch, write_conf):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    for name in ["up", "down", "missing"]:
+        write_conf(name, MBContainerConf(image="example/app:latest"))
+
+    client = SnapshotNerdClient(
+        {"up": NerdContainerState.running, "down": NerdContainerState.stopped}
+    )
+    host = MBHost(client=client, yggaddr="ygg", yggprefix="2001:db8::/64")  # type: ignore
+
+    assert client.snapshots == 1
+    # only the container absent from the snapshot falls back to inspect
+    assert client.inspected == ["missing"]
+    assert host.get_mbcontainer("up").status == MBContainerStatus.running
+    assert host.get_mbcontainer("down").status == MBContainerStatus.stopped
+    assert host.get_mbcontainer("missing").status == MBContainerStatus.never
+
+
+def test_create_container_loads_incrementally(tmp_path, monkeypatch, write_conf, empty_nerd_client):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    write_conf(
+        "base",
+        MBContainerConf(
+            image="example/base:latest",
+            mount=MBContainerMountConf(data={"/data": MBContainerMountPointConf()}),
+        ),
+    )
+    for i in range(5):
+        write_conf(f"other{i}", MBContainerConf(image="example/other:latest"))
+    host = MBHost(client=empty_nerd_client, yggaddr="ygg", yggprefix="2001:db8::/64")  # type: ignore
+
+    loaded: list[str] = []
+    original_load = host.conf_cache.load
+
+    def counting_load(container_name, conf_path):
+        loaded.append(container_name)
+        return original_load(container_name, conf_path)
+
+    monkeypatch.setattr(host.conf_cache, "load", counting_load)
+
+    host.create_container_from_conf(
+        "child",
+        MBContainerConf(
+            image="example/child:latest",
+            require=["base"],
+            mount=MBContainerMountConf(
+                data={"/frombase": MBContainerMountPointConf(source="base:/data")}
+            ),
+        ),
+    )
+
+    assert loaded == ["child"]
+    child = host.get_mbcontainer("child")
+    assert child.resolved
+    assert child.mount.mount_points[0].source.real_mount_source == (
+        tmp_path / "data" / "base" / "data"
+    ).as_posix()
+    assert [c.name for c in host._container_tree.levels()[-1]] == ["child"]
+
+
+def test_editing_container_re_resolves_dependents(tmp_path, monkeypatch, write_conf, empty_nerd_client):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    write_conf(
+        "base",
+        MBContainerConf(
+            image="example/base:latest",
+            mount=MBContainerMountConf(data={"/data": MBContainerMountPointConf()}),
+        ),
+    )
+    write_conf(
+        "child",
+        MBContainerConf(
+            image="example/child:latest",
+            require=["base"],
+            mount=MBContainerMountConf(
+                data={"/frombase": MBContainerMountPointConf(source="base:/data")}
+            ),
+        ),
+    )
+    write_conf("unrelated", MBContainerConf(image="example/other:latest"))
+    host = MBHost(client=empty_nerd_client, yggaddr="ygg", yggprefix="2001:db8::/64")  # type: ignore
+    unrelated = host.get_mbcontainer("unrelated")
+
+    host.create_container_from_conf(
+        "base",
+        MBContainerConf(
+            image="example/base:latest",
+            mount=MBContainerMountConf(
+                data={"/data": MBContainerMountPointConf(source="/srv/base-data")}
+            ),
+        ),
+    )
+
+    child_mount = host.get_mbcontainer("child").mount.mount_points[0]
+    assert child_mount.source.real_mount_source == "/srv/base-data"
+    assert host.get_mbcontainer("unrelated") is unrelated
+
+
+def test_editing_container_rejects_cycles(tmp_path, monkeypatch, write_conf, empty_nerd_client):
+    import pytest
+
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    write_conf("base", MBContainerConf(image="example/base:latest"))
+    write_conf("child", MBContainerConf(image="example/child:latest", require=["base"]))
+    host = MBHost(client=empty_nerd_client, yggaddr="ygg", yggprefix="2001:db8::/64")  # type: ignore
+
+    with pytest.raises(ValueError, match="cycle: base -> child -> base"):
+        host.create_container_from_conf(
+            "base", MBContainerConf(image="example/base:latest", require=["child"])
+        )
+
+
+def test_loading_long_chain_of_new_containers(tmp_path, monkeypatch, write_conf, empty_nerd_client):
+    import sys
+
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    host = MBHost(client=empty_nerd_client, yggaddr="ygg", yggprefix="2001:db8::/64")  # type: ignore
+    # link{i} requires link{i-1}; the chain is longer than the recursion limit
+    length = sys.getrecursionlimit() + 100
+    for i in range(length):
+        require = [f"link{i - 1}"] if i else []
+        write_conf(f"link{i}", MBContainerConf(image="example/link:latest", require=require))
+
+    last = host.get_mbcontainer(f"link{length - 1}")
+
+    assert last.resolved
+    assert len(host._container_tree.levels()) == length
+    assert all(host.get_mbcontainer(f"link{i}").resolved for i in range(length))
@@ -0,0 +1,148 @@
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBHost import MBMountBackend
+from mbctl.MBHost.MBMountBackend import (
+    MBBtrfsMountBackend,
+    MBDirMountBackend,
+    get_mount_backend,
+    get_mount_root,
+)
+from mbctl.MBHost.MBMountPrep import MBMountActionKind, plan_mounts
+from mbctl.datatypes import MBContainerConf, MBContainerMountConf, MBContainerMountPointConf, MountType
+
+FAKE_BTRFS = """#!{python}
+import os, shutil, sys
+with open(os.environ["FAKE_BTRFS_LOG"], "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+args = [a for a in sys.argv[2:] if a != "-r"]
+if args[0] == "create":
+    os.mkdir(args[1])
+elif args[0] == "delete":
+    shutil.rmtree(args[1])
+elif args[0] == "snapshot":
+    shutil.copytree(args[1], args[2])
+"""
+
+
+WEB_CONF = MBContainerConf(
+    image="example/web",
+    mount=MBContainerMountConf(
+        data={"/data": MBContainerMountPointConf(), "/more": MBContainerMountPointConf()},
+        log={"/log": MBContainerMountPointConf()},
+    ),
+)
+
+
+def test_get_mount_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    assert get_mount_root(f"{tmp_path}/data/web/inner/dir") == f"{tmp_path}/data/web"
+    assert get_mount_root(f"{tmp_path}/data/web") == f"{tmp_path}/data/web"
+    assert get_mount_root(f"{tmp_path}/conf/web/etc") is None
+    assert get_mount_root(f"{tmp_path}/data") is None
+    assert get_mount_root("/mnt/elsewhere/web") is None
+
+
+def test_btrfs_backend_falls_back_without_btrfs_command(monkeypatch):
+    monkeypatch.setattr(mb_config, "mount_backend", "btrfs")
+    monkeypatch.setattr(MBMountBackend, "_mount_backend", None)
+    monkeypatch.setenv("PATH", "/nonexistent")
+    backend = get_mount_backend()
+    assert type(backend) is MBDirMountBackend
+    assert not backend.creates_roots
+
+
+@pytest.fixture
+def fake_btrfs(tmp_path, monkeypatch) -> Path:
+    bin_dir = tmp_path / "fake-bin"
+    bin_dir.mkdir()
+    script = bin_dir / "btrfs"
+    script.write_text(FAKE_BTRFS.format(python=sys.executable))
+    script.chmod(0o755)
+    log = tmp_path / "btrfs.log"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_BTRFS_LOG", log.as_posix())
+    monkeypatch.setattr(mb_config, "mount_backend", "btrfs")
+    monkeypatch.setattr(MBMountBackend, "_mount_backend", None)
+    # 假的 btrfs 创建的是普通目录，用创建记录代替 inode 检查
+    monkeypatch.setattr(
+        MBBtrfsMountBackend,
+        "is_subvolume",
+        lambda self, path: log.exists() and f"subvolume create {path}\n" in log.read_text()
+        and os.path.isdir(path),
+    )
+    return log
+
+
+def test_btrfs_backend_creates_deletes_and_snapshots_roots(tmp_path, fake_btrfs, make_host, stopped_nerd_client):
+    storage = tmp_path / "storage"
+    host = make_host(stopped_nerd_client, {"web": WEB_CONF}, storage=storage)
+    container = host.get_mbcontainer("web")
+
+    plan = plan_mounts(container.mount.mount_points)
+    assert [a.path for a in plan.actions if a.kind == MBMountActionKind.subvolume] == [
+        f"{storage}/data/web",
+        f"{storage}/log/web",
+    ]
+
+    host.prepare_container_mounts([container])
+    assert (storage / "data" / "web" / "data").is_dir()
+    assert fake_btrfs.read_text().count("subvolume create") == 2
+
+    (storage / "data" / "web" / "data" / "file").write_text("hello")
+    snapshots = host.snapshot_container_mounts("web", dest_dir=(tmp_path / "snap").as_posix())
+    assert snapshots == [f"{tmp_path}/snap/data", f"{tmp_path}/snap/log"]
+    assert f"subvolume snapshot -r {storage}/data/web {tmp_path}/snap/data" in fake_btrfs.read_text()
+
+    trashed = host.remove_container_mounts("web", [MountType.data, MountType.log])
+    assert trashed == []
+    assert not (storage / "data" / "web").exists()
+    assert fake_btrfs.read_text().count("subvolume delete") == 2
+
+
+def _can_use_loopback_btrfs() -> bool:
+    return (
+        os.geteuid() == 0
+        and shutil.which("mkfs.btrfs") is not None
+        and shutil.which("btrfs") is not None
+        and shutil.which("mount") is not None
+    )
+
+
+@pytest.mark.skipif(not _can_use_loopback_btrfs(), reason="needs root, mkfs.btrfs and btrfs-progs")
+def test_btrfs_backend_on_loopback_image(tmp_path, monkeypatch, make_host, stopped_nerd_client):
+    image = tmp_path / "btrfs.img"
+    mountpoint = tmp_path / "mnt"
+    mountpoint.mkdir()
+    with open(image, "wb") as f:
+        f.truncate(128 * 1024 * 1024)
+    subprocess.run(["mkfs.btrfs", "-q", image.as_posix()], check=True)
+    if subprocess.run(["mount", "-o", "loop", image.as_posix(), mountpoint.as_posix()]).returncode != 0:
+        pytest.skip("cannot mount a loopback image here")
+    try:
+        monkeypatch.setattr(mb_config, "mount_backend", "btrfs")
+        monkeypatch.setattr(MBMountBackend, "_mount_backend", None)
+        host = make_host(stopped_nerd_client, {"web": WEB_CONF}, storage=mountpoint)
+        container = host.get_mbcontainer("web")
+        host.prepare_container_mounts([container])
+
+        backend = get_mount_backend()
+        data_root = f"{mountpoint}/data/web"
+        assert backend.is_subvolume(data_root)
+        assert not backend.is_subvolume(f"{data_root}/data")
+
+        snapshots = host.snapshot_container_mounts("web")
+        assert all(backend.is_subvolume(s) for s in snapshots)
+        with pytest.raises(OSError):
+            open(f"{snapshots[0]}/data/new-file", "w")
+
+        host.remove_container_mounts("web", [MountType.data])
+        assert not os.path.exists(data_root)
+    finally:
+        subprocess.run(["umount", mountpoint.as_posix()], check=False)
@@ -0,0 +1,87 @@
+import os
+import stat
+
+import pytest
+
+from mbctl.MBContainer import MBContainerMountEntry
+from mbctl.MBContainer.MBContainerMount import MBContainerMountEntrySource
+from mbctl.MBHost.MBMountPrep import MBMountActionKind, plan_mounts, prepare_mounts
+from mbctl.datatypes import MountType
+
+OWNER = [os.getuid(), os.getgid()]
+
+
+def _entry(path, perm="750", file=False) -> MBContainerMountEntry:
+    return MBContainerMountEntry(
+        owner=list(OWNER),
+        perm=perm,
+        source=MBContainerMountEntrySource(is_reference=False, real_mount_source=str(path)),
+        target="/data",
+        file=file,
+        type=MountType.data,
+    )
+
+
+def _kinds(plan) -> list[MBMountActionKind]:
+    return [action.kind for action in plan.actions]
+
+
+def test_new_directory_is_created_with_owner_and_mode(tmp_path):
+    target = tmp_path / "a" / "b"
+
+    plan = prepare_mounts([_entry(target)])
+
+    assert _kinds(plan) == [MBMountActionKind.mkdir, MBMountActionKind.chown, MBMountActionKind.chmod]
+    assert stat.S_IMODE(target.stat().st_mode) == 0o750
+
+
+def test_prepared_directory_needs_no_syscalls(tmp_path, monkeypatch):
+    target = tmp_path / "data"
+    prepare_mounts([_entry(target)])
+
+    def forbidden(*args):
+        raise AssertionError("unexpected syscall")
+
+    monkeypatch.setattr(os, "chown", forbidden)
+    monkeypatch.setattr(os, "chmod", forbidden)
+    monkeypatch.setattr(os, "makedirs", forbidden)
+
+    assert prepare_mounts([_entry(target)] * 3, jobs=4).actions == []
+
+
+def test_only_wrong_mode_is_fixed(tmp_path):
+    target = tmp_path / "data"
+    target.mkdir(mode=0o700)
+    os.chmod(target, 0o700)
+
+    plan = prepare_mounts([_entry(target, perm="755")])
+
+    assert _kinds(plan) == [MBMountActionKind.chmod]
+    assert stat.S_IMODE(target.stat().st_mode) == 0o755
+
+
+def test_dry_run_does_not_touch_the_filesystem(tmp_path):
+    targets = [tmp_path / f"d{i}" for i in range(5)]
+
+    plan = plan_mounts([_entry(t) for t in targets], jobs=3)
+
+    assert plan.checked_paths == 5
+    assert len(plan.actions) == 15
+    assert plan.describe()[0] == f"mkdir -p {targets[0]}"
+    assert not any(t.exists() for t in targets)
+
+
+def test_missing_file_mount_fails_before_any_change(tmp_path):
+    new_dir = tmp_path / "new"
+    missing_file = tmp_path / "missing.conf"
+
+    with pytest.raises(FileNotFoundError, match="missing.conf"):
+        prepare_mounts([_entry(new_dir), _entry(missing_file, file=True)])
+
+    assert not new_dir.exists()
+
+
+def test_file_mount_must_be_a_regular_file(tmp_path):
+    (tmp_path / "conf").mkdir()
+    plan = plan_mounts([_entry(tmp_path / "conf", file=True)])
+    assert plan.errors == [f"Mount source {tmp_path / 'conf'} is not a file."]
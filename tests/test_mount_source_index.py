@@ -0,0 +1,77 @@
+import pytest
+
+from mbctl.MBContainer.MBContainerMount import MBContainerMount
+from mbctl.MBHost import MBHost
+from mbctl.datatypes import MBContainerConf, MBContainerMountConf, MBContainerMountPointConf, MountType
+
+
+def _child_conf(reference: bool) -> MBContainerConf:
+    source = "base:/data" if reference else None
+    return MBContainerConf(
+        image="example/child",
+        require=["base"],
+        mount=MBContainerMountConf(
+            data={"/shared": MBContainerMountPointConf(source=source)},
+            log={"/log": MBContainerMountPointConf()},
+        ),
+    )
+
+
+@pytest.fixture
+def host(make_host, empty_nerd_client) -> MBHost:
+    host = make_host(
+        empty_nerd_client,
+        {
+            "base": MBContainerConf(
+                image="example/base",
+                mount=MBContainerMountConf(data={"/data": MBContainerMountPointConf()}),
+            ),
+            "child": _child_conf(reference=True),
+        },
+    )
+    host.prepare_container_mounts()
+    return host
+
+
+def test_mount_entries_are_indexed_by_target_and_type():
+    mount = MBContainerMount(
+        "web",
+        MBContainerMountConf(
+            data={"/data": MBContainerMountPointConf()},
+            log={"/data": MBContainerMountPointConf(), "/log": MBContainerMountPointConf()},
+        ),
+    )
+    assert mount.get_mount_entry_by_target("/data").type == MountType.data
+    assert mount.get_mount_entry(MountType.log, "/data").type == MountType.log
+    assert mount.get_mount_entry(MountType.cache, "/data") is None
+    with pytest.raises(ValueError):
+        mount.get_mount_entry_by_target("/missing")
+
+
+def test_reverse_index_lists_every_user_of_a_source(host, tmp_path):
+    base_data = f"{tmp_path}/data/base/data"
+    assert host.mount_sources.users(base_data) == {"base", "child"}
+    assert host.mount_sources.other_users(base_data, "base") == ["child"]
+    assert host.mount_sources.users(f"{tmp_path}/log/child/log") == {"child"}
+
+
+def test_prune_refuses_sources_still_mounted_elsewhere(host, tmp_path):
+    with pytest.raises(RuntimeError, match="mounted by child"):
+        host.remove_container_mounts("base")
+    assert (tmp_path / "data" / "base" / "data").is_dir()
+
+
+def test_prune_skips_referenced_mounts_of_other_containers(host, tmp_path):
+    trashed = host.remove_container_mounts("child")
+    assert len(trashed) == 1 and "child-log" in trashed[0]
+    assert (tmp_path / "data" / "base" / "data").is_dir()
+
+
+def test_reverse_index_follows_reload(host, tmp_path, write_conf):
+    write_conf("child", _child_conf(reference=False))
+    host.reload_container("child")
+    assert host.mount_sources.users(f"{tmp_path}/data/base/data") == {"base"}
+    assert host.mount_sources.users(f"{tmp_path}/data/child/shared") == {"child"}
+
+    host.remove_container_mounts("base")
+    assert not (tmp_path / "data" / "base" / "data").exists()
@@ -0,0 +1,22 @@
+from mbctl.MBHost.NerdClient.NerdClientCliWrapper import parse_nerd_ps_states
+from mbctl.MBHost.NerdClient.NerdContainer import NerdContainerState
+
+
+def test_parse_nerd_ps_states():
+    output = "\n".join(
+        [
+            '{"ID":"a1","Names":"web","Status":"Up 2 hours"}',
+            '{"ID":"b2","Names":"db","Status":"Exited (0) 3 hours ago"}',
+            '{"ID":"c3","Names":"fresh","Status":"Created"}',
+            '{"ID":"d4","Names":"frozen","Status":"Paused"}',
+            "",
+            "not json",
+        ]
+    )
+    states = parse_nerd_ps_states(output)
+
+    assert states == {
+        "web": NerdContainerState.running,
+        "db": NerdContainerState.stopped,
+        "fresh": NerdContainerState.stopped,
+    }
@@ -0,0 +1,109 @@
+import logging
+
+import pytest
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import MBContainer
+from mbctl.MBHost.NerdClient import NerdContainerState, SimulatedNerdClient
+from mbctl.datatypes import MBContainerConf, MBContainerMountConf, MBContainerMountPointConf
+
+PREFIX = "300:64f7:cae4:9395::/64"
+SHELL = ["sh", "-c", "exec /bin/sh"]
+
+
+def _web_conf(**extra) -> MBContainerConf:
+    return MBContainerConf(
+        image="example/web:latest",
+        mount=MBContainerMountConf(data={"/data": MBContainerMountPointConf()}),
+        port=[(8080, 80)],
+        environment={"MODE": "debug"},
+        local_access={"db"},
+        dns="fd00::53",
+        extra_compose_configs=extra,
+    )
+
+
+def test_run_command_matches_compose_service(monkeypatch, caplog):
+    monkeypatch.setattr(mb_config, "storage_path", "/srv/man8s")
+    container = MBContainer(
+        "web",
+        _web_conf(user="10001:10001", cap_add=["NET_ADMIN"], sysctls={"net.ipv4.ip_forward": 1}, unknown_key=1),
+        PREFIX,
+    )
+    container.resolve_references()
+    service = container.to_compose_dict()["services"]["web"]
+
+    with caplog.at_level(logging.WARNING):
+        cmd = container.to_nerdctl_run_command(SHELL, "web-shell")
+
+    assert cmd[:6] == ["nerdctl", "run", "--rm", "-it", "--name", "web-shell"]
+    assert cmd[-5:] == ["--entrypoint", "sh", "example/web:latest", "-c", "exec /bin/sh"]
+    pairs = list(zip(cmd, cmd[1:]))
+    assert ("--hostname", "web") in pairs
+    assert ("--network", service["networks"][0]) in pairs
+    assert ("-v", service["volumes"][0]) in pairs
+    assert ("-e", "MODE=debug") in pairs
+    assert ("--dns", "fd00::53") in pairs
+    for host, address in service["extra_hosts"].items():
+        assert ("--add-host", f"{host}:{address}") in pairs
+    assert ("--user", "10001:10001") in pairs
+    assert ("--cap-add", "NET_ADMIN") in pairs
+    assert ("--sysctl", "net.ipv4.ip_forward=1") in pairs
+    # 端口和重启策略对临时容器没有意义
+    assert "-p" not in cmd and "--restart" not in cmd
+    assert "unknown_key" in caplog.text
+
+
+@pytest.fixture
+def stopped_web(monkeypatch, make_host):
+    from mbctl.cli import commands
+
+    client = SimulatedNerdClient()
+    client.add_container("web", "example/web:latest", running=False)
+    host = make_host(client, {"web": _web_conf()}, yggprefix=PREFIX)
+    monkeypatch.setattr(commands, "get_daemon", lambda: None)
+    monkeypatch.setattr(commands, "get_host", lambda: host)
+    return client
+
+
+def test_offline_shell_leaves_container_untouched(stopped_web, monkeypatch):
+    from typer.testing import CliRunner
+
+    from mbctl.cli import commands
+
+    executed: list[list[str]] = []
+    monkeypatch.setattr(commands, "just_like_nerdctl", lambda cmd: executed.append(cmd) or 7)
+
+    result = CliRunner().invoke(commands.app, ["shell", "web"])
+
+    assert result.exit_code == 7, result.output
+    (cmd,) = executed
+    assert cmd[:3] == ["nerdctl", "run", "--rm"]
+    assert cmd[cmd.index("--name") + 1].startswith("web-mbctl-shell-")
+    # 只查询了状态，没有改名、创建、停止或删除任何容器
+    assert set(stopped_web.call_counts()) <= {"get_container_state", "get_all_container_states"}
+    assert stopped_web.states == {"web": NerdContainerState.stopped}
+
+
+def test_rename_offline_keeps_legacy_flow(stopped_web, monkeypatch):
+    from typer.testing import CliRunner
+
+    from mbctl.cli import commands
+
+    projects: list = []
+    compose_safe = stopped_web.compose_create_container_safe
+    monkeypatch.setattr(
+        stopped_web,
+        "compose_create_container_safe",
+        lambda conf, project_name=None: projects.append(project_name) or compose_safe(conf, project_name),
+    )
+
+    result = CliRunner().invoke(commands.app, ["shell", "web", "--rename-offline"])
+
+    assert result.exit_code == 0, result.output
+    # 临时容器使用自己的 compose 项目
+    (project,) = projects
+    assert project.startswith("web-mbctl-shell-")
+    assert stopped_web.call_counts()["rename_container"] == 2
+    assert stopped_web.call_counts()["compose_create_container"] == 1
+    assert set(stopped_web.states) == {"web"}
@@ -0,0 +1,125 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from mbctl import MBProfile
+from mbctl.MBHost.NerdClient.NerdClientCliWrapper import run_cmd_get_output
+
+
+@pytest.fixture
+def profiler():
+    profiler = MBProfile.enable_profiling()
+    yield profiler
+    MBProfile.disable_profiling()
+
+
+def test_disabled_spans_record_nothing():
+    MBProfile.disable_profiling()
+
+    @MBProfile.profiled("noop")
+    def noop():
+        return 42
+
+    with MBProfile.span("anything") as s:
+        s.set(key="value")
+    assert s is MBProfile._NULL_SPAN
+    assert noop() == 42
+    assert MBProfile.get_profiler() is None
+
+
+def test_spans_and_summary(profiler):
+    @MBProfile.profiled()
+    def work():
+        return "done"
+
+    for _ in range(3):
+        work()
+    with MBProfile.span("outer", container="web") as s:
+        s.set(extra=1)
+
+    rows = {row["name"]: row for row in profiler.summary()}
+    assert rows["test_spans_and_summary.<locals>.work"]["count"] == 3
+    assert rows["outer"]["count"] == 1
+    assert profiler.spans[-1].attrs == {"container": "web", "extra": 1}
+    totals = [row["total"] for row in profiler.summary()]
+    assert totals == sorted(totals, reverse=True)
+    assert "outer" in profiler.format_summary()
+
+
+def test_span_records_exception(profiler):
+    with pytest.raises(ValueError):
+        with MBProfile.span("failing"):
+            raise ValueError("boom")
+
+    assert profiler.spans[0].attrs["error"] == "ValueError"
+
+
+def test_command_spans_record_argv_and_returncode(profiler):
+    run_cmd_get_output(["true", "--ignored"])
+    with pytest.raises(subprocess.CalledProcessError):
+        run_cmd_get_output(["false"])
+    _, rc = run_cmd_get_output(["false"], allow_error=True)
+
+    assert rc == 1
+    assert [s.name for s in profiler.spans] == ["exec true --ignored", "exec false", "exec false"]
+    assert profiler.spans[0].attrs == {"argv": "true --ignored", "returncode": 0}
+    assert [s.attrs["returncode"] for s in profiler.spans[1:]] == [1, 1]
+
+
+def test_chrome_trace(profiler, tmp_path):
+    with MBProfile.span("first", obj=object()):
+        pass
+    with MBProfile.span("second"):
+        pass
+
+    trace_path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(trace_path.as_posix())
+    trace = json.loads(trace_path.read_text())
+
+    events = trace["traceEvents"]
+    assert [e["name"] for e in events] == ["first", "second"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert events[0]["ts"] <= events[1]["ts"]
+    assert isinstance(events[0]["args"]["obj"], str)
+
+
+def test_cli_profile_output(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from mbctl.cli import commands
+
+    class FakeHost:
+        def whois(self, address):
+            with MBProfile.span("lookup"):
+                return [{"name": "web", "address": address, "container": True, "referenced_by": []}]
+
+    monkeypatch.setattr(commands, "get_daemon", lambda: None)
+    monkeypatch.setattr(commands, "get_host", lambda: FakeHost())
+    trace_path = tmp_path / "trace.json"
+    try:
+        result = CliRunner().invoke(
+            commands.app, ["--profile", "--profile-output", trace_path.as_posix(), "whois", "300::1"]
+        )
+    finally:
+        MBProfile.disable_profiling()
+
+    assert result.exit_code == 0, result.output
+    assert "web (container)" in result.output
+    names = [e["name"] for e in json.loads(trace_path.read_text())["traceEvents"]]
+    assert names == ["lookup"]
+
+
+def test_profile_flags_are_not_passed_to_nerdctl(monkeypatch):
+    from mbctl.cli import commands, main
+
+    called = []
+    monkeypatch.setattr(commands, "app", lambda prog_name: called.append(prog_name))
+    monkeypatch.setattr(main, "just_like_nerdctl", lambda cmd: pytest.fail(f"passed through: {cmd}"))
+    for args in (["--profile", "list"], ["--profile-output=trace.json", "list"]):
+        monkeypatch.setattr(sys, "argv", ["mbctl", *args])
+        monkeypatch.setattr(main, "argv", sys.argv)
+        main.main()
+
+    assert called == ["mbctl", "mbctl"]
@@ -0,0 +1,132 @@
+import subprocess
+
+import pytest
+
+from benchmarks.synthetic_host import PREFIX, YGG_ADDRESS, SyntheticHostSpec, write_synthetic_host
+from mbctl.MBConfig import mb_config
+from mbctl.MBHost import MBHost
+from mbctl.MBHost.MBContainerBuildResult import MBContainerBuildState
+from mbctl.MBHost.NerdClient import NerdContainerState, SimulatedNerdClient
+
+
+def _synthetic_host(tmp_path, monkeypatch, make_host, client: SimulatedNerdClient, spec: SyntheticHostSpec) -> MBHost:
+    monkeypatch.setattr(mb_config, "conf_cache", False)
+    write_synthetic_host(tmp_path.as_posix(), spec)
+    return make_host(client, yggaddr=YGG_ADDRESS, yggprefix=PREFIX)
+
+
+def test_container_lifecycle():
+    client = SimulatedNerdClient()
+    client.add_container("web")
+    pid = client.get_container_pid("web")
+
+    client.stop_and_wait_container("web")
+    assert client.get_container_state("web") == NerdContainerState.stopped
+    assert client.get_container_pid("web") == "0"
+    client.start_container("web")
+    assert client.get_container_pid("web") != pid
+
+    client.rename_container("web", "web_old")
+    assert client.get_all_container_states() == {"web_old": NerdContainerState.running}
+    client.force_delete_container("web_old")
+    assert client.list_all_containers_names() == []
+    assert client.get_container_state("web_old") == NerdContainerState.not_exist
+
+    with pytest.raises(subprocess.CalledProcessError):
+        client.start_container("missing")
+    assert client.calls[-1].error == "no such container: missing"
+
+
+def test_rename_conflict_and_exec():
+    client = SimulatedNerdClient()
+    client.add_container("a")
+    client.add_container("b", running=False)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        client.rename_container("a", "b")
+    assert client.execute_any_command_safely(["nerdctl", "exec", "-it", "a", "sh"]) == 0
+    assert client.execute_any_command_safely(["nerdctl", "exec", "-it", "b", "sh"]) == 1
+
+
+def test_failure_injection():
+    client = SimulatedNerdClient()
+    client.add_container("web", running=False)
+    failure = client.fail("start_container", "web", times=2)
+
+    for _ in range(2):
+        with pytest.raises(subprocess.CalledProcessError):
+            client.start_container("web")
+    client.start_container("web")
+
+    assert failure.hits == 2
+    assert client.call_counts()["start_container"] == 3
+    # 查询类操作失败时与真实后端一样返回"不存在"/空结果
+    client.fail("get_container_state", times=None)
+    client.fail("get_image_id")
+    assert client.get_container_state("web") == NerdContainerState.not_exist
+    assert client.get_image_id("docker.io/library/busybox:latest") is None
+
+
+def test_failure_rate_is_reproducible():
+    def failed_calls(seed: int) -> list[int]:
+        client = SimulatedNerdClient(failure_rate=0.3, seed=seed)
+        client.add_container("web")
+        failed = []
+        for i in range(50):
+            try:
+                client.start_container("web")
+            except subprocess.CalledProcessError:
+                failed.append(i)
+        return failed
+
+    assert failed_calls(1) == failed_calls(1)
+    assert 0 < len(failed_calls(1)) < 50
+
+
+def test_build_all_at_scale(tmp_path, monkeypatch, make_host):
+    client = SimulatedNerdClient(latency=0.001)
+    host = _synthetic_host(tmp_path, monkeypatch, make_host, client, SyntheticHostSpec(count=300))
+
+    results = host.build_all_containers(jobs=16)
+
+    assert {r.state for r in results} == {MBContainerBuildState.succeeded}
+    assert set(client.states.values()) == {NerdContainerState.running}
+    assert len(client.states) == 300
+    assert client.call_counts()["compose_create_container"] == 300
+    # 调用在等待延迟时不持有锁，所以并发构建的调用会相互重叠
+    calls = sorted(client.calls_of("compose_create_container"), key=lambda c: c.start)
+    assert any(b.start < a.start + a.duration for a, b in zip(calls, calls[1:]))
+
+    host.refresh_container_statuses()
+    assert all(s["status"] == "running" for s in host.list_container_summaries())
+
+
+def test_build_failure_cancels_dependents(tmp_path, monkeypatch, make_host):
+    client = SimulatedNerdClient()
+    host = _synthetic_host(tmp_path, monkeypatch, make_host, client, SyntheticHostSpec(count=60, depth=3))
+    root = next(c.name for c in host.list_containers() if host._container_tree.dependents(c.name))
+    client.fail("compose_create_container", root)
+
+    results = {r.name: r for r in host.build_all_containers(jobs=4)}
+
+    assert results[root].state == MBContainerBuildState.failed
+    cancelled = [r for r in results.values() if r.state == MBContainerBuildState.cancelled]
+    assert cancelled and root not in client.states
+    assert all(r.name not in client.states for r in cancelled)
+
+
+def test_compose_up_reuses_project_and_refuses_foreign_name(make_host):
+    client = SimulatedNerdClient()
+    host = make_host(client, {"web": [], "db": []}, yggaddr=YGG_ADDRESS, yggprefix=PREFIX)
+
+    host.build_new_container("web")
+    first_pid = client.containers["web"].pid
+    # 同一个 compose 项目再次 up 会重新创建容器
+    host.build_new_container("web")
+    assert client.containers["web"].pid != first_pid
+    assert client.get_image_id("example/web:latest").startswith("sha256:")
+
+    # 不是由该项目创建的同名容器
+    client.add_container("db")
+    with pytest.raises(subprocess.CalledProcessError):
+        host.build_new_container("db")
@@ -0,0 +1,171 @@
+import json
+import time
+
+from mbctl.MBHost import MBHost
+from mbctl.MBHost.MBContainerStopResult import MBContainerStopState
+from mbctl.MBHost.NerdClient import NerdClient, NerdContainerState, SimulatedNerdClient
+from mbctl.MBHost.NerdClient.NerdClientCliWrapper import nerd_stop_containers
+
+# a <- b <- c，d 没有依赖
+TREE = {"a": [], "b": ["a"], "c": ["b"], "d": []}
+
+
+def _simulated_host(make_host, tree: dict[str, list[str]] = TREE) -> tuple[MBHost, SimulatedNerdClient]:
+    client = SimulatedNerdClient()
+    for name in tree:
+        client.add_container(name)
+    return make_host(client, tree), client
+
+
+def _stop_batches(client: SimulatedNerdClient) -> list[set[str]]:
+    return [set(call.target.split(",")) for call in client.calls_of("stop_containers")]
+
+
+def test_stop_all_in_reverse_dependency_order(make_host):
+    host, client = _simulated_host(make_host)
+
+    results = host.stop_containers()
+
+    assert _stop_batches(client) == [{"c"}, {"b"}, {"a", "d"}]
+    assert {r.name: r.state for r in results} == {n: MBContainerStopState.stopped for n in TREE}
+    assert set(client.states.values()) == {NerdContainerState.stopped}
+    assert all(c.status.value == "stopped" for c in host.list_containers())
+
+
+def test_stop_subtree(make_host):
+    host, client = _simulated_host(make_host)
+
+    host.stop_containers(["b"], with_dependents=True)
+    assert _stop_batches(client) == [{"c"}, {"b"}]
+    assert client.states["a"] == NerdContainerState.running
+
+    client.calls.clear()
+    client.start_container("b")
+    host.stop_containers(["b"])
+    assert _stop_batches(client) == [{"b"}]
+
+
+def test_stop_skips_containers_that_are_not_running(make_host):
+    host, client = _simulated_host(make_host)
+    client.stop_and_wait_container("c")
+    client.force_delete_container("d")
+
+    results = {r.name: r.state for r in host.stop_containers()}
+
+    assert results["c"] == results["d"] == MBContainerStopState.not_running
+    assert _stop_batches(client) == [{"b"}, {"a"}]
+
+
+def test_stop_batch_takes_as_long_as_slowest_container(make_host):
+    tree = {f"svc{i}": [] for i in range(30)}
+    host, client = _simulated_host(make_host, tree)
+    for container in client.containers.values():
+        container.stop_seconds = 0.1
+    client.containers["svc7"].stop_seconds = None
+
+    start = time.perf_counter()
+    results = {r.name: r.state for r in host.stop_containers(timeout=0.3)}
+    elapsed = time.perf_counter() - start
+
+    # 逐个停止需要 29 * 0.1 + 0.3 秒
+    assert elapsed < 1.0
+    assert len(client.calls_of("stop_containers")) == 1
+    assert results.pop("svc7") == MBContainerStopState.killed
+    assert set(results.values()) == {MBContainerStopState.stopped}
+
+
+def test_failed_stop_keeps_requirements_running(make_host):
+    host, client = _simulated_host(make_host)
+    client.fail("stop_containers", "c")
+
+    results = {r.name: r for r in host.stop_containers()}
+
+    assert results["c"].state == MBContainerStopState.failed
+    assert results["b"].state == results["a"].state == MBContainerStopState.cancelled
+    assert results["a"].failed_dependent == "c"
+    assert results["d"].state == MBContainerStopState.stopped
+    assert client.states["a"] == NerdContainerState.running
+
+
+def test_stop_all_cli(monkeypatch, make_host):
+    from typer.testing import CliRunner
+
+    from mbctl.cli import commands
+
+    host, client = _simulated_host(make_host)
+    monkeypatch.setattr(commands, "get_daemon", lambda: None)
+    monkeypatch.setattr(commands, "get_host", lambda: host)
+
+    result = CliRunner().invoke(commands.app, ["stop-all", "-t", "5"])
+
+    assert result.exit_code == 0, result.output
+    assert "Stopped 4 containers" in result.output
+    result = CliRunner().invoke(commands.app, ["halt", "ghost"])
+    assert result.exit_code == 1
+    assert "Container 'ghost' not found." in result.output
+
+
+def test_halt_cli_cascades_only_on_request(monkeypatch, make_host):
+    from typer.testing import CliRunner
+
+    from mbctl.cli import commands
+
+    host, client = _simulated_host(make_host)
+    monkeypatch.setattr(commands, "get_daemon", lambda: None)
+    monkeypatch.setattr(commands, "get_host", lambda: host)
+
+    result = CliRunner().invoke(commands.app, ["halt", "b"])
+    assert result.exit_code == 0, result.output
+    assert _stop_batches(client) == [{"b"}]
+
+    client.calls.clear()
+    client.start_container("b")
+    result = CliRunner().invoke(commands.app, ["halt", "b", "--with-dependents"])
+    assert result.exit_code == 0, result.output
+    assert _stop_batches(client) == [{"c"}, {"b"}]
+
+
+def test_nerd_stop_containers_batches_and_kills(fake_nerdctl):
+    fake_nerdctl.state_path.write_text(
+        json.dumps({"web": {"running": True}, "db": {"running": True}, "stuck": {"running": True, "ignore_sigterm": True}})
+    )
+
+    killed = nerd_stop_containers(["web", "db", "stuck"], timeout=1.5)
+
+    assert killed == ["stuck"]
+    assert fake_nerdctl.containers() == {"web": False, "db": False, "stuck": False}
+    kills = [call["args"][:3] for call in fake_nerdctl.calls() if call["args"][0] == "kill"]
+    assert kills == [["kill", "-s", "SIGTERM"], ["kill", "-s", "SIGKILL"]]
+
+
+def test_nerd_stop_containers_uses_stop_signal(fake_nerdctl):
+    # systemd 容器把 SIGTERM 当作普通信号，只有 SIGRTMIN+3 会让它关机
+    fake_nerdctl.state_path.write_text(
+        json.dumps(
+            {
+                "web": {"running": True},
+                "init": {"running": True, "stop_signal": "SIGRTMIN+3", "ignore_sigterm": True},
+            }
+        )
+    )
+
+    killed = nerd_stop_containers(["web", "init"], timeout=5)
+
+    assert killed == []
+    assert fake_nerdctl.containers() == {"web": False, "init": False}
+    kills = {tuple(call["args"][2:]) for call in fake_nerdctl.calls() if call["args"][0] == "kill"}
+    assert kills == {("SIGTERM", "web"), ("SIGRTMIN+3", "init")}
+
+
+def test_unkillable_container_is_reported_failed(fake_nerdctl, make_host):
+    fake_nerdctl.state_path.write_text(
+        json.dumps({"db": {"running": True}, "web": {"running": True, "unkillable": True}})
+    )
+    host = make_host(NerdClient(), {"db": [], "web": ["db"]})
+
+    results = {r.name: r.state for r in host.stop_containers(timeout=0.3)}
+
+    assert results == {"web": MBContainerStopState.failed, "db": MBContainerStopState.cancelled}
+    assert fake_nerdctl.containers() == {"db": True, "web": True}
+    # 等待 SIGKILL 超时不会抛出异常，容器保持运行状态
+    assert nerd_stop_containers(["web"], timeout=0.3) == ["web"]
@@ -0,0 +1,113 @@
+import errno
+import fcntl
+import os
+import time
+from pathlib import Path
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBHost.MBTrash import FOREIGN_TRASH_PREFIX, REAPER_LOG_FILE, MBTrash
+from mbctl.StateFileUtils import STATE_DIR_NAME
+from mbctl.datatypes import MBContainerConf, MBContainerMountConf, MBContainerMountPointConf, MountType
+
+
+def _fill(path: Path, files: int = 3, size: int = 100) -> None:
+    (path / "nested").mkdir(parents=True)
+    for i in range(files):
+        (path / "nested" / f"f{i}").write_bytes(b"x" * size)
+
+
+def test_move_to_trash_then_empty_reports_bytes(tmp_path):
+    live = tmp_path / "data" / "web"
+    _fill(live)
+    trash = MBTrash((tmp_path / ".trash").as_posix())
+
+    entry = trash.move_to_trash(live.as_posix(), "web-data")
+
+    assert entry is not None and not live.exists()
+    assert trash.entries() == [entry]
+
+    progress = []
+    report = trash.empty(on_progress=progress.append)
+
+    assert report is not None
+    assert (report.files, report.bytes) == (3, 300)
+    assert [p.name for p in progress] == [entry]
+    assert trash.entries() == []
+
+
+def test_missing_source_is_skipped(tmp_path):
+    trash = MBTrash((tmp_path / ".trash").as_posix())
+    assert trash.move_to_trash((tmp_path / "missing").as_posix(), "x") is None
+
+
+def test_cross_device_source_is_renamed_in_place(tmp_path, monkeypatch):
+    live = tmp_path / "elsewhere" / "web"
+    _fill(live, files=2)
+    trash_dir = tmp_path / ".trash"
+    trash = MBTrash(trash_dir.as_posix())
+
+    real_rename = os.rename
+
+    def rename(src, dst):
+        if str(dst).startswith(trash_dir.as_posix()):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", rename)
+    entry = trash.move_to_trash(live.as_posix(), "web-data")
+
+    assert not live.exists()
+    foreign = live.parent / (FOREIGN_TRASH_PREFIX + entry)
+    assert foreign.is_dir()
+    assert os.readlink(trash_dir / entry) == foreign.as_posix()
+
+    report = trash.empty()
+    assert report is not None and report.files == 2
+    assert not foreign.exists() and trash.entries() == []
+
+
+def test_only_one_reaper_at_a_time(tmp_path):
+    trash = MBTrash((tmp_path / ".trash").as_posix())
+    os.makedirs(trash.trash_dir)
+    with open(os.path.join(trash.trash_dir, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        assert trash.empty(wait=False) is None
+
+
+def test_background_reaper_empties_trash(tmp_path, monkeypatch):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    live = tmp_path / "data"
+    _fill(live)
+    trash = MBTrash()
+    trash.move_to_trash(live.as_posix(), "bg")
+
+    trash.start_background_reaper()
+
+    deadline = time.monotonic() + 15
+    while trash.entries() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert trash.entries() == []
+    # 回收进程的输出写入 .mbctl 下的日志文件。runpy 的 RuntimeWarning 会在回收开始之前写出，
+    # 通过独立的入口模块启动时不应出现。
+    log_path = tmp_path / STATE_DIR_NAME / REAPER_LOG_FILE
+    assert log_path.exists()
+    assert "RuntimeWarning" not in log_path.read_text()
+
+
+def test_prune_moves_mounts_into_storage_trash(tmp_path, make_host, stopped_nerd_client):
+    web_conf = MBContainerConf(
+        image="example/web",
+        mount=MBContainerMountConf(
+            data={"/data": MBContainerMountPointConf()},
+            log={"/log": MBContainerMountPointConf()},
+        ),
+    )
+    host = make_host(stopped_nerd_client, {"web": web_conf})
+    data_dir = tmp_path / MountType.data.value / "web" / "data"
+    _fill(data_dir)
+
+    trashed = host.remove_container_mounts("web", [MountType.data, MountType.log])
+
+    assert len(trashed) == 1 and trashed[0].split("-", 1)[1].startswith("web-data-")
+    assert not data_dir.exists()
+    assert MBTrash().entries() == trashed
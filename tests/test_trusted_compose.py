@@ -0,0 +1,91 @@
+from os import path
+
+from mbctl.MBConfig import mb_config
+from mbctl.MBContainer import MBContainer
+from mbctl.YamlUtils import yaml_dumps
+from mbctl.datatypes import MBContainerConf
+
+PREFIX = "300:6b9f:cca2:a583::/64"
+CONF_FILE = path.join(path.dirname(__file__), "resources", "test-man8s-conf.yaml")
+
+
+def _containers() -> list[MBContainer]:
+    confs = {
+        "resource": MBContainerConf.from_yaml_file(CONF_FILE),
+        "plain": MBContainerConf(image="example/plain", enable_ygg=False, autostart=False),
+        "extra": MBContainerConf(
+            image="example/extra",
+            dns="1.1.1.1",
+            extra_compose_configs={"cap_add": ["NET_ADMIN"], "restart": "always"},
+        ),
+    }
+    # 与 test_conf_conv 一样不解析引用，引用挂载点的源保持为空
+    return [MBContainer(name, conf, PREFIX) for name, conf in confs.items()]
+
+
+def test_trusted_dict_matches_validated_models(monkeypatch):
+    monkeypatch.setattr(mb_config, "strict_models", False)
+    for container in _containers():
+        validated = container.to_compose_conf().to_compose_dict()
+        trusted = container.to_compose_dict()
+        assert trusted == validated
+        # 键的顺序会影响 yaml 输出，也必须一致
+        assert yaml_dumps(trusted) == yaml_dumps(validated)
+
+
+def test_strict_mode_uses_validated_models(monkeypatch):
+    monkeypatch.setattr(mb_config, "strict_models", True)
+    container = _containers()[2]
+    calls = []
+    to_compose_conf = MBContainer.to_compose_conf
+
+    def spy(self):
+        calls.append(self.name)
+        return to_compose_conf(self)
+
+    monkeypatch.setattr(MBContainer, "to_compose_conf", spy)
+    assert container.to_compose_dict()["services"]["extra"]["cap_add"] == ["NET_ADMIN"]
+    assert calls == ["extra"]
+
+
+def test_trusted_dict_does_not_share_mutable_state(monkeypatch):
+    monkeypatch.setattr(mb_config, "strict_models", False)
+    container = _containers()[0]
+    first = container.to_compose_dict()
+    first["services"]["resource"]["environment"]["INJECTED"] = "1"
+    first["services"]["resource"]["volumes"].append("/x:/x")
+    second = container.to_compose_dict()
+    assert "INJECTED" not in second["services"]["resource"]["environment"]
+    assert "/x:/x" not in second["services"]["resource"]["volumes"]
+
+
+def test_build_renders_compose_document_once(tmp_path, monkeypatch):
+    from mbctl.MBHost import MBHost
+    from mbctl.MBHost.NerdClient import SimulatedNerdClient
+    from mbctl.datatypes import MountType
+
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    monkeypatch.setattr(mb_config, "strict_models", False)
+    conf_dir = tmp_path / MountType.conf.value / "web"
+    conf_dir.mkdir(parents=True)
+    MBContainerConf(image="example/web:latest").to_yaml_file((conf_dir / mb_config.config_file).as_posix())
+    host = MBHost(client=SimulatedNerdClient(), yggaddr="ygg", yggprefix=PREFIX)
+
+    renders = []
+    to_compose_dict = MBContainer.to_compose_dict
+
+    def spy(self):
+        renders.append(self.name)
+        return to_compose_dict(self)
+
+    def no_models(self):
+        raise AssertionError("building must not construct ComposeConf outside strict mode")
+
+    monkeypatch.setattr(MBContainer, "to_compose_dict", spy)
+    monkeypatch.setattr(MBContainer, "to_compose_conf", no_models)
+    host.build_new_container("web")
+    (result,) = host.apply_containers()
+
+    # build 渲染一次，同时用于 compose 文件和指纹；apply 比较指纹时渲染一次
+    assert renders == ["web", "web"]
+    assert result.action.value == "unchanged"
@@ -0,0 +1,87 @@
+import importlib
+import io
+from datetime import datetime
+from os import path
+
+import pytest
+import yaml
+
+from mbctl import YamlUtils
+from mbctl.MBContainer import MBContainer
+from mbctl.YamlUtils import HAS_LIBYAML, yaml_dump, yaml_dumps, yaml_load
+from mbctl.datatypes import MBContainerConf
+
+RESOURCES = path.join(path.dirname(__file__), "resources")
+CONF_FILE = path.join(RESOURCES, "test-man8s-conf.yaml")
+COMPOSE_FILE = path.join(RESOURCES, "test-man8s-compose.yaml")
+
+needs_libyaml = pytest.mark.skipif(not HAS_LIBYAML, reason="PyYAML is built without libyaml")
+
+# 覆盖 emitter 中容易出现差异的情况：长字符串折行、多行字符串、非 ASCII、需要加引号的标量等。
+EDGE_CASES = {
+    "long": "word " * 40,
+    "multiline": "first line\nsecond line\n",
+    "unicode": "容器 Ünïcödé",
+    "quoted": ["yes", "no", "on", "null", "~", "1.0", "0x1f", "012", "", " padded ", "a: b", "#c", "- d"],
+    "numbers": [0, -1, 1.5, 1e20, float("inf")],
+    "nested": {"empty_list": [], "empty_dict": {}, "none": None, "flag": True},
+    "time": datetime(2025, 1, 31, 9, 30),
+    "ports": [[9000, 9000], [114514, 1919810, True]],
+}
+
+
+def _pure_dumps(data) -> str:
+    return yaml.dump(data, Dumper=yaml.SafeDumper, sort_keys=False)
+
+
+def _render_resource_compose() -> str:
+    conf = MBContainerConf.from_yaml_file(CONF_FILE)
+    container = MBContainer("test_container", conf, "300:6b9f:cca2:a583::/64")
+    return container.to_compose_conf().to_compose_yaml_str()
+
+
+@pytest.mark.parametrize("resource", [CONF_FILE, COMPOSE_FILE])
+def test_load_matches_pure_python_loader(resource):
+    with open(resource, encoding="utf-8") as f:
+        text = f.read()
+    assert yaml_load(text) == yaml.load(text, Loader=yaml.SafeLoader)
+
+
+@needs_libyaml
+def test_dump_is_byte_identical_to_pure_python_dumper():
+    conf_dict = MBContainerConf.from_yaml_file(CONF_FILE).model_dump(mode="json")
+    compose_dict = yaml_load(_render_resource_compose())
+    for data in (EDGE_CASES, conf_dict, compose_dict):
+        assert yaml_dumps(data) == _pure_dumps(data)
+        stream = io.StringIO()
+        yaml_dump(data, stream)
+        assert stream.getvalue() == _pure_dumps(data)
+
+
+def test_rendered_compose_matches_golden_file():
+    with open(COMPOSE_FILE, encoding="utf-8") as f:
+        golden = yaml_load(f)
+    assert yaml_load(_render_resource_compose()) == golden
+
+
+def test_conf_round_trip(tmp_path):
+    conf = MBContainerConf.from_yaml_file(CONF_FILE)
+    out = (tmp_path / "container.yaml").as_posix()
+    conf.to_yaml_file(out)
+    with open(out, encoding="utf-8") as f:
+        assert f.read() == _pure_dumps(conf.model_dump(mode="json"))
+    assert MBContainerConf.from_yaml_file(out) == conf
+
+
+def test_falls_back_without_libyaml(monkeypatch):
+    monkeypatch.delattr(yaml, "CSafeLoader", raising=False)
+    monkeypatch.delattr(yaml, "CSafeDumper", raising=False)
+    try:
+        importlib.reload(YamlUtils)
+        assert not YamlUtils.HAS_LIBYAML
+        assert YamlUtils.SafeLoader is yaml.SafeLoader
+        assert YamlUtils.yaml_dumps(EDGE_CASES) == _pure_dumps(EDGE_CASES)
+        assert YamlUtils.yaml_load("a: [1, 2]") == {"a": [1, 2]}
+    finally:
+        monkeypatch.undo()
+        importlib.reload(YamlUtils)
@@ -0,0 +1,67 @@
+import hashlib
+import ipaddress
+
+import pytest
+
+from mbctl.MBContainer import MBContainer
+from mbctl.datatypes import MBContainerConf
+from mbctl.network import string_to_v6suffix
+from mbctl.network.ygg_address_deriver import YggAddressDeriver, get_ygg_address_deriver
+
+PREFIXES = ["300:64f7:cae4:9395::/64", "2001:db8:1:2::/64", "fd00::/8", "2001:db8::1/48"]
+NAMES = ["web", "db", "", "容器", "a" * 200]
+
+
+def legacy_string_to_v6suffix(prefix: str, src_str: str) -> str:
+    network = ipaddress.IPv6Network(prefix, strict=False)
+    remaining_bits = 128 - network.prefixlen
+    hash_int = int.from_bytes(hashlib.sha256(src_str.encode("utf-8")).digest(), "big")
+    suffix = hash_int & ((1 << remaining_bits) - 1)
+    prefix_int = int(network.network_address) & ~((1 << remaining_bits) - 1)
+    return str(ipaddress.IPv6Address(prefix_int | suffix))
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_matches_legacy_derivation(prefix):
+    deriver = YggAddressDeriver(prefix)
+    for name in NAMES:
+        expected = legacy_string_to_v6suffix(prefix, name)
+        assert deriver.derive(name) == expected
+        assert string_to_v6suffix(prefix, name) == expected
+    assert deriver.derive_many(NAMES) == {n: legacy_string_to_v6suffix(prefix, n) for n in NAMES}
+
+
+def test_lru_evicts_least_recently_used():
+    deriver = YggAddressDeriver(PREFIXES[0], maxsize=2)
+    deriver.derive("a")
+    deriver.derive("b")
+    deriver.derive("a")
+    deriver.derive("c")
+    assert list(deriver._cache) == ["a", "c"]
+    assert deriver.cache_size() == 2
+
+
+def test_derive_many_keeps_order_and_fills_cache():
+    deriver = YggAddressDeriver(PREFIXES[0])
+    deriver.derive("b")
+    result = deriver.derive_many(["c", "b", "a", "c"])
+    assert list(result) == ["c", "b", "a"]
+    assert deriver.cache_size() == 3
+
+
+def test_deriver_is_shared_per_prefix():
+    assert get_ygg_address_deriver(PREFIXES[0]) is get_ygg_address_deriver(PREFIXES[0])
+    assert get_ygg_address_deriver(PREFIXES[0]) is not get_ygg_address_deriver(PREFIXES[1])
+
+
+def test_rendered_addresses_are_unchanged():
+    conf = MBContainerConf(image="example/web", local_access={"db", "cache"}, dns="resolver")
+    container = MBContainer("web", conf, PREFIXES[0])
+    container.resolve_references({})
+    service = container.to_compose_conf().services[container.name]
+    prefix = container.host_yggdrasil_prefix
+    assert service.extra_hosts == {
+        host: legacy_string_to_v6suffix(prefix, host.split(".")[0]) for host in service.extra_hosts
+    }
+    assert service.dns == legacy_string_to_v6suffix(prefix, container.dns.value)
+    assert container.yggdrasil_addr == legacy_string_to_v6suffix(prefix, container.name)
@@ -0,0 +1,126 @@
+import json
+import socket
+import threading
+
+import pytest
+
+from mbctl.MBConfig import mb_config
+from mbctl.network import yggdrasil_addr
+from mbctl.network.yggdrasil_addr import (
+    get_host_yggdrasil_address_and_subnet,
+    query_admin_socket_getself,
+)
+
+ADDRESS = "200:64f7:cae4:9395:44f1:455d:de99:e7"
+SUBNET = "300:64f7:cae4:9395::/64"
+
+
+def _serve_admin_socket(path: str, reply: dict) -> threading.Thread:
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+
+    def serve():
+        with server:
+            conn, _ = server.accept()
+            with conn:
+                request = json.loads(conn.recv(65536).decode("utf-8"))
+                assert request["request"] == "getself"
+                payload = json.dumps(reply).encode("utf-8")
+                # send in two pieces to exercise partial reads
+                conn.sendall(payload[:10])
+                conn.sendall(payload[10:])
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def ygg_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(mb_config, "storage_path", tmp_path.as_posix())
+    watch_file = tmp_path / "yggdrasil.conf"
+    watch_file.write_text("PrivateKey: a\n")
+    monkeypatch.setattr(
+        mb_config, "yggdrasil", mb_config.yggdrasil.model_copy(
+            update={"watch_files": [watch_file.as_posix()]}
+        )
+    )
+    monkeypatch.setattr(yggdrasil_addr, "_host_identity", None)
+    calls = []
+
+    def fake_query():
+        calls.append(1)
+        return ADDRESS, SUBNET
+
+    monkeypatch.setattr(yggdrasil_addr, "_query_host_identity", fake_query)
+    return watch_file, calls
+
+
+def test_query_admin_socket(tmp_path):
+    socket_path = (tmp_path / "ygg.sock").as_posix()
+    thread = _serve_admin_socket(
+        socket_path,
+        {"status": "success", "request": {}, "response": {"address": ADDRESS, "subnet": SUBNET}},
+    )
+
+    assert query_admin_socket_getself(f"unix://{socket_path}") == (ADDRESS, SUBNET)
+    thread.join(timeout=5)
+
+
+def test_query_admin_socket_legacy_response(tmp_path):
+    socket_path = (tmp_path / "ygg.sock").as_posix()
+    _serve_admin_socket(
+        socket_path,
+        {"status": "success", "response": {"self": {ADDRESS: {"subnet": SUBNET}}}},
+    )
+
+    assert query_admin_socket_getself(socket_path) == (ADDRESS, SUBNET)
+
+
+def test_identity_is_cached_across_processes(ygg_state, monkeypatch):
+    _, calls = ygg_state
+
+    assert get_host_yggdrasil_address_and_subnet() == (ADDRESS, SUBNET)
+    assert get_host_yggdrasil_address_and_subnet() == (ADDRESS, SUBNET)
+    # a new process starts with an empty in-process cache and reads the state file
+    monkeypatch.setattr(yggdrasil_addr, "_host_identity", None)
+    assert get_host_yggdrasil_address_and_subnet() == (ADDRESS, SUBNET)
+
+    assert len(calls) == 1
+
+
+def test_identity_refreshes_when_watched_file_changes(ygg_state, monkeypatch):
+    watch_file, calls = ygg_state
+    get_host_yggdrasil_address_and_subnet()
+
+    watch_file.write_text("PrivateKey: rotated-key\n")
+    monkeypatch.setattr(yggdrasil_addr, "_host_identity", None)
+    get_host_yggdrasil_address_and_subnet()
+
+    assert len(calls) == 2
+
+
+def test_identity_refreshes_after_ttl(ygg_state, monkeypatch):
+    _, calls = ygg_state
+    get_host_yggdrasil_address_and_subnet()
+
+    monkeypatch.setattr(
+        mb_config, "yggdrasil", mb_config.yggdrasil.model_copy(update={"cache_ttl": 0})
+    )
+    monkeypatch.setattr(yggdrasil_addr, "_host_identity", None)
+    get_host_yggdrasil_address_and_subnet()
+
+    assert len(calls) == 2
+
+
+def test_static_identity_from_config(ygg_state, monkeypatch):
+    _, calls = ygg_state
+    monkeypatch.setattr(
+        mb_config,
+        "yggdrasil",
+        mb_config.yggdrasil.model_copy(update={"address": "200::1", "subnet": "300::/64"}),
+    )
+
+    assert get_host_yggdrasil_address_and_subnet() == ("200::1", "300::/64")
+    assert calls == []